@@ -0,0 +1,99 @@
+import os
+import struct
+from contextlib import contextmanager
+
+# The checkpoint journal, the review schedule and the response times are
+# append-only logs: a header of a magic and a version, then records added as
+# they happen. A crash while appending can tear the last record, which
+# readers drop. Files that are replaced as a whole are written to a
+# temporary file and renamed into place, so a reader sees the old file or
+# the new one and never a partial write.
+_HEADER = struct.Struct("<4sI")  # magic, version
+
+
+@contextmanager
+def atomic_write(path, mode="wb", encoding=None):
+    """Open a temporary file that replaces `path` when the block finishes
+
+    If the block raises, the temporary file is removed and `path` is left
+    as it was.
+    """
+    temp_path = os.fspath(path) + ".tmp"
+    try:
+        with open(temp_path, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_atomic(path, data):
+    """Replace a file with `data` (bytes)"""
+    with atomic_write(path) as f:
+        f.write(data)
+
+
+def whole_records(body, record_size):
+    """Return `body` cut to whole fixed-size records, dropping a torn one at the end"""
+    return body[:len(body) - len(body) % record_size]
+
+
+class AppendLog:
+    """An append-only file that starts with a (magic, version) header
+
+    The file is opened on the first append. A missing file, or one with
+    another header, is started afresh then; readers treat it as empty.
+    """
+
+    def __init__(self, path, magic, version):
+        self.path = path
+        self.magic = magic
+        self.version = version
+        self._file = None
+
+    def _header(self):
+        return _HEADER.pack(self.magic, self.version)
+
+    def read(self):
+        """Return the bytes after the header, or None if the file is missing or has another header"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if data[:_HEADER.size] != self._header():
+            return None
+        return data[_HEADER.size:]
+
+    def open(self):
+        """Open the log for appending; returns True if it was started afresh"""
+        if self._file is not None:
+            return False
+        fresh = False
+        header = b""
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                header = f.read(_HEADER.size)
+        if header != self._header():
+            write_atomic(self.path, self._header())
+            fresh = True
+        self._file = open(self.path, "ab")
+        return fresh
+
+    def append(self, data):
+        self.open()
+        self._file.write(data)
+        self._file.flush()
+
+    def rewrite(self, body=b""):
+        """Replace the whole log with `body` after a new header"""
+        self.close()
+        write_atomic(self.path, self._header() + body)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,119 @@
+import queue
+import threading
+
+DEFAULT_MAX_PENDING = 1024
+# How often the Tk thread checks for finished writes while any are pending
+POLL_INTERVAL_MS = 50
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """Run file I/O on a worker thread so it never blocks the Tk main loop
+
+    Tasks run in submission order. Tasks submitted with a `key` coalesce:
+    when a newer task with the same key is queued, older ones are skipped,
+    so only the latest snapshot or position is ever written. Completion and
+    error callbacks are handed back to the Tk thread with after(), since Tk
+    must only be touched from the thread running its main loop.
+
+    With a `profiler` (see ui_profiler), every task is timed on the worker.
+    """
+
+    def __init__(self, master, max_pending=DEFAULT_MAX_PENDING, profiler=None, name="quiz-writer"):
+        self.master = master
+        self.profiler = profiler
+        self._tasks = queue.Queue(max_pending)
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._latest = {}  # coalescing key -> sequence number of the newest task
+        self._sequence = 0
+        self._pending = 0
+        self._polling = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, key=None, on_done=None, on_error=None):
+        """Queue func(*args) on the worker thread
+
+        `on_done(result)` or `on_error(exception)` is later called on the Tk
+        thread. Errors without an `on_error` handler are printed. Blocks if
+        `max_pending` tasks are already waiting.
+        """
+        if self._closed:
+            raise RuntimeError("Background writer is closed")
+        if self.profiler is not None:
+            func = self.profiler.wrap("write " + getattr(func, "__qualname__", "task"), func)
+
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+            if key is not None:
+                self._latest[key] = sequence
+            self._pending += 1
+        self._tasks.put((sequence, key, func, args, on_done, on_error))
+        self._schedule_poll()
+
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            if task is _STOP:
+                break
+
+            sequence, key, func, args, on_done, on_error = task
+            with self._lock:
+                superseded = key is not None and self._latest[key] != sequence
+            if not superseded:
+                try:
+                    result = func(*args)
+                except Exception as e:
+                    self._results.put((on_error, e, True))
+                else:
+                    if on_done is not None:
+                        self._results.put((on_done, result, False))
+
+            with self._lock:
+                self._pending -= 1
+
+    def _schedule_poll(self):
+        if not self._polling and not self._closed:
+            self._polling = True
+            self.master.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        self.dispatch_results()
+        with self._lock:
+            busy = self._pending > 0
+        if busy or not self._results.empty():
+            self._schedule_poll()
+
+    def dispatch_results(self):
+        """Run the callbacks of finished tasks; must be called on the Tk thread"""
+        while True:
+            try:
+                callback, value, failed = self._results.get_nowait()
+            except queue.Empty:
+                return
+
+            if callback is not None:
+                callback(value)
+            elif failed:
+                print(f"Background write failed: {str(value)}")
+
+    def close(self, wait=True):
+        """Finish every queued write, run the remaining callbacks and stop the thread
+
+        With `wait` unset the thread is left to stop after its current task
+        and no more callbacks are run, for tasks whose results are no longer
+        wanted. Queued tasks still run; the thread is a daemon, so it doesn't
+        keep the process alive.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._tasks.put(_STOP)
+        if wait:
+            self._thread.join()
+            self.dispatch_results()
@@ -0,0 +1,470 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from append_log import atomic_write
+from question_bank import QuestionBank, load_question_bank, resolve_answer_key
+from question_loader import iter_questions
+
+# Binary question bank cache, written next to the source file.
+#
+# Layout (little-endian):
+#   header          see _HEADER below
+#   string blob     UTF-8 text of every string, back to back, padded to 8 bytes
+#   string_offsets  uint64[string_count + 1]  byte offsets into the string blob
+#   record_starts   uint64[question_count]    index of each question's text in the string table
+#   option_counts   uint16[question_count]
+#   answer_counts   uint16[question_count]
+#   answer_masks    uint16[question_count]    options whose text is a correct answer
+#   repeated_masks  uint16[question_count]    options repeating an earlier option's text
+#   unmatched_counts uint16[question_count]   answers matching no option, padded to 8 bytes
+#   hash_keys       uint64[question_count]    question text hashes, sorted
+#   hash_ids        uint64[question_count]    question ID for each entry of hash_keys
+#
+# Each question's text is followed by its options and then its answers in the
+# string table, so a question's strings are one contiguous run. The blob comes
+# first so the cache can be written while the source is still being parsed.
+# The answer masks are the resolve_answer_key() result for each question, so
+# loading the cache resolves no answers.
+CACHE_MAGIC = b"QBNK"
+CACHE_VERSION = 3
+CACHE_SUFFIX = ".qbc"
+
+_HEADER = struct.Struct("<4sHHQQ32sQQQ")
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+class CacheError(Exception):
+    """Raised when a cache file is missing, truncated or in an unknown format"""
+
+
+def cache_path_for(source_path):
+    """Return the cache file path used for a question bank file"""
+    return os.fspath(source_path) + CACHE_SUFFIX
+
+
+def source_stamp(source_path):
+    """Return the (size, mtime_ns) pair used as the cheap invalidation check"""
+    stat = os.stat(source_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def source_hash(source_path):
+    """Return the BLAKE2b digest of a source file, read in chunks"""
+    digest = hashlib.blake2b(digest_size=32)
+    with open(source_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def source_signature(source_path):
+    """Return (size, mtime_ns, hash) describing the current state of a source file"""
+    size, mtime_ns = source_stamp(source_path)
+    return size, mtime_ns, source_hash(source_path)
+
+
+def question_key(question):
+    """Return the 64-bit hash used to look questions up by text"""
+    return int.from_bytes(hashlib.blake2b(question.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _little_endian(values):
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _padding(length, alignment=8):
+    return b"\0" * (-length % alignment)
+
+
+class _CacheWriter:
+    """Stream questions into a cache file as they are parsed
+
+    Strings go straight to disk; only the offset arrays and the question
+    hash index are kept in memory.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.blob_size = 0
+        self.string_offsets = array("Q", [0])
+        self.record_starts = array("Q")
+        self.option_counts = array("H")
+        self.answer_counts = array("H")
+        self.answer_masks = array("H")
+        self.repeated_masks = array("H")
+        self.unmatched_counts = array("H")
+        self.keys = array("Q")  # question key of each question ID
+        self.ids = {}  # question key -> question ID
+        f.write(b"\0" * _HEADER.size)
+
+    def _write_string(self, text):
+        data = text.encode("utf-8")
+        self.f.write(data)
+        self.blob_size += len(data)
+        self.string_offsets.append(self.blob_size)
+
+    def _read_question(self, question_id):
+        string_index = self.record_starts[question_id]
+        start = self.string_offsets[string_index]
+        end = self.string_offsets[string_index + 1]
+        self.f.seek(_HEADER.size + start)
+        data = self.f.read(end - start)
+        self.f.seek(0, os.SEEK_END)
+        return data.decode("utf-8")
+
+    def add(self, question, options, answers):
+        """Add a question, replacing the options and answers of a repeated one"""
+        answer_mask, repeated_mask, unmatched = resolve_answer_key(options, answers)
+        string_index = len(self.string_offsets) - 1
+        for text in (question, *options, *answers):
+            self._write_string(text)
+
+        key = question_key(question)
+        question_id = self.ids.get(key)
+        # A matching key is a repeated question unless the 64-bit hashes collided
+        if question_id is not None and self._read_question(question_id) == question:
+            # Like QuestionBank.add, keep the ID and point it at the new strings
+            self.record_starts[question_id] = string_index
+            self.option_counts[question_id] = len(options)
+            self.answer_counts[question_id] = len(answers)
+            self.answer_masks[question_id] = answer_mask
+            self.repeated_masks[question_id] = repeated_mask
+            self.unmatched_counts[question_id] = len(unmatched)
+            return
+
+        self.ids.setdefault(key, len(self.record_starts))
+        self.keys.append(key)
+        self.record_starts.append(string_index)
+        self.option_counts.append(len(options))
+        self.answer_counts.append(len(answers))
+        self.answer_masks.append(answer_mask)
+        self.repeated_masks.append(repeated_mask)
+        self.unmatched_counts.append(len(unmatched))
+
+    def finish(self, signature):
+        size, mtime_ns, digest = signature
+        question_count = len(self.record_starts)
+
+        hash_ids = array("Q", sorted(range(question_count), key=self.keys.__getitem__))
+        hash_keys = array("Q", (self.keys[question_id] for question_id in hash_ids))
+
+        counts = b"".join(
+            _little_endian(values).tobytes()
+            for values in (self.option_counts, self.answer_counts, self.answer_masks,
+                           self.repeated_masks, self.unmatched_counts)
+        )
+        f = self.f
+        f.write(_padding(self.blob_size))
+        for values in (self.string_offsets, self.record_starts):
+            f.write(_little_endian(values).tobytes())
+        f.write(counts)
+        f.write(_padding(len(counts)))
+        for values in (hash_keys, hash_ids):
+            f.write(_little_endian(values).tobytes())
+
+        f.seek(0)
+        f.write(_HEADER.pack(
+            CACHE_MAGIC, CACHE_VERSION, 0, size, mtime_ns, digest,
+            question_count, len(self.string_offsets) - 1, self.blob_size
+        ))
+
+
+def write_bank_cache(records, cache_path, signature):
+    """Write (question, options, answers) records to a cache file
+
+    `records` may be a QuestionBank or any iterable of records, such as the
+    output of iter_questions(). `signature` is the source_signature() taken
+    before the source was parsed. The cache is written to a temporary file
+    and renamed into place so a reader never sees a partially written cache.
+    """
+    with atomic_write(cache_path, "w+b") as f:
+        writer = _CacheWriter(f)
+        for question, options, answers in records:
+            writer.add(question, options, answers)
+        writer.finish(signature)
+
+
+def read_cache_header(cache_path):
+    """Return the unpacked header fields of a cache file as a dict"""
+    with open(cache_path, "rb") as f:
+        raw = f.read(_HEADER.size)
+    return _unpack_header(raw)
+
+
+def _unpack_header(raw):
+    if len(raw) < _HEADER.size:
+        raise CacheError("Cache file is truncated")
+
+    magic, version, _, size, mtime_ns, digest, question_count, string_count, blob_size = _HEADER.unpack_from(raw)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        raise CacheError("Unknown cache format")
+
+    return {
+        "source_size": size,
+        "source_mtime_ns": mtime_ns,
+        "source_hash": digest,
+        "question_count": question_count,
+        "string_count": string_count,
+        "blob_size": blob_size,
+    }
+
+
+def cache_layout(header):
+    """Return the byte offsets of each section in a cache file"""
+    question_count = header["question_count"]
+    blob = _HEADER.size
+    string_offsets = blob + header["blob_size"] + len(_padding(header["blob_size"]))
+    record_starts = string_offsets + 8 * (header["string_count"] + 1)
+    option_counts = record_starts + 8 * question_count
+    answer_counts = option_counts + 2 * question_count
+    answer_masks = answer_counts + 2 * question_count
+    repeated_masks = answer_masks + 2 * question_count
+    unmatched_counts = repeated_masks + 2 * question_count
+    hash_keys = unmatched_counts + 2 * question_count + len(_padding(10 * question_count))
+    hash_ids = hash_keys + 8 * question_count
+    return {
+        "blob": blob,
+        "string_offsets": string_offsets,
+        "record_starts": record_starts,
+        "option_counts": option_counts,
+        "answer_counts": answer_counts,
+        "answer_masks": answer_masks,
+        "repeated_masks": repeated_masks,
+        "unmatched_counts": unmatched_counts,
+        "hash_keys": hash_keys,
+        "hash_ids": hash_ids,
+        "end": hash_ids + 8 * question_count,
+    }
+
+
+def _read_array(typecode, data, start, count):
+    values = array(typecode)
+    values.frombytes(data[start:start + values.itemsize * count])
+    return _little_endian(values)
+
+
+def read_bank_cache(cache_path):
+    """Load a cache file into a QuestionBank, decoding every string up front"""
+    with open(cache_path, "rb") as f:
+        data = f.read()
+
+    header = _unpack_header(data)
+    layout = cache_layout(header)
+    if len(data) < layout["end"]:
+        raise CacheError("Cache file is truncated")
+
+    question_count = header["question_count"]
+    string_offsets = _read_array("Q", data, layout["string_offsets"], header["string_count"] + 1)
+    record_starts = _read_array("Q", data, layout["record_starts"], question_count)
+    option_counts = _read_array("H", data, layout["option_counts"], question_count)
+    answer_counts = _read_array("H", data, layout["answer_counts"], question_count)
+    answer_masks = _read_array("H", data, layout["answer_masks"], question_count)
+    repeated_masks = _read_array("H", data, layout["repeated_masks"], question_count)
+    unmatched_counts = _read_array("H", data, layout["unmatched_counts"], question_count)
+
+    blob = memoryview(data)[layout["blob"]:]
+    strings = [
+        str(blob[string_offsets[i]:string_offsets[i + 1]], "utf-8")
+        for i in range(header["string_count"])
+    ]
+
+    bank = QuestionBank()
+    for question_id in range(question_count):
+        first = record_starts[question_id]
+        options_end = first + 1 + option_counts[question_id]
+        answers_end = options_end + answer_counts[question_id]
+        options = strings[first + 1:options_end]
+        answers = strings[options_end:answers_end]
+        answer_key = None
+        if not unmatched_counts[question_id]:
+            answer_key = (answer_masks[question_id], repeated_masks[question_id], ())
+        # Only questions with unmatched answers are resolved again, to list them
+        bank.add(strings[first], options, answers, answer_key)
+    return bank
+
+
+class MappedQuestionBank:
+    """Read-only question bank backed by a memory-mapped cache file
+
+    Nothing is decoded up front: the offset arrays are views over the mapped
+    file and a question's strings are only decoded when it is accessed, so
+    memory use stays flat regardless of bank size. Supports the same lookups
+    as QuestionBank.
+    """
+
+    def __init__(self, cache_path):
+        with open(cache_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = _unpack_header(self._mmap)
+        layout = cache_layout(header)
+        if len(self._mmap) < layout["end"]:
+            self._mmap.close()
+            raise CacheError("Cache file is truncated")
+
+        self._count = header["question_count"]
+        self._blob = memoryview(self._mmap)[layout["blob"]:layout["blob"] + header["blob_size"]]
+        self._string_offsets = self._array("Q", layout["string_offsets"], header["string_count"] + 1)
+        self._record_starts = self._array("Q", layout["record_starts"], self._count)
+        self._option_counts = self._array("H", layout["option_counts"], self._count)
+        self._answer_counts = self._array("H", layout["answer_counts"], self._count)
+        self._answer_masks = self._array("H", layout["answer_masks"], self._count)
+        self._repeated_masks = self._array("H", layout["repeated_masks"], self._count)
+        self._unmatched_counts = self._array("H", layout["unmatched_counts"], self._count)
+        self._hash_keys = self._array("Q", layout["hash_keys"], self._count)
+        self._hash_ids = self._array("Q", layout["hash_ids"], self._count)
+
+    def _array(self, typecode, start, count):
+        if sys.byteorder != "little":
+            return _read_array(typecode, self._mmap, start, count)
+        end = start + array(typecode).itemsize * count
+        return memoryview(self._mmap)[start:end].cast(typecode)
+
+    def _string(self, index):
+        return str(self._blob[self._string_offsets[index]:self._string_offsets[index + 1]], "utf-8")
+
+    def _strings(self, first, count):
+        return tuple(self._string(index) for index in range(first, first + count))
+
+    def close(self):
+        """Release the views over the mapped file and unmap it"""
+        for view in (self._blob, self._string_offsets, self._record_starts, self._option_counts,
+                     self._answer_counts, self._answer_masks, self._repeated_masks,
+                     self._unmatched_counts, self._hash_keys, self._hash_ids):
+            if isinstance(view, memoryview):
+                view.release()
+        self._mmap.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, question_id):
+        """Return (question, options, answers) for a question ID"""
+        return self.question(question_id), self.options(question_id), self.answers(question_id)
+
+    def __iter__(self):
+        for question_id in range(self._count):
+            yield self[question_id]
+
+    def __contains__(self, question):
+        return self.id_of(question) is not None
+
+    def _check_id(self, question_id):
+        if not 0 <= question_id < self._count:
+            raise IndexError("question ID out of range")
+
+    def question(self, question_id):
+        self._check_id(question_id)
+        return self._string(self._record_starts[question_id])
+
+    def options(self, question_id):
+        self._check_id(question_id)
+        return self._strings(self._record_starts[question_id] + 1, self._option_counts[question_id])
+
+    def answers(self, question_id):
+        self._check_id(question_id)
+        first = self._record_starts[question_id] + 1 + self._option_counts[question_id]
+        return self._strings(first, self._answer_counts[question_id])
+
+    def answer_key(self, question_id):
+        """Return (answer_mask, repeated_mask, unmatched_count) for a question"""
+        self._check_id(question_id)
+        return (self._answer_masks[question_id], self._repeated_masks[question_id],
+                self._unmatched_counts[question_id])
+
+    def unmatched_answers(self):
+        """Return {question ID: answers matching no option} for the questions that have any"""
+        unmatched_answers = {}
+        for question_id, count in enumerate(self._unmatched_counts):
+            if count:
+                _, options, answers = self[question_id]
+                unmatched_answers[question_id] = resolve_answer_key(options, answers)[2]
+        return unmatched_answers
+
+    def id_of(self, question):
+        """Return the ID of a question by its text, or None if it isn't in the bank"""
+        key = question_key(question)
+        position = bisect_left(self._hash_keys, key)
+        while position < self._count and self._hash_keys[position] == key:
+            question_id = self._hash_ids[position]
+            if self.question(question_id) == question:
+                return question_id
+            position += 1
+        return None
+
+
+def is_cache_current(cache_path, source_path):
+    """Check whether a cache file still matches its source file
+
+    The size and mtime are compared first. If either changed, the content
+    hash decides: an unchanged hash only refreshes the stamp in the cache
+    header, so touching the file doesn't force a rebuild.
+    """
+    try:
+        header = read_cache_header(cache_path)
+    except (OSError, CacheError):
+        return False
+
+    size, mtime_ns = source_stamp(source_path)
+    if (header["source_size"], header["source_mtime_ns"]) == (size, mtime_ns):
+        return True
+
+    if header["source_size"] != size or header["source_hash"] != source_hash(source_path):
+        return False
+
+    try:
+        with open(cache_path, "r+b") as f:
+            f.write(_HEADER.pack(
+                CACHE_MAGIC, CACHE_VERSION, 0, size, mtime_ns, header["source_hash"],
+                header["question_count"], header["string_count"], header["blob_size"]
+            ))
+    except OSError:
+        pass
+    return True
+
+
+def load_question_bank_cached(source_path, strict=False, cache_path=None, mapped=False):
+    """Load a question bank, going through the binary cache when possible
+
+    Returns (bank, cache_hit). The cache is rebuilt whenever the source's
+    size, mtime or content hash no longer matches it. With `mapped` set the
+    bank is a MappedQuestionBank over the cache, and a rebuild streams the
+    source straight into the cache without holding the parsed bank in memory.
+    If the cache can't be written the bank is still returned, parsed straight
+    from the source.
+    """
+    if cache_path is None:
+        cache_path = cache_path_for(source_path)
+
+    if is_cache_current(cache_path, source_path):
+        try:
+            bank = MappedQuestionBank(cache_path) if mapped else read_bank_cache(cache_path)
+            return bank, True
+        except (OSError, CacheError) as e:
+            print(f"Ignoring unreadable question bank cache: {str(e)}")
+
+    # Stamp the cache with the file as it was before parsing, so an edit made
+    # while parsing invalidates it on the next start
+    signature = source_signature(source_path)
+    if mapped:
+        try:
+            write_bank_cache(iter_questions(source_path, strict=strict), cache_path, signature)
+            return MappedQuestionBank(cache_path), False
+        except (OSError, CacheError) as e:
+            print(f"Could not write question bank cache: {str(e)}")
+            return load_question_bank(source_path, strict=strict), False
+
+    bank = load_question_bank(source_path, strict=strict)
+    try:
+        write_bank_cache(bank, cache_path, signature)
+    except OSError as e:
+        print(f"Could not write question bank cache: {str(e)}")
+    return bank, False
@@ -0,0 +1,174 @@
+"""Rebuild the binary caches of every question bank in the catalogue
+
+Usage: python bank_catalogue.py [--workers N]
+
+Banks whose cache is missing or out of date are parsed together in worker
+processes, so after adding or editing many banks the quiz opens each of
+them from its cache.
+"""
+import argparse
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from bank_cache import cache_path_for, is_cache_current, load_question_bank_cached, source_signature, write_bank_cache
+from parallel_loader import load_question_bank_files
+
+# The original single bank and its progress files, kept at their old paths
+# so existing checkpoints and incorrect-question files carry over
+DEFAULT_BANK_NAME = "data"
+DEFAULT_SOURCE_PATH = r"data.txt"
+DEFAULT_CHECKPOINT_PATH = r"quiz_checkpoint.dat"
+DEFAULT_INCORRECT_QUESTIONS_PATH = r"incorrect_questions.txt"
+
+# Additional banks are the *.txt files in BANKS_DIRECTORY; their progress
+# files go in PROGRESS_DIRECTORY, named after the bank
+BANKS_DIRECTORY = r"banks"
+PROGRESS_DIRECTORY = r"progress"
+BANK_SUFFIX = ".txt"
+
+DEFAULT_MAX_OPEN_BANKS = 4
+
+
+class BankEntry:
+    """A bank in the catalogue: its source file and its own progress files"""
+
+    def __init__(self, name, source_path, checkpoint_path, incorrect_questions_path):
+        self.name = name
+        self.source_path = source_path
+        self.checkpoint_path = checkpoint_path
+        self.incorrect_questions_path = incorrect_questions_path
+
+    def __repr__(self):
+        return f"BankEntry({self.name!r}, {self.source_path!r})"
+
+
+def default_bank_entry():
+    return BankEntry(DEFAULT_BANK_NAME, DEFAULT_SOURCE_PATH,
+                     DEFAULT_CHECKPOINT_PATH, DEFAULT_INCORRECT_QUESTIONS_PATH)
+
+
+class BankCatalogue:
+    """Named question banks that are loaded on first use
+
+    Opened banks are kept decoded in memory in a least-recently-used list of
+    at most `max_open` banks; opening another one drops the least recently
+    used, which is loaded again (from its binary cache) if it's reopened.
+    open() may be called from the background writer's thread, so the list
+    is guarded by a lock.
+    """
+
+    def __init__(self, entries=(), max_open=DEFAULT_MAX_OPEN_BANKS, strict=True):
+        self.max_open = max_open
+        self.strict = strict
+        self._entries = OrderedDict()
+        self._open_banks = OrderedDict()  # name -> bank, least recently used first
+        self._lock = threading.Lock()
+        for entry in entries:
+            self.add(entry)
+
+    @classmethod
+    def discover(cls, banks_directory=BANKS_DIRECTORY, progress_directory=PROGRESS_DIRECTORY, **kwargs):
+        """Build the catalogue of the default bank plus every bank in `banks_directory`"""
+        catalogue = cls([default_bank_entry()], **kwargs)
+        if os.path.isdir(banks_directory):
+            for file_name in sorted(os.listdir(banks_directory)):
+                name, suffix = os.path.splitext(file_name)
+                if suffix != BANK_SUFFIX or name in catalogue:
+                    continue
+                catalogue.add(BankEntry(
+                    name,
+                    os.path.join(banks_directory, file_name),
+                    os.path.join(progress_directory, f"{name}.checkpoint.dat"),
+                    os.path.join(progress_directory, f"{name}.incorrect.txt"),
+                ))
+        return catalogue
+
+    def add(self, entry):
+        self._entries[entry.name] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def names(self):
+        return list(self._entries)
+
+    def entry(self, name):
+        return self._entries[name]
+
+    def is_open(self, name):
+        with self._lock:
+            return name in self._open_banks
+
+    def remember(self, name, question_bank):
+        """Record an already loaded bank as the most recently used one"""
+        with self._lock:
+            self._open_banks[name] = question_bank
+            self._open_banks.move_to_end(name)
+            while len(self._open_banks) > max(self.max_open, 1):
+                # Banks are only dropped, never closed: a window may still be
+                # showing a mapped bank until it switches to the new one
+                self._open_banks.popitem(last=False)
+
+    def open(self, name):
+        """Return a bank by name, loading it if it isn't open"""
+        with self._lock:
+            question_bank = self._open_banks.get(name)
+            if question_bank is not None:
+                self._open_banks.move_to_end(name)
+                return question_bank
+
+        entry = self._entries[name]
+        for path in (entry.checkpoint_path, entry.incorrect_questions_path):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        question_bank, _ = load_question_bank_cached(entry.source_path, strict=self.strict)
+        self.remember(name, question_bank)
+        return question_bank
+
+    def refresh_caches(self, names=None, workers=None):
+        """Rebuild the caches of banks whose source has changed; returns their names
+
+        Their files are parsed at once across `workers` processes (default:
+        one per core, see parallel_loader), rather than one file at a time
+        as open() would on each first use.
+        """
+        entries = [self._entries[name] for name in (self.names() if names is None else names)]
+        stale = [
+            entry for entry in entries
+            if os.path.exists(entry.source_path)
+            and not is_cache_current(cache_path_for(entry.source_path), entry.source_path)
+        ]
+        if not stale:
+            return []
+
+        # Stamp each cache with its file as it was before parsing
+        signatures = [source_signature(entry.source_path) for entry in stale]
+        parsed = load_question_bank_files([entry.source_path for entry in stale], workers, strict=self.strict)
+        for entry, signature, (question_bank, _) in zip(stale, signatures, parsed):
+            write_bank_cache(question_bank, cache_path_for(entry.source_path), signature)
+        return [entry.name for entry in stale]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    catalogue = BankCatalogue.discover()
+    start_time = time.perf_counter()
+    refreshed = catalogue.refresh_caches(workers=args.workers)
+    elapsed = (time.perf_counter() - start_time) * 1000
+    if refreshed:
+        print(f"Rebuilt {len(refreshed)} of {len(catalogue)} bank caches in {elapsed:.1f} ms: {', '.join(refreshed)}")
+    else:
+        print(f"All {len(catalogue)} bank caches are current")
+
+
+if __name__ == "__main__":
+    main()
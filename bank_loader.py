@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+
+from bank_cache import cache_path_for, source_signature, write_bank_cache
+from question_loader import iter_questions
+
+# Records are handed to the Tk thread in batches of at most this many, or
+# sooner if BATCH_INTERVAL seconds have passed since the last batch
+BATCH_SIZE = 2048
+BATCH_INTERVAL = 0.05
+POLL_INTERVAL_MS = 30
+# Time the Tk thread may spend adding records per poll, in seconds
+POLL_BUDGET = 0.015
+
+_DONE = object()
+
+
+class BankLoader:
+    """Parse a question bank on a worker thread and stream it to the Tk thread
+
+    The first record is sent as soon as it's parsed so the window can show
+    it immediately; the rest follow in batches. `on_records(records)` is
+    called with each batch, then `on_done(question_count)` or
+    `on_error(exception)`, always on the Tk thread. The parsed records are
+    also written to the binary cache so the next start can skip parsing.
+    """
+
+    def __init__(self, master, source_path, strict=False, cache_path=None,
+                 on_records=None, on_done=None, on_error=None):
+        self.master = master
+        self.source_path = source_path
+        self.strict = strict
+        self.cache_path = cache_path or cache_path_for(source_path)
+        self.on_records = on_records
+        self.on_done = on_done
+        self.on_error = on_error
+        self.question_count = 0
+        self._batches = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="bank-loader", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self.master.after(POLL_INTERVAL_MS, self._poll)
+
+    def _forward(self, records):
+        """Pass records through while queueing them for the Tk thread"""
+        batch = []
+        last_flush = time.perf_counter()
+        try:
+            for record in records:
+                batch.append(record)
+                yield record
+                # Flush the very first record on its own to show it right away
+                now = time.perf_counter()
+                if len(batch) >= BATCH_SIZE or now - last_flush >= BATCH_INTERVAL or self.question_count == 0:
+                    self.question_count += len(batch)
+                    self._batches.put(batch)
+                    batch = []
+                    last_flush = now
+        finally:
+            # Also when the consumer gives up part way, so no record is lost
+            if batch:
+                self.question_count += len(batch)
+                self._batches.put(batch)
+
+    def _run(self):
+        try:
+            # Stamp the cache with the file as it was before parsing
+            signature = source_signature(self.source_path)
+            records = iter_questions(self.source_path, strict=self.strict)
+            forwarded = self._forward(records)
+            try:
+                write_bank_cache(forwarded, self.cache_path, signature)
+            except OSError as e:
+                print(f"Could not write question bank cache: {str(e)}")
+                # Queue the records the cache writer took but didn't finish
+                forwarded.close()
+                # Keep streaming whatever the cache writer didn't get to
+                for _ in self._forward(records):
+                    pass
+        except Exception as e:
+            self._batches.put(e)
+        else:
+            self._batches.put(_DONE)
+
+    def _poll(self):
+        deadline = time.perf_counter() + POLL_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                item = self._batches.get_nowait()
+            except queue.Empty:
+                break
+
+            if item is _DONE:
+                if self.on_done is not None:
+                    self.on_done(self.question_count)
+                return
+            if isinstance(item, Exception):
+                if self.on_error is not None:
+                    self.on_error(item)
+                else:
+                    print(f"Error loading question bank: {str(item)}")
+                return
+            if self.on_records is not None:
+                self.on_records(item)
+
+        self.master.after(POLL_INTERVAL_MS, self._poll)
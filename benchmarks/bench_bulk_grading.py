@@ -0,0 +1,57 @@
+"""Compare vectorized answer-sheet grading with the scalar QuizEngine path
+
+Usage: python benchmarks/bench_bulk_grading.py [--students N] [--questions N]
+
+Needs NumPy.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_grading import grade_sheets
+from question_bank import QuestionBank
+from question_loader import parse_record
+from quiz_engine import QuizEngine
+
+from bench_tokenizer import make_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=2_000, help="number of answer sheets")
+    parser.add_argument("--questions", type=int, default=500, help="questions per sheet")
+    args = parser.parse_args()
+
+    bank = QuestionBank.from_records(parse_record(record) for record in make_records(args.questions))
+    engine = QuizEngine(bank)
+    option_counts = np.array([len(bank.options(question_id)) for question_id in range(len(bank))])
+    rng = np.random.default_rng(0)
+    selections = (rng.integers(0, 1 << 16, (args.students, len(bank)))
+                  & ((1 << option_counts) - 1)).astype(np.uint16)
+
+    start = time.perf_counter()
+    scalar_correct = []
+    for sheet in selections.tolist():
+        scalar_correct.append(engine.grade_many(enumerate(sheet)))
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    grades = grade_sheets(engine, selections)
+    vector_seconds = time.perf_counter() - start
+
+    assert (grades['correct'] == np.array(scalar_correct)).all()
+
+    answers = selections.size
+    print(f"Sheets x questions:     {args.students:,} x {len(bank):,}")
+    print(f"Scalar grade_many:      {answers / scalar_seconds / 1e6:8.2f} M answers/s")
+    print(f"Vectorized NumPy:       {answers / vector_seconds / 1e6:8.2f} M answers/s")
+    print(f"Speedup:                {scalar_seconds / vector_seconds:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Measure drawing many non-overlapping exam forms from a large bank
+
+Usage: python benchmarks/bench_exam_assembly.py [--questions N] [--answered N] [--forms N] [--size N]
+
+Past answers are simulated for --answered questions, so the difficulty
+strata and miss-rate weights have something to work with. Setting up the
+strata and pools should cost about as much for a bank of 10M questions as
+for one of 1M with the same answer history.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exam_assembly import DIFFICULTY_BANDS, UNSEEN, ExamAssembler, difficulty_strata, miss_rate_weights
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=1_000_000, help="size of the bank")
+    parser.add_argument("--answered", type=int, default=10_000, help="questions with past answers")
+    parser.add_argument("--forms", type=int, default=300, help="forms to draw")
+    parser.add_argument("--size", type=int, default=50, help="questions per form")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    question_stats = {}
+    for question_id in rng.sample(range(args.questions), min(args.answered, args.questions)):
+        answers = rng.randint(1, 5)
+        question_stats[question_id] = {'visits': answers, 'answers': answers,
+                                       'incorrect': rng.randint(0, answers), 'median_seconds': 5.0}
+    quotas = {name: 1 for name in DIFFICULTY_BANDS + (UNSEEN,)}
+
+    strata, strata_ms = timed(difficulty_strata, args.questions, question_stats)
+    weights, weights_ms = timed(miss_rate_weights, args.questions, question_stats)
+    setups = [
+        ("uniform", lambda: ExamAssembler(args.questions, seed=1), None),
+        ("stratified", lambda: ExamAssembler(args.questions, strata, seed=1), quotas),
+        ("weighted", lambda: ExamAssembler(args.questions, weights=weights, seed=1), None),
+    ]
+
+    print(f"Bank: {args.questions:,} questions, {len(question_stats):,} answered; {args.forms} forms of {args.size}")
+    print(f"Difficulty strata: {strata_ms:8.1f} ms | miss-rate weights: {weights_ms:8.1f} ms")
+    for name, make_assembler, form_quotas in setups:
+        assembler, setup_ms = timed(make_assembler)
+        forms, forms_ms = timed(assembler.forms, args.forms, args.size, form_quotas)
+        drawn = [question_id for form in forms for question_id in form]
+        assert len(set(drawn)) == len(drawn) == args.forms * args.size
+        print(f"{name:>10}: setup {setup_ms:8.1f} ms | {args.forms} forms {forms_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
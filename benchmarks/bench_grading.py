@@ -0,0 +1,71 @@
+"""Measure headless grading throughput of QuizEngine
+
+Usage: python benchmarks/bench_grading.py [--questions N] [--responses N]
+
+Grades random answer sets against a synthetic bank, once through the
+set comparison QuizWindow.submit_answer used to do and once through
+QuizEngine.grade_many.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_bank import QuestionBank, normalize_answers
+from question_loader import parse_record
+from quiz_engine import QuizEngine
+
+from bench_tokenizer import make_records
+
+
+def make_responses(bank, count, seed=0):
+    """Return `count` random (question_id, selection mask) pairs"""
+    rng = random.Random(seed)
+    responses = []
+    for _ in range(count):
+        question_id = rng.randrange(len(bank))
+        responses.append((question_id, rng.randrange(1 << len(bank.options(question_id)))))
+    return responses
+
+
+def set_grade_many(bank, responses):
+    """Grading as submit_answer did it: compare sets of option strings"""
+    results = []
+    for question_id, selection in responses:
+        options = bank.options(question_id)
+        selected = [option for i, option in enumerate(options) if selection >> i & 1]
+        results.append(set(selected) == set(normalize_answers(bank.answers(question_id))))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=10_000, help="size of the synthetic bank")
+    parser.add_argument("--responses", type=int, default=1_000_000, help="number of answer sets to grade")
+    args = parser.parse_args()
+
+    bank = QuestionBank.from_records(parse_record(record) for record in make_records(args.questions))
+    responses = make_responses(bank, args.responses)
+
+    start = time.perf_counter()
+    expected = set_grade_many(bank, responses)
+    set_seconds = time.perf_counter() - start
+
+    engine = QuizEngine(bank)
+    start = time.perf_counter()
+    graded = engine.grade_many(responses)
+    engine_seconds = time.perf_counter() - start
+
+    assert graded == expected
+
+    print(f"Responses:              {len(responses):,}")
+    print(f"Set comparison:         {len(responses) / set_seconds / 1e6:8.2f} M answers/s")
+    print(f"QuizEngine.grade_many:  {len(responses) / engine_seconds / 1e6:8.2f} M answers/s")
+    print(f"Speedup:                {set_seconds / engine_seconds:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare resident memory of the memory-mapped and fully decoded question banks
+
+Usage: python benchmarks/bench_memory.py [--questions N] [--lookups N]
+
+Each backend is measured in a fresh subprocess so their footprints don't mix.
+Peak RSS is read from resource.getrusage, so this runs on Unix only.
+"""
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_cache import MappedQuestionBank, read_bank_cache, source_signature, write_bank_cache
+from question_loader import iter_questions
+
+from bench_tokenizer import make_records
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+
+
+def measure(backend, cache_path, lookups):
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    bank = MappedQuestionBank(cache_path) if backend == "mapped" else read_bank_cache(cache_path)
+    open_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(lookups):
+        question_id = rng.randrange(len(bank))
+        question, options, answers = bank[question_id]
+        shuffled = list(enumerate(options))
+        rng.shuffle(shuffled)
+    lookup_us = (time.perf_counter() - start) * 1e6 / lookups
+
+    print(f"{backend:>7}: open {open_ms:9.1f} ms | random access {lookup_us:6.1f} us "
+          f"| peak RSS +{peak_rss_mb() - baseline:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=1_000_000, help="size of the synthetic bank")
+    parser.add_argument("--lookups", type=int, default=10_000, help="random questions to display")
+    parser.add_argument("--measure", nargs=2, metavar=("BACKEND", "CACHE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure[0], args.measure[1], args.lookups)
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "bank.txt")
+        cache_path = source + ".qbc"
+        pool = make_records(10_000)
+        with open(source, "w", encoding="utf-8") as f:
+            for i in range(args.questions):
+                # Keep every question unique while reusing the record pool
+                f.write(f"{i}. {pool[i % len(pool)].lstrip()}%%%%")
+
+        write_bank_cache(iter_questions(source), cache_path, source_signature(source))
+        print(f"Questions: {args.questions:,}  cache size: {os.path.getsize(cache_path) / 1e6:.1f} MB")
+
+        for backend in ("mapped", "decoded"):
+            subprocess.run(
+                [sys.executable, __file__, "--lookups", str(args.lookups), "--measure", backend, cache_path],
+                check=True
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Measure question navigation throughput of QuizWindow
+
+Usage: python benchmarks/bench_navigation.py [--steps N]
+
+Compares the pooled option cards against the previous behaviour of tearing
+down and rebuilding every card on each load_question. Needs a display.
+"""
+import argparse
+import os
+import sys
+import time
+from tkinter import Tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_bank import QuestionBank
+from question_loader import parse_record
+from quiz_window import QuizWindow
+
+from bench_tokenizer import make_records
+
+
+class BenchQuizWindow(QuizWindow):
+    """A QuizWindow that leaves the checkpoint, logs and search index alone"""
+
+    autosave = False
+
+    def build_search_index(self):
+        pass
+
+
+class RebuildingQuizWindow(BenchQuizWindow):
+    """Navigation as it was before pooling: every load rebuilds the option cards"""
+
+    def load_question(self):
+        for widget in self.options_frame.winfo_children():
+            widget.destroy()
+        self.build_option_cards()
+        super().load_question()
+
+
+def navigation_rate(window_class, bank, steps):
+    root = Tk()
+    window = window_class(root, bank)
+    root.update()
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        window.next_question()
+        # Process the redraw and relayout the navigation triggered
+        root.update()
+    elapsed = time.perf_counter() - start
+
+    root.destroy()
+    return steps / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=500, help="number of Next presses to time")
+    args = parser.parse_args()
+
+    # One more question than steps so navigation never reaches the results window
+    bank = QuestionBank.from_records(parse_record(record) for record in make_records(args.steps + 1))
+
+    rebuilding = navigation_rate(RebuildingQuizWindow, bank, args.steps)
+    pooled = navigation_rate(BenchQuizWindow, bank, args.steps)
+
+    print(f"Rebuild cards per question: {rebuilding:8.1f} questions/s")
+    print(f"Pooled option cards:        {pooled:8.1f} questions/s")
+    print(f"Speedup:                    {pooled / rebuilding:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Measure near-duplicate detection time and recall on a synthetic bank
+
+Usage: python benchmarks/bench_near_duplicates.py [--questions N] [--duplicates N]
+
+Needs NumPy. Every planted duplicate is a copy of another question with one
+word changed and trailing spaces added.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import find_near_duplicates, minhash_signatures
+from question_bank import QuestionBank
+
+
+def make_bank(count, duplicates, seed=0):
+    """Return (bank, planted) with `duplicates` of the questions planted as (original, copy) IDs"""
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(20_000)]
+
+    def sentence(length):
+        return " ".join(rng.choice(words) for _ in range(length))
+
+    records = []
+    for _ in range(count - duplicates):
+        options = [sentence(rng.randint(2, 6)) for _ in range(4)]
+        records.append((sentence(rng.randint(12, 24)) + "?", options, [options[0]]))
+
+    planted = []
+    for _ in range(duplicates):
+        original = rng.randrange(count - duplicates)
+        question, options, answers = records[original]
+        terms = question.split()
+        terms[rng.randrange(len(terms))] = rng.choice(words)
+        planted.append((original, len(records)))
+        records.append((" ".join(terms) + "  ", options, answers))
+    return QuestionBank.from_records(records), planted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=200_000, help="size of the synthetic bank")
+    parser.add_argument("--duplicates", type=int, default=2_000, help="near-duplicates planted in it")
+    args = parser.parse_args()
+
+    bank, planted = make_bank(args.questions, args.duplicates)
+
+    start = time.perf_counter()
+    signatures = minhash_signatures(bank)
+    signature_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    clusters = find_near_duplicates(bank, signatures=signatures)
+    lsh_ms = (time.perf_counter() - start) * 1000
+
+    cluster_of = {}
+    for index, members in enumerate(clusters):
+        for question_id in members:
+            cluster_of[question_id] = index
+    found = sum(
+        1 for original, copy in planted
+        if original in cluster_of and cluster_of.get(copy) == cluster_of[original]
+    )
+    flagged = sum(len(members) for members in clusters)
+
+    print(f"Questions:         {len(bank):,}")
+    print(f"MinHash:           {signature_ms:9.1f} ms")
+    print(f"LSH and clusters:  {lsh_ms:9.1f} ms")
+    print(f"Planted found:     {found:,} of {len(planted):,}")
+    print(f"Clusters:          {len(clusters):,} ({flagged:,} questions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Measure how parallel parsing of several bank files scales with worker processes
+
+Usage: python benchmarks/bench_parallel_load.py [--files N] [--questions N] [--workers N ...]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parallel_loader import load_question_banks
+from question_bank import QuestionBank
+from question_loader import iter_questions
+
+from bench_tokenizer import make_records
+
+
+def load_sequentially(paths):
+    bank = QuestionBank()
+    for path in paths:
+        for question, options, answers in iter_questions(path):
+            bank.add(question, options, answers)
+    return bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=24, help="number of bank files")
+    parser.add_argument("--questions", type=int, default=20_000, help="questions per file")
+    parser.add_argument("--workers", type=int, nargs="*",
+                        help="worker counts to time (default: 1, 2, 4, ... up to the core count)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)})
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        for index in range(args.files):
+            path = os.path.join(temp_dir, f"bank{index}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("%%%%".join(make_records(args.questions, seed=index)))
+            paths.append(path)
+
+        start = time.perf_counter()
+        expected = load_sequentially(paths)
+        sequential = time.perf_counter() - start
+        print(f"Files x questions:  {args.files} x {args.questions:,} ({cores} cores)")
+        print(f"Sequential:         {sequential * 1000:8.1f} ms")
+
+        for workers in worker_counts:
+            start = time.perf_counter()
+            bank, _ = load_question_banks(paths, workers=workers)
+            elapsed = time.perf_counter() - start
+            assert len(bank) == len(expected)
+            print(f"{workers:2d} worker(s):       {elapsed * 1000:8.1f} ms  {sequential / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Measure the cost of recording answer times and of summarizing them
+
+Usage: python benchmarks/bench_response_times.py [--events N] [--questions N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_times import ResponseLog, ResponseTimes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000, help="answers to record")
+    parser.add_argument("--questions", type=int, default=10_000, help="distinct questions answered")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    question_ids = [rng.randrange(args.questions) for _ in range(args.events)]
+    correct = [rng.random() < 0.7 for _ in range(args.events)]
+
+    response_times = ResponseTimes()
+    show, record = response_times.show, response_times.record
+    start = time.perf_counter_ns()
+    for question_id, is_correct in zip(question_ids, correct):
+        show(question_id)
+        record(question_id, is_correct)
+    event_ns = (time.perf_counter_ns() - start) / args.events
+
+    # The loop alone, to separate the recording cost from the iteration
+    start = time.perf_counter_ns()
+    for question_id, is_correct in zip(question_ids, correct):
+        pass
+    loop_ns = (time.perf_counter_ns() - start) / args.events
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log = ResponseLog(os.path.join(temp_dir, "quiz_checkpoint.dat.times"))
+        start = time.perf_counter()
+        while True:
+            chunk = response_times.take_chunk()
+            if chunk is None:
+                break
+            log.append(chunk)
+        log.close()
+        write_ms = (time.perf_counter() - start) * 1000
+        size = os.path.getsize(log.path)
+        start = time.perf_counter()
+        loaded = log.load()
+        load_ms = (time.perf_counter() - start) * 1000
+        assert len(loaded) == len(response_times)
+
+    start = time.perf_counter()
+    response_times.summary()
+    summary_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Events:                {args.events:,}")
+    print(f"Show and record:       {event_ns - loop_ns:9.0f} ns per answer")
+    print(f"Write log:             {write_ms:9.1f} ms ({size / args.events:.1f} bytes per answer)")
+    print(f"Load log:              {load_ms:9.1f} ms")
+    print(f"Summary:               {summary_ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
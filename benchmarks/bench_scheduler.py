@@ -0,0 +1,58 @@
+"""Measure picking and rescheduling due questions on a large review schedule
+
+Usage: python benchmarks/bench_scheduler.py [--cards N] [--reviews N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import DAY, Card, ReviewScheduler, ScheduleLog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=1_000_000, help="questions with a schedule")
+    parser.add_argument("--reviews", type=int, default=100_000, help="answers to simulate")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    now = time.time()
+    cards = [
+        Card(question_id, rng.randint(0, 5), 2.5, rng.uniform(1, 30), now + rng.uniform(-30, 30) * DAY)
+        for question_id in range(args.cards)
+    ]
+
+    start = time.perf_counter()
+    scheduler = ReviewScheduler(cards)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(args.reviews):
+        question_id = scheduler.next_due(now)
+        scheduler.review(question_id, rng.random() < 0.8, now)
+    review_us = (time.perf_counter() - start) * 1e6 / args.reviews
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log = ScheduleLog(os.path.join(temp_dir, "quiz_checkpoint.dat.schedule"))
+        start = time.perf_counter()
+        log.compact([card.pack() for card in scheduler.cards.values()])
+        compact_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        loaded = ReviewScheduler(log.load())
+        load_ms = (time.perf_counter() - start) * 1000
+        assert len(loaded) == len(scheduler)
+
+    print(f"Cards:                    {args.cards:,}")
+    print(f"Build heap:               {build_ms:9.1f} ms")
+    print(f"Pick next due and review: {review_us:9.2f} us per answer")
+    print(f"Compact schedule log:     {compact_ms:9.1f} ms")
+    print(f"Load schedule log:        {load_ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Measure search index build, load and query times on a synthetic bank
+
+Usage: python benchmarks/bench_search.py [--questions N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_bank import QuestionBank
+from question_loader import parse_record
+from search_index import SearchIndex
+
+from bench_tokenizer import make_records
+
+QUERIES = ["container", "cloud storage", "serv*", "network comp*", "s*", "nosuchterm"]
+# Hits fetched per search by the search box
+SEARCH_LIMIT = 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=500_000, help="size of the synthetic bank")
+    parser.add_argument("--repeat", type=int, default=20, help="times each query is run")
+    args = parser.parse_args()
+
+    bank = QuestionBank.from_records(parse_record(record) for record in make_records(args.questions))
+
+    start = time.perf_counter()
+    index = SearchIndex.build(bank)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = os.path.join(temp_dir, "bank.qsi")
+        index.save(index_path, b"\0" * 32)
+        start = time.perf_counter()
+        SearchIndex.load(index_path)
+        load_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Questions:      {len(bank):,} ({len(index.terms):,} terms, {len(index.postings):,} postings)")
+    print(f"Build index:    {build_ms:9.1f} ms")
+    print(f"Load index:     {load_ms:9.1f} ms")
+    print(f"{'Query':16}{'all hits':>12}{f'first {SEARCH_LIMIT}':>14}")
+    for query in QUERIES:
+        timings = []
+        for limit in (None, SEARCH_LIMIT):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                index.search(query, limit)
+            timings.append((time.perf_counter() - start) * 1000 / args.repeat)
+        print(f"{query!r:16}{timings[0]:9.2f} ms{timings[1]:11.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compare per-session state kept as Python sets and lists with QuestionSet bitsets
+
+Usage: python benchmarks/bench_session_state.py [--questions N] [--sessions N] [--answered F]
+
+Builds --sessions sessions over a bank of --questions questions, each having
+answered a random --answered fraction of it and missed a fifth of those.
+Reports memory per session (tracemalloc), the pickled checkpoint size, and
+the time of the add/test/discard calls made by QuizEngine.submit.
+"""
+import argparse
+import os
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_set import QuestionSet
+
+
+def build_sessions(kind, answered_lists):
+    sessions = []
+    for answered in answered_lists:
+        incorrect = answered[::5]
+        if kind == "set":
+            sessions.append((set(answered), list(incorrect)))
+        else:
+            sessions.append((QuestionSet(answered), QuestionSet(incorrect)))
+    return sessions
+
+
+def submit_loop(kind, question_count, submits, rng):
+    """Time the membership updates of submit() for one session"""
+    answered, incorrect = (set(), []) if kind == "set" else (QuestionSet(), QuestionSet())
+    # Fill the incorrect questions first, so the list's O(n) calls show
+    for question_id in range(0, question_count, 5):
+        answered.add(question_id)
+        if kind == "set":
+            incorrect.append(question_id)
+        else:
+            incorrect.add(question_id)
+    question_ids = [rng.randrange(question_count) for _ in range(submits)]
+    outcomes = [rng.random() < 0.7 for _ in range(submits)]
+
+    start = time.perf_counter()
+    for question_id, correct in zip(question_ids, outcomes):
+        if correct:
+            if question_id in incorrect:
+                incorrect.remove(question_id)
+        elif question_id not in incorrect:
+            if kind == "set":
+                incorrect.append(question_id)
+            else:
+                incorrect.add(question_id)
+        answered.add(question_id)
+    return (time.perf_counter() - start) * 1e6 / submits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100_000, help="size of the bank")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions to keep in memory")
+    parser.add_argument("--answered", type=float, default=0.5, help="fraction of the bank each session answered")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    answered_lists = [
+        rng.sample(range(args.questions), int(args.questions * args.answered)) for _ in range(args.sessions)
+    ]
+
+    print(f"Bank: {args.questions:,} questions, {args.sessions:,} sessions, {args.answered:.0%} answered")
+    for kind in ("set", "bitset"):
+        tracemalloc.start()
+        sessions = build_sessions(kind, answered_lists)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        answered, incorrect = sessions[0]
+        if kind == "set":
+            checkpoint = pickle.dumps({'incorrect_questions': incorrect, 'answered_questions': list(answered)})
+        else:
+            checkpoint = pickle.dumps({'incorrect_questions_bits': incorrect.to_bytes(),
+                                       'answered_questions_bits': answered.to_bytes()})
+        submit_us = submit_loop(kind, args.questions, 20_000, rng)
+        del sessions
+
+        print(f"{kind:>7}: {memory / args.sessions / 1e3:9.1f} KB per session | "
+              f"checkpoint {len(checkpoint) / 1e3:8.1f} KB | submit {submit_us:7.2f} us")
+
+
+if __name__ == "__main__":
+    main()
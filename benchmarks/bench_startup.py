@@ -0,0 +1,61 @@
+"""Report cold-start bank loading time with and without the binary cache
+
+Usage: python benchmarks/bench_startup.py [--source data.txt | --questions N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_cache import cache_path_for, load_question_bank_cached
+from question_bank import load_question_bank
+
+from bench_tokenizer import make_records
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", help="question bank file to load")
+    parser.add_argument("--questions", type=int, default=100_000,
+                        help="size of the synthetic bank used when --source is not given")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = args.source
+        if source is None:
+            source = os.path.join(temp_dir, "bank.txt")
+            with open(source, "w", encoding="utf-8") as f:
+                f.write("%%%%".join(make_records(args.questions)))
+
+        cache_path = os.path.join(temp_dir, os.path.basename(cache_path_for(source)))
+
+        bank, parse_ms = timed(load_question_bank, source)
+        _, build_ms = timed(load_question_bank_cached, source, cache_path=cache_path)
+        (cached_bank, cache_hit), cached_ms = timed(load_question_bank_cached, source, cache_path=cache_path)
+        assert cache_hit and len(cached_bank) == len(bank)
+        (mapped_bank, cache_hit), mapped_ms = timed(
+            load_question_bank_cached, source, cache_path=cache_path, mapped=True
+        )
+        assert cache_hit and len(mapped_bank) == len(bank)
+        mapped_bank.close()
+
+        print(f"Questions:               {len(bank):,}")
+        print(f"Source size:             {os.path.getsize(source) / 1e6:.1f} MB")
+        print(f"Cache size:              {os.path.getsize(cache_path) / 1e6:.1f} MB")
+        print(f"Parse without cache:     {parse_ms:.1f} ms")
+        print(f"Parse and build cache:   {build_ms:.1f} ms")
+        print(f"Load from cache:         {cached_ms:.1f} ms")
+        print(f"Map cache (lazy decode): {mapped_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare the single-pass record tokenizer against the legacy regex parser
+
+Usage: python benchmarks/bench_tokenizer.py [--questions N]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_loader import parse_record
+
+
+def legacy_parse_record(question):
+    """The parser that used to live in quiz_window.py's __main__ block"""
+    lines = question.split(r"A: ", 1)
+    if len(lines) < 2:
+        return None
+
+    cur_ques = lines[0].strip()
+    question_text = "A: " + lines[1]
+
+    option_pattern = r'([A-D]):\s*(.*?)(?=\s*[A-D]:\s*|\s*&&&&|\Z)'
+    options_matches = re.findall(option_pattern, question_text, re.DOTALL)
+    ans_opts = [match[1].strip() for match in options_matches]
+
+    answer_pattern = r'&&&&\s*(.*?)(?=\Z)'
+    answer_match = re.search(answer_pattern, question_text, re.DOTALL)
+    if not answer_match:
+        return cur_ques, ans_opts, None
+
+    answers_text = answer_match.group(1)
+    cor_ans = [ans.strip() for ans in answers_text.splitlines() if ans.strip()]
+    return cur_ques, ans_opts, cor_ans
+
+
+def make_records(count, seed=0):
+    """Build a pool of synthetic records in the data.txt format"""
+    rng = random.Random(seed)
+    words = ("cloud", "container", "service", "network", "storage", "compute",
+             "provider", "resource", "model", "deployment", "scaling", "image")
+    records = []
+    for i in range(count):
+        question = " ".join(rng.choice(words) for _ in range(rng.randint(6, 16)))
+        options = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(2, 10)))
+            for _ in range(4)
+        ]
+        answers = rng.sample(options, rng.randint(1, 2))
+        body = "\n".join(f"{chr(65 + j)}: {option}" for j, option in enumerate(options))
+        records.append(f"\nQuestion {i}: {question}?\n{body}\n&&&&\n" + "\n".join(answers) + "\n")
+    return records
+
+
+def time_parser(parser, records, total):
+    start = time.perf_counter()
+    pool_size = len(records)
+    for i in range(total):
+        parser(records[i % pool_size])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=1_000_000, help="number of records to parse")
+    parser.add_argument("--pool", type=int, default=10_000, help="number of distinct synthetic records")
+    args = parser.parse_args()
+
+    records = make_records(min(args.pool, args.questions))
+    for record in records:
+        if parse_record(record) != legacy_parse_record(record):
+            raise SystemExit(f"Parsers disagree on record:\n{record}")
+
+    legacy = time_parser(legacy_parse_record, records, args.questions)
+    tokenizer = time_parser(parse_record, records, args.questions)
+
+    print(f"Records parsed:   {args.questions:,}")
+    print(f"Legacy regex:     {legacy:.2f}s ({args.questions / legacy:,.0f} records/s)")
+    print(f"Single-pass scan: {tokenizer:.2f}s ({args.questions / tokenizer:,.0f} records/s)")
+    print(f"Speedup:          {legacy / tokenizer:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
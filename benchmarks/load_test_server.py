@@ -0,0 +1,120 @@
+"""Load-test quiz_server.py on localhost with many concurrent sessions
+
+Usage: python benchmarks/load_test_server.py [--sessions N] [--connections N] [--answers N] [--start-server]
+
+Opens --sessions quiz sessions spread over --connections keep-alive
+connections. Each connection then takes turns between its sessions,
+answering the current question and moving to the next, --answers times
+per session. Reports request throughput and latency percentiles. With
+--start-server a server is started for the run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from quiz_server import DEFAULT_HOST, DEFAULT_PORT
+
+
+async def request(reader, writer, method, path, payload=None):
+    """Send one request on a keep-alive connection; returns (status, JSON body)"""
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    length = 0
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return int(status_line.split(" ", 2)[1]), json.loads(await reader.readexactly(length))
+
+
+async def run_connection(host, port, sessions, answers, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def timed(method, path, payload=None):
+        start = time.perf_counter()
+        status, body = await request(reader, writer, method, path, payload)
+        latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            errors.append((status, body))
+        return body
+
+    try:
+        session_ids = []
+        for _ in range(sessions):
+            session_ids.append((await timed("POST", "/sessions"))['session'])
+        for _ in range(answers):
+            for session_id in session_ids:
+                await timed("POST", f"/sessions/{session_id}/answer", {'selected': [0]})
+                await timed("POST", f"/sessions/{session_id}/next")
+        for session_id in session_ids:
+            await timed("DELETE", f"/sessions/{session_id}")
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def load_test(args):
+    latencies = []
+    errors = []
+    per_connection = [args.sessions // args.connections] * args.connections
+    for i in range(args.sessions % args.connections):
+        per_connection[i] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_connection(args.host, args.port, sessions, args.answers, latencies, errors)
+        for sessions in per_connection if sessions
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Sessions:     {args.sessions:,} over {args.connections:,} connections")
+    print(f"Requests:     {len(latencies):,} in {elapsed:.2f} s ({len(latencies) / elapsed:,.0f} per second)")
+    print(f"Latency p50:  {percentile(latencies, 0.5) * 1000:8.2f} ms")
+    print(f"Latency p99:  {percentile(latencies, 0.99) * 1000:8.2f} ms")
+    print(f"Errors:       {len(errors):,}")
+    if errors:
+        print(f"First error:  {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST, help="server address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="server port")
+    parser.add_argument("--sessions", type=int, default=5_000, help="concurrent quiz sessions")
+    parser.add_argument("--connections", type=int, default=200, help="keep-alive connections to share them")
+    parser.add_argument("--answers", type=int, default=10, help="questions answered per session")
+    parser.add_argument("--start-server", action="store_true", help="start quiz_server.py for the run")
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "quiz_server.py"), "--host", args.host, "--port", str(args.port)],
+            cwd=ROOT, stdout=subprocess.PIPE, text=True
+        )
+        print(server.stdout.readline().strip())  # the "Serving ..." line once it listens
+    try:
+        asyncio.run(load_test(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from optional_numpy import np, require_numpy
+from quiz_engine import UNANSWERABLE
+
+# Selection masks are stored in 16 bits, like the checkpoint journal's
+MAX_OPTIONS = 16
+
+_popcount_table = None
+
+
+def _popcount(masks):
+    """Count the set bits of each element of an integer mask array"""
+    global _popcount_table
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks)
+    if _popcount_table is None:
+        values = np.arange(1 << MAX_OPTIONS, dtype=np.uint32)
+        _popcount_table = np.zeros(1 << MAX_OPTIONS, dtype=np.uint8)
+        for bit in range(MAX_OPTIONS):
+            _popcount_table += ((values >> bit) & 1).astype(np.uint8)
+    return _popcount_table[masks]
+
+
+def answer_mask_array(engine, question_ids):
+    """Return (masks, answerable) arrays for `question_ids`
+
+    `masks` holds each question's correct option mask; questions whose
+    answers don't match their options get mask 0 and answerable False.
+    """
+    require_numpy("Bulk grading")
+    masks = np.zeros(len(question_ids), dtype=np.uint16)
+    answerable = np.ones(len(question_ids), dtype=bool)
+    for column, question_id in enumerate(question_ids):
+        mask = engine.answer_mask(question_id)
+        if mask == UNANSWERABLE:
+            answerable[column] = False
+        else:
+            masks[column] = mask
+    return masks, answerable
+
+
+def _fold_repeated_options(engine, selections, question_ids):
+    """Map selections of repeated options onto their first copy, like QuizEngine.grade"""
+    for column, question_id in enumerate(question_ids):
+        if not engine.repeated_options(question_id):
+            continue
+        option_count = len(engine.question_bank.options(question_id))
+        fold = np.array([engine.canonical_selection(question_id, selection)
+                         for selection in range(1 << option_count)], dtype=np.uint16)
+        column_selections = selections[:, column]
+        selections[:, column] = fold[column_selections & ((1 << option_count) - 1)]
+
+
+def grade_sheets(engine, selections, question_ids=None):
+    """Grade a batch of answer sheets with vectorized NumPy operations
+
+    `selections` is an (n_students x n_questions) array of selection masks
+    over original option indices; column j answers question_ids[j] (by
+    default question j of the bank). Returns a dict with:
+
+    - 'correct': (n_students x n_questions) bool matrix, graded exactly
+      like QuizEngine.grade
+    - 'partial_credit': (n_students x n_questions) float matrix; correct
+      options picked minus wrong options picked, over the number of
+      correct options, floored at 0
+    - 'scores': number of correct answers per student
+    """
+    require_numpy("Bulk grading")
+    selections = np.array(selections, dtype=np.uint16, ndmin=2)
+    if question_ids is None:
+        question_ids = range(selections.shape[1])
+    question_ids = list(question_ids)
+    if selections.shape[1] != len(question_ids):
+        raise ValueError(f"Answer sheets have {selections.shape[1]} columns "
+                         f"for {len(question_ids)} questions")
+
+    _fold_repeated_options(engine, selections, question_ids)
+    masks, answerable = answer_mask_array(engine, question_ids)
+
+    correct = (selections == masks) & answerable
+
+    hits = _popcount(selections & masks).astype(np.float32)
+    misses = _popcount(selections & ~masks).astype(np.float32)
+    answer_counts = _popcount(masks).astype(np.float32)
+    partial_credit = np.maximum(hits - misses, 0) / np.maximum(answer_counts, 1)
+    # Questions with no correct option only get credit for an empty selection
+    partial_credit = np.where(answer_counts > 0, partial_credit, correct)
+    partial_credit[:, ~answerable] = 0
+
+    return {
+        'scores': correct.sum(axis=1),
+        'correct': correct,
+        'partial_credit': partial_credit,
+    }
@@ -0,0 +1,178 @@
+import os
+import pickle
+import struct
+import time
+
+from append_log import AppendLog, whole_records, write_atomic
+from question_set import QuestionSet
+from quiz_engine import next_shuffle_seed
+
+# A checkpoint is a pickled snapshot of the quiz state plus an append-only
+# journal of the events since that snapshot. Each event is one fixed-size
+# record, so autosaving an answer costs a few bytes however large the state
+# has grown. Every snapshot starts a new journal generation, stored as the
+# journal's version: a journal whose generation doesn't match the
+# snapshot's was already folded into it.
+JOURNAL_SUFFIX = ".journal"
+DEFAULT_COMPACT_EVERY = 256
+
+EVENT_ANSWER = 1
+EVENT_POSITION = 2
+EVENT_RESET = 3
+
+_JOURNAL_MAGIC = b"QJNL"
+# kind, correct, selected option mask, question ID (or index), timestamp
+_EVENT = struct.Struct("<BBHId")
+
+
+def empty_state(shuffle_seed=0):
+    """Return the quiz state of a session that hasn't answered anything"""
+    return {
+        'question_index': 0,
+        'score': 0,
+        'incorrect_questions': QuestionSet(),
+        'answered_questions': QuestionSet(),
+        'shuffle_seed': shuffle_seed,
+    }
+
+
+def apply_event(state, event):
+    """Apply one journal event to a quiz state, the same way QuizWindow does"""
+    kind, correct, _, question_id, _ = event
+    if kind == EVENT_ANSWER:
+        if correct:
+            state['score'] += 1
+            state['incorrect_questions'].discard(question_id)
+        else:
+            state['incorrect_questions'].add(question_id)
+        state['answered_questions'].add(question_id)
+    elif kind == EVENT_POSITION:
+        state['question_index'] = question_id
+    elif kind == EVENT_RESET:
+        state.update(empty_state(next_shuffle_seed(state['shuffle_seed'])))
+
+
+def resolve_question_ids(question_bank, entries):
+    """Map checkpoint entries to question IDs of a bank
+
+    Older checkpoints stored full question text instead of IDs, so text
+    entries are looked up in the bank. Entries that no longer match a
+    question in the bank are dropped.
+    """
+    question_ids = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = question_bank.id_of(entry)
+        if entry is not None and 0 <= entry < len(question_bank):
+            question_ids.append(entry)
+    return question_ids
+
+
+class CheckpointJournal:
+    """Crash-safe quiz checkpoint made of a snapshot and an event journal"""
+
+    def __init__(self, path, compact_every=DEFAULT_COMPACT_EVERY):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.compact_every = compact_every
+        self.pending_events = 0  # events in the journal since the last snapshot
+        self._generation = None
+        self._journal = AppendLog(self.journal_path, _JOURNAL_MAGIC, None)
+
+    def exists(self):
+        return os.path.exists(self.path) or os.path.exists(self.journal_path)
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "rb") as f:
+            return pickle.load(f)
+
+    def _read_events(self, generation):
+        """Return the journal's events if it belongs to `generation`"""
+        self._journal.version = generation
+        body = self._journal.read()
+        if body is None:
+            return []
+        return list(_EVENT.iter_unpack(whole_records(body, _EVENT.size)))
+
+    def load(self, resolve_question_ids=None):
+        """Rebuild the saved quiz state from the snapshot and the journal
+
+        `resolve_question_ids` maps the snapshot's question lists to IDs; it
+        lets checkpoints that stored question text be replayed onto IDs.
+        """
+        snapshot = self._read_snapshot()
+        self._generation = snapshot.get('generation', 0)
+
+        resolve = resolve_question_ids or list
+        state = empty_state()
+        state['question_index'] = snapshot.get('question_index', 0)
+        state['score'] = snapshot.get('score', 0)
+        # Checkpoints from before seeded option orders all replay with seed 0
+        state['shuffle_seed'] = snapshot.get('shuffle_seed', 0)
+        for name in ('incorrect_questions', 'answered_questions'):
+            # Snapshots store bitsets; older ones stored lists of IDs or text
+            if name + '_bits' in snapshot:
+                entries = QuestionSet.from_bytes(snapshot[name + '_bits'])
+            else:
+                entries = snapshot.get(name, [])
+            state[name] = QuestionSet(resolve(entries))
+
+        events = self._read_events(self._generation)
+        for event in events:
+            apply_event(state, event)
+        self.pending_events = len(events)
+        return state
+
+    def _append(self, kind, question_id, selection=0, correct=False):
+        if self._generation is None:
+            self._generation = self._read_snapshot().get('generation', 0)
+        self._journal.version = self._generation
+        if self._journal.open():
+            # Missing or left over from before the last snapshot: started afresh
+            self.pending_events = 0
+        self._journal.append(_EVENT.pack(kind, int(correct), selection, question_id, time.time()))
+        self.pending_events += 1
+
+    def record_answer(self, question_id, selection, correct):
+        """Journal a submitted answer; `selection` is a bitmask of original option indices"""
+        self._append(EVENT_ANSWER, question_id, selection, correct)
+
+    def record_position(self, question_index):
+        self._append(EVENT_POSITION, question_index)
+
+    def record_reset(self):
+        self._append(EVENT_RESET, 0)
+
+    def needs_compaction(self):
+        return self.pending_events >= self.compact_every
+
+    def snapshot(self, state):
+        """Write `state` as a new snapshot and start an empty journal
+
+        The snapshot is written to a temporary file and renamed into place.
+        It carries a new generation before the old journal is replaced, so a
+        crash at any point leaves a consistent checkpoint.
+        """
+        self.close()
+        if self._generation is None:
+            self._generation = self._read_snapshot().get('generation', 0)
+        generation = self._generation + 1
+
+        snapshot = {
+            'generation': generation,
+            'question_index': state['question_index'],
+            'score': state['score'],
+            'incorrect_questions_bits': QuestionSet(state['incorrect_questions']).to_bytes(),
+            'answered_questions_bits': QuestionSet(state['answered_questions']).to_bytes(),
+            'shuffle_seed': state.get('shuffle_seed', 0),
+        }
+        write_atomic(self.path, pickle.dumps(snapshot))
+        self._generation = generation
+        self._journal.version = generation
+        self._journal.rewrite()
+        self.pending_events = 0
+
+    def close(self):
+        self._journal.close()
@@ -0,0 +1,289 @@
+import array
+import bisect
+import random
+
+from question_set import QuestionSet
+
+# Exam forms are drawn from strata of the bank (all of it, topics found
+# with the search index, or difficulty bands from past answers). Each
+# stratum is a pool that draws without replacement in O(1) per question:
+# uniform pools run a Fisher-Yates shuffle lazily, remembering only the
+# positions it has swapped, and weighted pools use Vose's alias method for
+# the questions given a weight. Setting up a pool costs as much as the
+# answer history it's built from, not the size of the bank: the unseen
+# questions are a lazy complement of the seen ones. No question is handed
+# out twice across the forms of one ExamAssembler.
+DIFFICULTY_BANDS = ("easy", "medium", "hard")
+UNSEEN = "unseen"
+# Miss rates at which a question counts as medium and as hard
+DIFFICULTY_THRESHOLDS = (1 / 3, 2 / 3)
+
+
+class ComplementIds:
+    """The IDs of range(question_count) not in `excluded`, as a sequence
+
+    Only the excluded IDs are stored; the k-th ID is found by a binary
+    search over them.
+    """
+
+    def __init__(self, question_count, excluded):
+        self.question_count = question_count
+        self._excluded = array.array("I", sorted({i for i in excluded if 0 <= i < question_count}))
+        # excluded[i] - i is how many IDs are left before the i-th excluded one
+        self._offsets = array.array("I", (question_id - i for i, question_id in enumerate(self._excluded)))
+
+    def __len__(self):
+        return self.question_count - len(self._excluded)
+
+    def __getitem__(self, k):
+        if not 0 <= k < len(self):
+            raise IndexError("ComplementIds index out of range")
+        return k + bisect.bisect_right(self._offsets, k)
+
+    def __contains__(self, question_id):
+        if not 0 <= question_id < self.question_count:
+            return False
+        i = bisect.bisect_left(self._excluded, question_id)
+        return i == len(self._excluded) or self._excluded[i] != question_id
+
+
+class UniformPool:
+    """Draws question IDs from a sequence uniformly, without replacement
+
+    A lazy Fisher-Yates shuffle: only the swapped positions are stored, so
+    a pool over range(1_000_000) costs nothing until it's drawn from.
+    """
+
+    def __init__(self, question_ids, rng):
+        self.question_ids = question_ids
+        self.remaining = len(question_ids)
+        self.rng = rng
+        self._swaps = {}  # position -> position whose ID it now holds
+
+    def __len__(self):
+        return self.remaining
+
+    def draw(self):
+        """Return a question ID not drawn before; the pool must not be empty"""
+        position = self.rng.randrange(self.remaining)
+        last = self.remaining - 1
+        chosen = self._swaps.get(position, position)
+        self._swaps[position] = self._swaps.pop(last, last)
+        self.remaining = last
+        return self.question_ids[chosen]
+
+
+class WeightedPool:
+    """Draws question IDs with probability proportional to their weights
+
+    `weights` maps question ID -> weight; IDs of `question_ids` it doesn't
+    list weigh `default_weight`. The listed ones go in an alias table,
+    which Vose's method draws from in O(1); the rest are left to a lazy
+    UniformPool, since they all weigh the same. Each draw picks one of the
+    two in proportion to the weight it has left.
+
+    Questions already drawn from the table are rejected and drawn again;
+    once half its weight is gone the table is rebuilt from what's left, so
+    rejections stay rare.
+    """
+
+    def __init__(self, question_ids, weights, rng, default_weight=0.0):
+        self.rng = rng
+        self._listed_weights = weights
+        if isinstance(question_ids, (range, ComplementIds)):
+            # Look up the listed IDs instead of walking every ID of a lazy sequence
+            listed = [(question_id, weight) for question_id, weight in weights.items() if question_id in question_ids]
+        else:
+            listed = [(question_id, weights[question_id]) for question_id in question_ids if question_id in weights]
+        self.default_weight = default_weight
+        self.unlisted = len(question_ids) - len(listed) if default_weight > 0 else 0
+        self._unlisted_pool = UniformPool(question_ids, rng)
+        self._build([(question_id, weight) for question_id, weight in listed if weight > 0])
+
+    def _build(self, weighted):
+        count = len(weighted)
+        self.question_ids = array.array("I", (question_id for question_id, _ in weighted))
+        self.weights = array.array("d", (weight for _, weight in weighted))
+        self.drawn = set()
+        self.drawn_weight = 0.0
+        self.total_weight = sum(self.weights)
+        self.probability = array.array("d", bytes(8 * count))
+        self.alias = array.array("I", bytes(4 * count))
+        if not count:
+            return
+
+        scaled = [weight * count / self.total_weight for weight in self.weights]
+        small = [i for i, value in enumerate(scaled) if value < 1]
+        large = [i for i, value in enumerate(scaled) if value >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        for i in small + large:  # left over only through rounding
+            self.probability[i] = 1.0
+
+    def __len__(self):
+        return len(self.question_ids) - len(self.drawn) + self.unlisted
+
+    def draw(self):
+        """Return a question ID not drawn before; the pool must not be empty"""
+        listed_weight = 0.0
+        if len(self.question_ids) > len(self.drawn):
+            listed_weight = self.total_weight - self.drawn_weight
+        unlisted_weight = self.default_weight * self.unlisted
+        if self.rng.random() * (listed_weight + unlisted_weight) < unlisted_weight:
+            return self._draw_unlisted()
+        return self._draw_listed()
+
+    def _draw_unlisted(self):
+        while True:
+            question_id = self._unlisted_pool.draw()
+            if question_id not in self._listed_weights:
+                self.unlisted -= 1
+                return question_id
+
+    def _draw_listed(self):
+        if self.drawn_weight * 2 > self.total_weight:
+            self._build([
+                (question_id, weight) for i, (question_id, weight) in enumerate(zip(self.question_ids, self.weights))
+                if i not in self.drawn
+            ])
+        count = len(self.question_ids)
+        while True:
+            i = self.rng.randrange(count)
+            if self.rng.random() >= self.probability[i]:
+                i = self.alias[i]
+            if i not in self.drawn:
+                self.drawn.add(i)
+                self.drawn_weight += self.weights[i]
+                return self.question_ids[i]
+
+
+def allocate(size, available, quotas=None):
+    """Split `size` questions over strata by largest remainder
+
+    `available` maps each stratum to how many questions it has left. With
+    `quotas` (stratum -> share), the shares are used instead of the sizes
+    and strata without a share are left out. Raises ValueError when the
+    strata can't fill the form.
+    """
+    if quotas is None:
+        quotas = available
+    shares = {name: quotas.get(name, 0) for name in available if available[name] > 0 and quotas.get(name, 0) > 0}
+    if size > sum(available[name] for name in shares):
+        raise ValueError(f"Not enough questions left for a form of {size}")
+    if not size:
+        return {}
+
+    total = sum(shares.values())
+    counts = {}
+    remainders = []
+    for name, share in shares.items():
+        exact = size * share / total
+        counts[name] = min(int(exact), available[name])
+        remainders.append((exact - int(exact), name))
+
+    # One more for the largest remainders, then fill any stratum with room
+    missing = size - sum(counts.values())
+    for _, name in sorted(remainders, reverse=True):
+        if missing and counts[name] < available[name]:
+            counts[name] += 1
+            missing -= 1
+    for name in shares:
+        extra = min(missing, available[name] - counts[name])
+        counts[name] += extra
+        missing -= extra
+    return counts
+
+
+class ExamAssembler:
+    """Builds exam forms that never share a question
+
+    `strata` maps a stratum name to its question IDs; by default the whole
+    bank is one stratum. With `weights` (question ID -> weight, such as
+    miss_rate_weights() to favour the hard ones) questions are drawn in
+    proportion to their weight, those it doesn't list weighing
+    `default_weight`; otherwise uniformly. A question listed in several
+    strata is still used at most once.
+    """
+
+    def __init__(self, question_count, strata=None, weights=None, seed=None, default_weight=1.0):
+        self.rng = random.Random(seed)
+        if strata is None:
+            strata = {'all': range(question_count)}
+        self.pools = {}
+        for name, question_ids in strata.items():
+            if weights is None:
+                self.pools[name] = UniformPool(question_ids, self.rng)
+            else:
+                self.pools[name] = WeightedPool(question_ids, weights, self.rng, default_weight)
+        self.used = QuestionSet()
+        self.forms_built = 0
+
+    def available(self):
+        """Return stratum -> questions it can still hand out (an upper bound with overlapping strata)"""
+        return {name: len(pool) for name, pool in self.pools.items()}
+
+    def form(self, size, quotas=None):
+        """Return `size` unused question IDs in random order
+
+        Each stratum contributes in proportion to its remaining size, or to
+        its share in `quotas` (stratum -> share).
+        """
+        counts = allocate(size, self.available(), quotas)
+        form = []
+        for name, count in counts.items():
+            pool = self.pools[name]
+            drawn = 0
+            while drawn < count and len(pool):
+                question_id = pool.draw()
+                if question_id not in self.used:
+                    self.used.add(question_id)
+                    form.append(question_id)
+                    drawn += 1
+        if len(form) < size:
+            raise ValueError(f"Not enough questions left for a form of {size}")
+        self.rng.shuffle(form)
+        self.forms_built += 1
+        return form
+
+    def forms(self, count, size, quotas=None):
+        return [self.form(size, quotas) for _ in range(count)]
+
+
+def difficulty_strata(question_count, question_stats, thresholds=DIFFICULTY_THRESHOLDS):
+    """Split a bank into easy/medium/hard by past miss rate, plus unseen questions
+
+    `question_stats` is ResponseTimes.question_stats(). Unseen questions are
+    those never answered, kept as a ComplementIds of the answered ones.
+    """
+    strata = {name: array.array("I") for name in DIFFICULTY_BANDS}
+    seen = []
+    for question_id, stats in question_stats.items():
+        if question_id >= question_count:
+            continue
+        miss_rate = stats['incorrect'] / stats['answers']
+        band = sum(miss_rate >= threshold for threshold in thresholds)
+        strata[DIFFICULTY_BANDS[band]].append(question_id)
+        seen.append(question_id)
+    strata[UNSEEN] = ComplementIds(question_count, seen)
+    return strata
+
+
+def miss_rate_weights(question_count, question_stats):
+    """Return question ID -> 1 plus four times the miss rate, so the hardest are drawn 5x as often
+
+    Only answered questions are listed; ExamAssembler's `default_weight`
+    covers the rest.
+    """
+    return {
+        question_id: 1 + 4 * stats['incorrect'] / stats['answers']
+        for question_id, stats in question_stats.items() if question_id < question_count
+    }
+
+
+def topic_strata(search_index, topics):
+    """Return stratum -> question IDs for topics given as search queries (topic name -> query)"""
+    return {name: array.array("I", search_index.search(query)) for name, query in topics.items()}
@@ -0,0 +1,54 @@
+import os
+
+from question_loader import format_record, iter_raw_records, parse_record
+
+
+class IncorrectQuestionStore:
+    """Append-only file of incorrectly answered questions
+
+    Questions are written in the data.txt format so the file can be loaded
+    as a question bank for review. The IDs of questions already in the file
+    are kept in a set, so recording a miss never re-reads the file. The set
+    starts empty: call rebuild_index(), which reads the whole file, on the
+    thread that adds to the store before adding.
+    """
+
+    def __init__(self, path, question_bank):
+        self.path = path
+        self.question_bank = question_bank
+        self.recorded = set()  # IDs of questions already in the file
+
+    def rebuild_index(self):
+        """Rebuild the set of recorded IDs with one streaming pass over the file"""
+        self.recorded = set()
+        if not os.path.exists(self.path):
+            return
+
+        for record in iter_raw_records(self.path):
+            parsed = parse_record(record)
+            if parsed is None:
+                continue
+            # Questions from other banks stay in the file but aren't indexed
+            question_id = self.question_bank.id_of(parsed[0])
+            if question_id is not None:
+                self.recorded.add(question_id)
+
+    def __contains__(self, question_id):
+        return question_id in self.recorded
+
+    def __len__(self):
+        return len(self.recorded)
+
+    def add(self, question_id):
+        """Append a question to the file unless it's already recorded
+
+        Returns True if the question was written.
+        """
+        if question_id in self.recorded:
+            return False
+
+        question, options, answers = self.question_bank[question_id]
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(format_record(question, options, answers))
+        self.recorded.add(question_id)
+        return True
@@ -0,0 +1,275 @@
+"""Find and merge near-duplicate questions in a question bank file
+
+Usage: python near_duplicates.py [data.txt] [--threshold 0.8] [--merge]
+
+Reports clusters of questions whose text and options are nearly identical.
+With --merge, each cluster is folded into its first question: the bank file
+is rewritten without the others, and the checkpoint, review schedule,
+response times and incorrect-questions file are rewritten to match, so
+history recorded against any copy is kept.
+The original files are kept with a .bak suffix.
+"""
+import argparse
+import os
+import shutil
+import zlib
+
+from append_log import atomic_write
+from bank_catalogue import DEFAULT_CHECKPOINT_PATH, DEFAULT_INCORRECT_QUESTIONS_PATH, DEFAULT_SOURCE_PATH
+from checkpoint_journal import CheckpointJournal, resolve_question_ids
+from optional_numpy import np, require_numpy
+from question_bank import QuestionBank, load_question_bank
+from question_loader import format_record, iter_raw_records, parse_record
+from question_set import QuestionSet
+from response_times import RESPONSE_TIMES_SUFFIX, ResponseLog
+from scheduler import SCHEDULE_SUFFIX, ScheduleLog
+from search_index import tokenize
+
+# Questions are compared as sets of overlapping word pairs ("shingles").
+# Each set is summarized by NUM_HASHES MinHash values, which locality
+# sensitive hashing splits into LSH_BANDS bands: questions sharing any band
+# become candidates, and candidates whose MinHash values agree in at least
+# `threshold` of the positions are near-duplicates. 16 bands of 4 rows make
+# pairs above about 0.6 similarity candidates almost surely.
+SHINGLE_SIZE = 2
+NUM_HASHES = 64
+LSH_BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+# Questions hashed per NumPy batch, to bound memory on large banks
+BATCH_SIZE = 20_000
+
+
+def shingles(question, options):
+    """Return the set of word-pair hashes describing a question and its options"""
+    terms = tokenize(" ".join((question, *options)))
+    if len(terms) < SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(terms).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(terms[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(terms) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash_signatures(question_bank, seed=1):
+    """Return a (questions x NUM_HASHES) array of MinHash signatures
+
+    Each hash function is a multiply-shift hash, the top 32 bits of
+    (a * x + b) mod 2**64, of the 32-bit shingle hashes; its minimum per
+    question is taken for a whole batch at once with np.minimum.reduceat
+    over the batch's concatenated shingles.
+    """
+    require_numpy("Near-duplicate detection")
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 64, NUM_HASHES, dtype=np.uint64, endpoint=False) | np.uint64(1)
+    b = rng.integers(0, 1 << 64, NUM_HASHES, dtype=np.uint64, endpoint=False)
+
+    signatures = np.empty((len(question_bank), NUM_HASHES), dtype=np.uint32)
+    for batch_start in range(0, len(question_bank), BATCH_SIZE):
+        batch_end = min(batch_start + BATCH_SIZE, len(question_bank))
+        values = []
+        offsets = []
+        for question_id in range(batch_start, batch_end):
+            offsets.append(len(values))
+            values.extend(shingles(question_bank.question(question_id), question_bank.options(question_id)))
+        values = np.array(values, dtype=np.uint64)
+        offsets = np.array(offsets, dtype=np.intp)
+        for i in range(NUM_HASHES):
+            # uint64 array arithmetic wraps around, which is the mod 2**64
+            hashed = (a[i] * values + b[i]) >> np.uint64(32)
+            signatures[batch_start:batch_end, i] = np.minimum.reduceat(hashed, offsets)
+    return signatures
+
+
+def _find(parents, question_id):
+    while parents[question_id] != question_id:
+        parents[question_id] = parents[parents[question_id]]
+        question_id = parents[question_id]
+    return question_id
+
+
+def find_near_duplicates(question_bank, threshold=DEFAULT_THRESHOLD, signatures=None):
+    """Return clusters of near-duplicate question IDs, each sorted, ordered by first ID
+
+    Candidates come from LSH buckets. Within a bucket every question is
+    compared with the bucket's first question only, which keeps the pass
+    linear in the bank size; clusters are joined transitively.
+    """
+    require_numpy("Near-duplicate detection")
+    if signatures is None:
+        signatures = minhash_signatures(question_bank)
+    count = len(signatures)
+    if count < 2:
+        return []
+
+    rows = NUM_HASHES // LSH_BANDS
+    parents = list(range(count))
+    question_ids = np.arange(count)
+    for band in range(LSH_BANDS):
+        # Fold the band's rows into one 64-bit bucket key per question
+        band_rows = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = np.zeros(count, dtype=np.uint64)
+        for row in range(rows):
+            keys = keys * np.uint64(0x100000001B3) ^ band_rows[:, row]
+
+        order = np.lexsort((question_ids, keys))
+        sorted_keys = keys[order]
+        # A member's bucket leader is the first question with the same key
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        leaders = order[np.repeat(starts, np.diff(np.r_[starts, count]))]
+        members = order
+        candidates = members != leaders
+        members, leaders = members[candidates], leaders[candidates]
+        if not len(members):
+            continue
+
+        similarity = (signatures[members] == signatures[leaders]).mean(axis=1)
+        for member, leader in zip(members[similarity >= threshold].tolist(),
+                                  leaders[similarity >= threshold].tolist()):
+            member_root, leader_root = _find(parents, member), _find(parents, leader)
+            if member_root != leader_root:
+                parents[max(member_root, leader_root)] = min(member_root, leader_root)
+
+    # Every cluster's root is its lowest ID, so clusters come out in order
+    clusters = {}
+    for question_id in range(count):
+        clusters.setdefault(_find(parents, question_id), []).append(question_id)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+def merge_near_duplicates(question_bank, clusters):
+    """Fold each cluster into its first question
+
+    Returns (merged_bank, id_map): the bank without the other questions of
+    each cluster, keeping the order of the rest, and a list mapping every
+    old question ID to its ID in the merged bank. The dropped questions'
+    text still resolves to the kept question through id_of().
+    """
+    canonical = list(range(len(question_bank)))
+    for members in clusters:
+        for question_id in members[1:]:
+            canonical[question_id] = members[0]
+
+    merged_bank = QuestionBank()
+    new_ids = {}
+    for question_id, (question, options, answers) in enumerate(question_bank):
+        if canonical[question_id] == question_id:
+            new_ids[question_id] = merged_bank.add(question, options, answers)
+    id_map = [new_ids[canonical[question_id]] for question_id in range(len(question_bank))]
+    for question_id, new_id in enumerate(id_map):
+        merged_bank.add_alias(question_bank.question(question_id), new_id)
+    return merged_bank, id_map
+
+
+def remap_state(state, id_map, question_count):
+    """Move a checkpoint state onto merged question IDs, combining the copies' history"""
+    question_index = state['question_index']
+    return {
+        'question_index': id_map[question_index] if question_index < len(id_map) else question_count,
+        'score': state['score'],
+        'incorrect_questions': QuestionSet(id_map[question_id] for question_id in state['incorrect_questions']),
+        'answered_questions': QuestionSet(id_map[question_id] for question_id in state['answered_questions']),
+        'shuffle_seed': state['shuffle_seed'],
+    }
+
+
+def remap_cards(cards, id_map):
+    """Move review cards onto merged question IDs
+
+    Of the cards of one cluster, the one due first is kept. Cards of IDs past
+    the end of `id_map` belong to no question and are dropped.
+    """
+    merged = {}
+    for card in cards:
+        if card.question_id >= len(id_map):
+            continue
+        card.question_id = id_map[card.question_id]
+        kept = merged.get(card.question_id)
+        if kept is None or card.due < kept.due:
+            merged[card.question_id] = card
+    return list(merged.values())
+
+
+def _backup(path):
+    if os.path.exists(path):
+        shutil.copy2(path, path + ".bak")
+
+
+def _write_file(path, text):
+    """Replace a file, keeping the original as path.bak"""
+    _backup(path)
+    with atomic_write(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def merge_files(source_path, clusters, question_bank, checkpoint_path, incorrect_questions_path):
+    """Rewrite a bank file and the files recorded against it with clusters merged"""
+    merged_bank, id_map = merge_near_duplicates(question_bank, clusters)
+
+    checkpoint = CheckpointJournal(checkpoint_path)
+    if checkpoint.exists():
+        state = checkpoint.load(lambda entries: resolve_question_ids(question_bank, entries))
+        _backup(checkpoint_path)
+        checkpoint.snapshot(remap_state(state, id_map, len(merged_bank)))
+        checkpoint.close()
+
+    schedule_log = ScheduleLog(checkpoint_path + SCHEDULE_SUFFIX)
+    if os.path.exists(schedule_log.path):
+        cards = remap_cards(schedule_log.load(), id_map)
+        _backup(schedule_log.path)
+        schedule_log.compact([card.pack() for card in cards])
+        schedule_log.close()
+
+    response_log = ResponseLog(checkpoint_path + RESPONSE_TIMES_SUFFIX)
+    if os.path.exists(response_log.path):
+        response_times = response_log.load().remapped(id_map)
+        _backup(response_log.path)
+        response_log.compact(response_times)
+        response_log.close()
+
+    if os.path.exists(incorrect_questions_path):
+        records = []
+        written = set()
+        for record in iter_raw_records(incorrect_questions_path):
+            parsed = parse_record(record)
+            if parsed is None:
+                continue
+            question_id = merged_bank.id_of(parsed[0])
+            if question_id is None:
+                # A question from another bank: keep it as it was
+                records.append(format_record(parsed[0], parsed[1], parsed[2] or []))
+            elif question_id not in written:
+                written.add(question_id)
+                records.append(format_record(*merged_bank[question_id]))
+        _write_file(incorrect_questions_path, "".join(records))
+
+    _write_file(source_path, "".join(format_record(*record) for record in merged_bank))
+    return merged_bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE_PATH, help="question bank file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fraction of matching MinHash values that makes two questions near-duplicates")
+    parser.add_argument("--merge", action="store_true", help="merge each cluster into its first question")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="checkpoint to rewrite when merging")
+    parser.add_argument("--incorrect", default=DEFAULT_INCORRECT_QUESTIONS_PATH,
+                        help="incorrect questions file to rewrite when merging")
+    args = parser.parse_args()
+
+    # Strict, like the quiz, so records with an empty answer section are kept
+    question_bank = load_question_bank(args.source, strict=True)
+    clusters = find_near_duplicates(question_bank, args.threshold)
+    for members in clusters:
+        print(f"Near-duplicates of question {members[0] + 1}: {question_bank.question(members[0])}")
+        for question_id in members[1:]:
+            print(f"    question {question_id + 1}: {question_bank.question(question_id)}")
+    print(f"{len(clusters)} clusters, {sum(len(members) - 1 for members in clusters)} questions to merge")
+
+    if args.merge and clusters:
+        merged_bank = merge_files(args.source, clusters, question_bank, args.checkpoint, args.incorrect)
+        print(f"Merged into {len(merged_bank)} questions; originals kept as .bak files")
+
+
+if __name__ == "__main__":
+    main()
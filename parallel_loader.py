@@ -0,0 +1,136 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from question_bank import QuestionBank, resolve_answer_key
+from question_loader import DEFAULT_CHUNK_SIZE, RECORD_DELIMITER, iter_questions
+
+# Files are cut into shards of about this many bytes, always just after a
+# %%%% delimiter so every shard holds whole records
+DEFAULT_SHARD_SIZE = 4 << 20
+
+_DELIMITER_BYTES = RECORD_DELIMITER.encode("utf-8")
+
+
+def split_shards(path, shard_size=DEFAULT_SHARD_SIZE):
+    """Return (path, start, end) byte ranges covering a bank file in record order"""
+    size = os.path.getsize(path)
+    shards = []
+    start = 0
+    with open(path, "rb") as f:
+        while start < size:
+            end = start + shard_size
+            if end >= size:
+                end = size
+            else:
+                # Extend the shard to the end of the next delimiter, starting far
+                # enough back to catch one that straddles the cut
+                end -= len(_DELIMITER_BYTES) - 1
+                f.seek(end)
+                buffer = b""
+                while True:
+                    data = f.read(DEFAULT_CHUNK_SIZE)
+                    if not data:
+                        end = size
+                        break
+                    search_from = max(0, len(buffer) - len(_DELIMITER_BYTES) + 1)
+                    buffer += data
+                    position = buffer.find(_DELIMITER_BYTES, search_from)
+                    if position != -1:
+                        end += position + len(_DELIMITER_BYTES)
+                        break
+            shards.append((path, start, end))
+            start = end
+    return shards
+
+
+def parse_shard(path, start, end, strict=False):
+    """Parse one shard of a bank file; runs in a worker process
+
+    Returns a list of (question, options, answers, answer_key) so the answer
+    keys are resolved in the worker too.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # Decode with universal newlines, the same way the sequential loader reads
+    text = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+    return [
+        (question, options, answers, resolve_answer_key(options, answers))
+        for question, options, answers in iter_questions(text, strict=strict)
+    ]
+
+
+def _parse_shard_args(args):
+    return parse_shard(*args)
+
+
+def _iter_parsed(shards, workers):
+    """Yield the parsed records of each shard, in shard order"""
+    if len(shards) <= 1 or workers == 1:
+        # Not worth starting worker processes
+        yield from map(_parse_shard_args, shards)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() hands results back in submission order, whichever shard finishes first
+        chunksize = max(1, len(shards) // (4 * (workers or os.cpu_count() or 1)))
+        yield from executor.map(_parse_shard_args, shards, chunksize=chunksize)
+
+
+def _shards_of(paths, strict, shard_size):
+    return [
+        (shard_path, start, end, strict)
+        for path in paths
+        for shard_path, start, end in split_shards(path, shard_size)
+    ]
+
+
+def _as_paths(paths):
+    if isinstance(paths, (str, bytes)) or hasattr(paths, "__fspath__"):
+        paths = [paths]
+    return [os.fspath(path) for path in paths]
+
+
+def load_question_banks(paths, workers=None, strict=False, shard_size=DEFAULT_SHARD_SIZE):
+    """Parse one or more bank files in parallel and merge them into one QuestionBank
+
+    Each file is split into shards that are parsed in a ProcessPoolExecutor
+    with `workers` processes (default: one per core). Shards are merged in
+    file order and then record order, so the resulting IDs are the same as
+    loading the files one after the other. A question that appears more than
+    once keeps its first ID and takes the options and answers of its last
+    appearance, as QuestionBank.add does.
+
+    Returns (bank, duplicates), where `duplicates` lists (question_id, path)
+    for every repeated appearance of a question.
+    """
+    shards = _shards_of(_as_paths(paths), strict, shard_size)
+    bank = QuestionBank()
+    duplicates = []
+    for (path, _, _, _), records in zip(shards, _iter_parsed(shards, workers)):
+        _add_records(bank, duplicates, path, records)
+    return bank, duplicates
+
+
+def load_question_bank_files(paths, workers=None, strict=False, shard_size=DEFAULT_SHARD_SIZE):
+    """Parse several bank files in parallel, each into a QuestionBank of its own
+
+    The shards of every file go to one pool of worker processes, so many
+    small banks load in parallel as well as a few large ones. Returns a list
+    of (bank, duplicates) in the order of `paths`, each as load_question_banks
+    would return for that file alone.
+    """
+    paths = _as_paths(paths)
+    shards = _shards_of(paths, strict, shard_size)
+    banks = {path: (QuestionBank(), []) for path in paths}
+    for (path, _, _, _), records in zip(shards, _iter_parsed(shards, workers)):
+        _add_records(*banks[path], path, records)
+    return [banks[path] for path in paths]
+
+
+def _add_records(bank, duplicates, path, records):
+    for question, options, answers, answer_key in records:
+        if question in bank:
+            duplicates.append((bank.id_of(question), path))
+        bank.add(question, options, answers, answer_key)
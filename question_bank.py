@@ -0,0 +1,150 @@
+from question_loader import DEFAULT_CHUNK_SIZE, iter_questions
+
+
+def normalize_answers(answers):
+    """Normalise a question's correct answers the way grading compares them"""
+    if not isinstance(answers, (list, tuple)):
+        answers = [answers]
+    return [str(answer) for answer in answers if str(answer).strip()]
+
+
+def resolve_answer_key(options, answers):
+    """Resolve a question's correct answers to option indices
+
+    Returns (answer_mask, repeated_mask, unmatched). `answer_mask` has a bit
+    set for each option whose text is a correct answer; when several options
+    share the same text only the first copy is set, and the later copies are
+    set in `repeated_mask`. `unmatched` lists the answers that match no
+    option, which make the question impossible to answer correctly.
+    """
+    correct_answers = normalize_answers(answers)
+    first_index = {}
+    answer_mask = 0
+    repeated_mask = 0
+    for index, option in enumerate(options):
+        if option in first_index:
+            repeated_mask |= 1 << index
+            continue
+        first_index[option] = index
+        if option in correct_answers:
+            answer_mask |= 1 << index
+    unmatched = tuple(answer for answer in dict.fromkeys(correct_answers) if answer not in first_index)
+    return answer_mask, repeated_mask, unmatched
+
+
+def report_unmatched_answers(bank):
+    """Print a warning for every question with answers that match no option"""
+    unmatched_answers = bank.unmatched_answers()
+    for question_id, answers in unmatched_answers.items():
+        print(f"Warning: question {question_id + 1} has answers that match no option "
+              f"and can't be answered correctly: {', '.join(answers)}")
+    return len(unmatched_answers)
+
+
+class QuestionBank:
+    """Ordered question bank addressed by stable integer IDs
+
+    A question's ID is its position in the bank, so lookups by ID are O(1)
+    list indexing. Questions, options and answers are kept in parallel
+    sequences rather than a dict of tuples keyed by the full question text.
+    """
+
+    def __init__(self):
+        self._questions = []
+        self._options = []
+        self._answers = []
+        self._answer_keys = []  # (answer_mask, repeated_mask, unmatched_count) per question
+        self._unmatched = {}  # question ID -> answers that match no option
+        self._ids = {}  # question text -> ID
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a bank from an iterable of (question, options, answers)"""
+        bank = cls()
+        for question, options, answers in records:
+            bank.add(question, options, answers)
+        return bank
+
+    @classmethod
+    def from_dict(cls, question_dict):
+        """Build a bank from a {question: (options, answers)} dict"""
+        return cls.from_records(
+            (question, options, answers)
+            for question, (options, answers) in question_dict.items()
+        )
+
+    def add(self, question, options, answers, answer_key=None):
+        """Add a question and return its ID
+
+        The correct answers are resolved to option indices here, once, unless
+        `answer_key` already holds the resolve_answer_key() result. Adding a
+        question whose text is already in the bank replaces its options and
+        answers but keeps the original ID.
+        """
+        if answer_key is None:
+            answer_key = resolve_answer_key(options, answers)
+        answer_mask, repeated_mask, unmatched = answer_key
+        stored_key = (answer_mask, repeated_mask, len(unmatched))
+
+        question_id = self._ids.get(question)
+        if question_id is not None:
+            self._options[question_id] = tuple(options)
+            self._answers[question_id] = tuple(answers)
+            self._answer_keys[question_id] = stored_key
+        else:
+            question_id = len(self._questions)
+            self._questions.append(question)
+            self._options.append(tuple(options))
+            self._answers.append(tuple(answers))
+            self._answer_keys.append(stored_key)
+            self._ids[question] = question_id
+
+        if unmatched:
+            self._unmatched[question_id] = unmatched
+        else:
+            self._unmatched.pop(question_id, None)
+        return question_id
+
+    def __len__(self):
+        return len(self._questions)
+
+    def __getitem__(self, question_id):
+        """Return (question, options, answers) for a question ID"""
+        return self._questions[question_id], self._options[question_id], self._answers[question_id]
+
+    def __iter__(self):
+        for question_id in range(len(self._questions)):
+            yield self[question_id]
+
+    def __contains__(self, question):
+        return question in self._ids
+
+    def question(self, question_id):
+        return self._questions[question_id]
+
+    def options(self, question_id):
+        return self._options[question_id]
+
+    def answers(self, question_id):
+        return self._answers[question_id]
+
+    def answer_key(self, question_id):
+        """Return (answer_mask, repeated_mask, unmatched_count) for a question"""
+        return self._answer_keys[question_id]
+
+    def unmatched_answers(self):
+        """Return {question ID: answers matching no option} for the questions that have any"""
+        return dict(sorted(self._unmatched.items()))
+
+    def add_alias(self, question, question_id):
+        """Make id_of() resolve another text to an existing question"""
+        self._ids.setdefault(question, question_id)
+
+    def id_of(self, question):
+        """Return the ID of a question by its text, or None if it isn't in the bank"""
+        return self._ids.get(question)
+
+
+def load_question_bank(source, chunk_size=DEFAULT_CHUNK_SIZE, strict=False):
+    """Load a question bank file into a QuestionBank"""
+    return QuestionBank.from_records(iter_questions(source, chunk_size, strict))
@@ -0,0 +1,133 @@
+import re
+
+# Markers used by the data.txt question format:
+#   <question text>
+#   A: <option>
+#   B: <option>
+#   &&&&
+#   <correct answer>
+#   %%%%
+RECORD_DELIMITER = "%%%%"
+ANSWERS_MARKER = "&&&&"
+
+# Number of characters read from the file at a time while streaming
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# A single token scan finds option markers at the start of a line and the
+# answer marker wherever it appears (it often trails the last option).
+# Anchoring on the newline is noticeably faster than a MULTILINE "^".
+_TOKEN_PATTERN = re.compile(r'\n[ \t]*([A-D]):|' + re.escape(ANSWERS_MARKER))
+
+
+class QuestionFormatError(ValueError):
+    """Raised when a record in a question bank file is malformed"""
+
+
+def iter_raw_records(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the raw text of each %%%%-delimited record in a file
+
+    `source` is either a path or an already opened text file. The file is read
+    in chunks of `chunk_size` characters so the whole bank never has to be
+    held in memory at once.
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+        with open(source, "r", encoding="utf-8") as f:
+            yield from iter_raw_records(f, chunk_size)
+        return
+
+    delimiter_length = len(RECORD_DELIMITER)
+    buffer = ""
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        # Only rescan the tail that could hold a delimiter split across chunks
+        search_from = max(0, len(buffer) - delimiter_length + 1)
+        buffer += chunk
+
+        start = 0
+        end = buffer.find(RECORD_DELIMITER, search_from)
+        while end != -1:
+            yield buffer[start:end]
+            start = end + delimiter_length
+            end = buffer.find(RECORD_DELIMITER, start)
+        buffer = buffer[start:]
+
+    if buffer:
+        yield buffer
+
+
+def parse_record(record):
+    """Parse one raw record into (question, options, answers)
+
+    The record is tokenized in a single pass, slicing each field straight out
+    of the record instead of re-joining and re-scanning it. Returns None if
+    the record does not contain a question. `answers` is None when the record
+    has no &&&& answer section.
+    """
+    question = None
+    options = []
+    value_start = 0
+
+    for match in _TOKEN_PATTERN.finditer(record):
+        letter = match.group(1)
+        if question is None:
+            # Anything before the first "A:" line is part of the question
+            if letter != "A":
+                continue
+            question = record[:match.start()].strip()
+        else:
+            options.append(record[value_start:match.start()].strip())
+
+        if letter is None:
+            # Everything after &&&& is the correct answer(s), one per line
+            answers = [
+                line.strip() for line in record[match.end():].splitlines() if line.strip()
+            ]
+            return question, options, answers
+
+        value_start = match.end()
+
+    if question is None:
+        return None
+
+    options.append(record[value_start:].strip())
+    return question, options, None
+
+
+def iter_questions(source, chunk_size=DEFAULT_CHUNK_SIZE, strict=False):
+    """Yield (question, options, answers) tuples from a question bank file
+
+    With `strict` set, a record without an answer section raises
+    QuestionFormatError. Otherwise records missing options or answers are
+    skipped.
+    """
+    for record in iter_raw_records(source, chunk_size):
+        parsed = parse_record(record)
+        if parsed is None:
+            continue
+
+        question, options, answers = parsed
+        if answers is None:
+            if strict:
+                raise QuestionFormatError(f"No correct answer found for question: {question}")
+            continue
+        if not strict and not (options and answers):
+            continue
+
+        yield question, options, answers
+
+
+def load_question_dict(source, chunk_size=DEFAULT_CHUNK_SIZE, strict=False):
+    """Load a question bank file into a {question: (options, answers)} dict"""
+    question_dict = {}
+    for question, options, answers in iter_questions(source, chunk_size, strict):
+        question_dict[question] = (options, answers)
+    return question_dict
+
+
+def format_record(question, options, answers):
+    """Format a question in the data.txt convention, ending with its delimiter"""
+    options_text = "".join(f"{chr(65 + i)}: {option}\n" for i, option in enumerate(options))
+    answers_text = "".join(f"{answer}\n" for answer in answers)
+    return f"{question}\n{options_text}{ANSWERS_MARKER}\n{answers_text}{RECORD_DELIMITER}\n"
@@ -0,0 +1,120 @@
+# Set bits of every byte value, for iterating a bitset a byte at a time
+_BITS_OF_BYTE = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def _popcount(data):
+    return bin(int.from_bytes(data, "little")).count("1")
+
+
+class QuestionSet:
+    """A set of question IDs stored as a bitset, one bit per question
+
+    Adding, discarding and testing an ID are O(1), and a session over a
+    bank of N questions needs N / 8 bytes however many it has answered.
+    It supports the set operations the quiz uses (in, add, discard, len,
+    iteration in ascending ID order) plus whole-bitset union, intersection
+    and difference, which run on the bytes at once.
+    """
+
+    __slots__ = ("_bits", "_count")
+
+    def __init__(self, question_ids=()):
+        if isinstance(question_ids, QuestionSet):
+            self._bits = bytearray(question_ids._bits)
+            self._count = question_ids._count
+            return
+        self._bits = bytearray()
+        self._count = 0
+        for question_id in question_ids:
+            self.add(question_id)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Return the set whose bitset is `data`, as written by to_bytes()"""
+        question_set = cls()
+        question_set._bits = bytearray(data)
+        question_set._count = _popcount(question_set._bits)
+        return question_set
+
+    def to_bytes(self):
+        """Return the bitset, bit i of byte j standing for question 8 * j + i"""
+        return bytes(self._bits.rstrip(b"\0"))
+
+    def add(self, question_id):
+        byte, bit = question_id >> 3, 1 << (question_id & 7)
+        if question_id < 0:
+            raise ValueError(f"Question IDs can't be negative: {question_id}")
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte + 1 - len(self._bits)))
+        if not self._bits[byte] & bit:
+            self._bits[byte] |= bit
+            self._count += 1
+
+    def discard(self, question_id):
+        byte, bit = question_id >> 3, 1 << (question_id & 7)
+        if 0 <= byte < len(self._bits) and self._bits[byte] & bit:
+            self._bits[byte] &= ~bit
+            self._count -= 1
+
+    def remove(self, question_id):
+        if question_id not in self:
+            raise KeyError(question_id)
+        self.discard(question_id)
+
+    def clear(self):
+        self._bits = bytearray()
+        self._count = 0
+
+    def __contains__(self, question_id):
+        byte = question_id >> 3
+        return 0 <= byte < len(self._bits) and bool(self._bits[byte] >> (question_id & 7) & 1)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        bits_of_byte = _BITS_OF_BYTE
+        for byte_index, value in enumerate(self._bits):
+            if value:
+                base = byte_index << 3
+                for bit in bits_of_byte[value]:
+                    yield base + bit
+
+    def copy(self):
+        return QuestionSet(self)
+
+    def _combine(self, other, operation):
+        if not isinstance(other, QuestionSet):
+            other = QuestionSet(other)
+        size = max(len(self._bits), len(other._bits))
+        combined = operation(int.from_bytes(self._bits, "little"), int.from_bytes(other._bits, "little"))
+        return QuestionSet.from_bytes(combined.to_bytes(size, "little"))
+
+    def union(self, *others):
+        """Questions in this set or any of `others`, such as those answered across attempts"""
+        result = self
+        for other in others:
+            result = result._combine(other, int.__or__)
+        return result if others else self.copy()
+
+    def intersection(self, other):
+        return self._combine(other, int.__and__)
+
+    def difference(self, other):
+        return self._combine(other, lambda a, b: a & ~b)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __eq__(self, other):
+        if isinstance(other, QuestionSet):
+            return self._count == other._count and self._bits.rstrip(b"\0") == other._bits.rstrip(b"\0")
+        if isinstance(other, (set, frozenset)):
+            return len(other) == self._count and all(question_id in self for question_id in other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"QuestionSet({list(self)!r})"
@@ -0,0 +1,219 @@
+import random
+
+from question_set import QuestionSet
+
+# Answer mask of a question whose correct answers don't all match an option;
+# no selection can ever equal it
+UNANSWERABLE = -1
+
+# A question's displayed option order is a permutation derived from the
+# session's shuffle seed and the question ID, so it is the same every time
+# the question is shown and can be replayed from the checkpoint. It is
+# packed 4 bits per position into an int: position i shows original option
+# `order >> 4 * i & 0xF`. Options past the first 16 keep their place.
+MAX_SHUFFLED_OPTIONS = 16
+_MASK64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+# The unshuffled order of each option count
+_IDENTITY_ORDERS = [sum(i << 4 * i for i in range(count)) for count in range(MAX_SHUFFLED_OPTIONS + 1)]
+
+
+def selection_mask(option_indices):
+    """Return the bitmask for a collection of selected original option indices"""
+    mask = 0
+    for index in option_indices:
+        mask |= 1 << index
+    return mask
+
+
+def _mix64(value):
+    """SplitMix64's finalizer: a well-spread 64-bit hash of a 64-bit value"""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & _MASK64
+    return value ^ (value >> 31)
+
+
+def new_shuffle_seed():
+    return random.getrandbits(64)
+
+
+def next_shuffle_seed(seed):
+    """Return the seed of the attempt after one with `seed`, such as after a restart"""
+    return _mix64(seed + _GOLDEN_GAMMA & _MASK64)
+
+
+def option_order(seed, question_id, option_count):
+    """Return the packed option order of a question for a shuffle seed
+
+    A Fisher-Yates shuffle over the packed positions. Its swaps are the
+    mixed-radix digits of one 64-bit hash of the seed and the question ID;
+    16! is below 2**45, so 64 bits leave a negligible bias.
+    """
+    count = min(option_count, MAX_SHUFFLED_OPTIONS)
+    order = _IDENTITY_ORDERS[count]
+    digits = _mix64(seed ^ _mix64(question_id & _MASK64))
+    for i in range(count - 1, 0, -1):
+        digits, j = divmod(digits, i + 1)
+        if j != i:
+            # Swap the nibbles of positions i and j
+            swapped = (order >> 4 * i ^ order >> 4 * j) & 0xF
+            order ^= swapped << 4 * i | swapped << 4 * j
+    return order
+
+
+def order_index(order, position):
+    """Return the original index of the option shown at `position`"""
+    return order >> 4 * position & 0xF if position < MAX_SHUFFLED_OPTIONS else position
+
+
+class QuizEngine:
+    """Quiz progress, grading and scoring, independent of any display
+
+    Selections are bitmasks over a question's original (unshuffled) option
+    indices. An answer is correct when the selected options are exactly the
+    options whose text matches the correct answers.
+    """
+
+    def __init__(self, question_bank, shuffle_seed=None):
+        self.question_bank = question_bank
+        self.shuffle_seed = new_shuffle_seed() if shuffle_seed is None else shuffle_seed
+        self.question_index = 0
+        self.score = 0
+        self.incorrect_questions = QuestionSet()  # IDs of incorrectly answered questions
+        self.answered_questions = QuestionSet()  # IDs of questions that have been answered
+
+    def answer_mask(self, question_id):
+        """Return the bitmask of a question's correct options, or UNANSWERABLE
+
+        When several options share the same text only the first copy is set.
+        The mask is resolved when the question is loaded into the bank.
+        """
+        answer_mask, _, unmatched_count = self.question_bank.answer_key(question_id)
+        return UNANSWERABLE if unmatched_count else answer_mask
+
+    def repeated_options(self, question_id):
+        """Return the mask of options that repeat an earlier option's text"""
+        return self.question_bank.answer_key(question_id)[1]
+
+    def _first_copies(self, question_id):
+        """Return the index of the first option with the same text as each option"""
+        first_index = {}
+        return [first_index.setdefault(option, index)
+                for index, option in enumerate(self.question_bank.options(question_id))]
+
+    def canonical_selection(self, question_id, selection):
+        """Fold selected repeats of an option onto its first copy
+
+        Grading compares the selected option texts, so picking any copy of a
+        repeated option counts the same as picking the first one.
+        """
+        if not selection & self.repeated_options(question_id):
+            return selection
+        folded = 0
+        for index, first in enumerate(self._first_copies(question_id)):
+            if selection >> index & 1:
+                folded |= 1 << first
+        return folded
+
+    def correct_options(self, question_id):
+        """Return the mask of every option whose text is a correct answer
+
+        Unlike answer_mask() this includes repeated copies and ignores
+        answers that match no option; it's what the window highlights.
+        """
+        answer_mask, repeated_mask, _ = self.question_bank.answer_key(question_id)
+        if repeated_mask:
+            for index, first in enumerate(self._first_copies(question_id)):
+                if answer_mask >> first & 1:
+                    answer_mask |= 1 << index
+        return answer_mask
+
+    def grade(self, question_id, selection):
+        """Return whether `selection` is the right answer to a question"""
+        answer_mask, repeated_mask, unmatched_count = self.question_bank.answer_key(question_id)
+        if selection & repeated_mask:
+            selection = self.canonical_selection(question_id, selection)
+        return answer_mask == selection and not unmatched_count
+
+    def grade_many(self, responses):
+        """Grade (question_id, selection) pairs in bulk; returns a list of bools"""
+        answer_key = self.question_bank.answer_key
+        results = []
+        for question_id, selection in responses:
+            answer_mask, repeated_mask, unmatched_count = answer_key(question_id)
+            if selection & repeated_mask:
+                selection = self.canonical_selection(question_id, selection)
+            results.append(answer_mask == selection and not unmatched_count)
+        return results
+
+    def submit(self, question_id, selection):
+        """Grade an answer and update the score and tracking
+
+        Returns (correct, newly_incorrect); `newly_incorrect` is True when a
+        question joins the incorrect set.
+        """
+        correct = self.grade(question_id, selection)
+        newly_incorrect = False
+        if correct:
+            self.score += 1
+            # If this question was previously marked incorrect, it no longer is
+            self.incorrect_questions.discard(question_id)
+        elif question_id not in self.incorrect_questions:
+            self.incorrect_questions.add(question_id)
+            newly_incorrect = True
+
+        self.answered_questions.add(question_id)
+        return correct, newly_incorrect
+
+    def option_order(self, question_id, option_count=None):
+        """Return the packed order in which this session shows a question's options"""
+        if option_count is None:
+            option_count = len(self.question_bank.options(question_id))
+        return option_order(self.shuffle_seed, question_id, option_count)
+
+    def correct_questions(self):
+        """Return the set of answered questions not currently marked incorrect"""
+        return self.answered_questions - self.incorrect_questions
+
+    @property
+    def total_questions(self):
+        return len(self.question_bank)
+
+    @property
+    def finished(self):
+        return self.question_index >= len(self.question_bank)
+
+    def next_question(self):
+        self.question_index += 1
+
+    def prev_question(self):
+        if self.question_index > 0:
+            self.question_index -= 1
+
+    def go_to(self, question_index):
+        self.question_index = question_index
+
+    def reset(self):
+        # A new attempt gets new option orders, reproducibly
+        self.shuffle_seed = next_shuffle_seed(self.shuffle_seed)
+        self.question_index = 0
+        self.score = 0
+        self.incorrect_questions = QuestionSet()
+        self.answered_questions = QuestionSet()
+
+    def state(self):
+        """Return a copy of the progress, in the checkpoint's format"""
+        return {
+            'question_index': self.question_index,
+            'score': self.score,
+            'incorrect_questions': self.incorrect_questions.copy(),
+            'answered_questions': self.answered_questions.copy(),
+            'shuffle_seed': self.shuffle_seed,
+        }
+
+    def restore(self, state):
+        self.question_index = state['question_index']
+        self.score = state['score']
+        self.incorrect_questions = QuestionSet(state['incorrect_questions'])
+        self.answered_questions = QuestionSet(state['answered_questions'])
+        self.shuffle_seed = state.get('shuffle_seed', self.shuffle_seed)
@@ -0,0 +1,295 @@
+"""Serve a question bank over local HTTP/JSON, one quiz session per student
+
+Usage: python quiz_server.py [--bank data] [--host 127.0.0.1] [--port 8765]
+
+Every session has its own QuizEngine, with its own seed for the option
+orders, so it keeps the same state as a QuizWindow. Options are sent in shuffled order
+and answers refer to them by their shuffled position. Sessions live in
+memory only and end after SESSION_TIMEOUT seconds without a request.
+
+    POST   /sessions                 start a session; returns its ID and first question
+    GET    /sessions/<id>            progress and the current question
+    POST   /sessions/<id>/answer     {"selected": [shuffled option positions]}
+    POST   /sessions/<id>/next       go to the next question
+    POST   /sessions/<id>/prev       go to the previous question
+    DELETE /sessions/<id>            end a session
+
+Requests are handled on one asyncio event loop; grading a session's answer
+doesn't block, so one core serves thousands of sessions.
+"""
+import argparse
+import asyncio
+import json
+import secrets
+import time
+
+from bank_catalogue import DEFAULT_BANK_NAME, BankCatalogue
+from quiz_engine import QuizEngine, order_index, selection_mask
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+SESSION_TIMEOUT = 2 * 60 * 60
+MAX_SESSIONS = 100_000
+# How often idle sessions are looked for
+SWEEP_INTERVAL = 60
+MAX_BODY = 64 * 1024
+MAX_HEADER = 16 * 1024
+
+_REASONS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class QuizSession:
+    """One student's progress: an engine plus the option order of the current question"""
+
+    def __init__(self, question_bank, shuffle_seed=None):
+        self.engine = QuizEngine(question_bank, shuffle_seed)
+        self.option_order = 0  # packed, see quiz_engine.option_order
+        self.option_count = 0
+        self.last_seen = time.monotonic()
+        self.shuffle()
+
+    def shuffle(self):
+        """Look up the current question's option order, as QuizWindow.load_question does"""
+        engine = self.engine
+        if engine.finished:
+            self.option_order = self.option_count = 0
+            return
+        self.option_count = len(engine.question_bank.options(engine.question_index))
+        self.option_order = engine.option_order(engine.question_index, self.option_count)
+
+    def shuffled_positions(self, mask):
+        return [position for position in range(self.option_count)
+                if mask >> order_index(self.option_order, position) & 1]
+
+    def question(self):
+        """Return the current question as sent to the client"""
+        engine = self.engine
+        if engine.finished:
+            return {
+                'finished': True,
+                'score': engine.score,
+                'total': engine.total_questions,
+                'incorrect': len(engine.incorrect_questions),
+            }
+
+        question_id = engine.question_index
+        options = engine.question_bank.options(question_id)
+        payload = {
+            'finished': False,
+            'index': question_id,
+            'total': engine.total_questions,
+            'question': engine.question_bank.question(question_id),
+            'options': [options[order_index(self.option_order, position)] for position in range(len(options))],
+            'answered': question_id in engine.answered_questions,
+        }
+        if payload['answered']:
+            # Previously answered questions show their correct options
+            payload['correct_options'] = self.shuffled_positions(engine.correct_options(question_id))
+        return payload
+
+    def answer(self, selected):
+        engine = self.engine
+        if engine.finished:
+            raise HTTPError(400, "The quiz is finished")
+        if not isinstance(selected, list) or not all(
+            isinstance(position, int) and 0 <= position < self.option_count for position in selected
+        ):
+            raise HTTPError(400, "selected must list option positions of the current question")
+        original_indices = [order_index(self.option_order, position) for position in selected]
+
+        question_id = engine.question_index
+        correct, newly_incorrect = engine.submit(question_id, selection_mask(original_indices))
+        return {
+            'correct': correct,
+            'newly_incorrect': newly_incorrect,
+            'correct_options': self.shuffled_positions(engine.correct_options(question_id)),
+            'score': engine.score,
+        }
+
+    def state(self):
+        engine = self.engine
+        return {
+            'index': engine.question_index,
+            'total': engine.total_questions,
+            'score': engine.score,
+            'answered': len(engine.answered_questions),
+            'incorrect': len(engine.incorrect_questions),
+            'question': self.question(),
+        }
+
+
+class QuizServer:
+    """The sessions of one question bank and the HTTP handling in front of them"""
+
+    def __init__(self, question_bank, max_sessions=MAX_SESSIONS, session_timeout=SESSION_TIMEOUT):
+        self.question_bank = question_bank
+        self.max_sessions = max_sessions
+        self.session_timeout = session_timeout
+        self.sessions = {}  # session ID -> QuizSession
+
+    def session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, "No such session")
+        session.last_seen = time.monotonic()
+        return session
+
+    def sweep(self):
+        """Drop sessions idle for longer than the timeout; returns how many were dropped"""
+        cutoff = time.monotonic() - self.session_timeout
+        expired = [session_id for session_id, session in self.sessions.items() if session.last_seen < cutoff]
+        for session_id in expired:
+            del self.sessions[session_id]
+        return len(expired)
+
+    def dispatch(self, method, path, body):
+        """Handle one request; returns (status, payload)"""
+        parts = [part for part in path.split("?", 1)[0].split("/") if part]
+        if not parts or parts[0] != "sessions" or len(parts) > 3:
+            raise HTTPError(404, "Not found")
+
+        if len(parts) == 1:
+            if method != "POST":
+                raise HTTPError(405, "Use POST to start a session")
+            if len(self.sessions) >= self.max_sessions:
+                raise HTTPError(503, "Too many sessions")
+            session_id = secrets.token_urlsafe(16)
+            session = self.sessions[session_id] = QuizSession(self.question_bank)
+            return 201, {'session': session_id, 'question': session.question()}
+
+        session = self.session(parts[1])
+        if len(parts) == 2:
+            if method == "GET":
+                return 200, session.state()
+            if method == "DELETE":
+                del self.sessions[parts[1]]
+                return 200, {'score': session.engine.score, 'total': session.engine.total_questions}
+            raise HTTPError(405, "Use GET or DELETE on a session")
+
+        if method != "POST":
+            raise HTTPError(405, "Use POST for session actions")
+        action = parts[2]
+        if action == "answer":
+            try:
+                selected = json.loads(body or b"{}")["selected"]
+            except (ValueError, KeyError, TypeError):
+                raise HTTPError(400, 'Send {"selected": [option positions]}')
+            return 200, session.answer(selected)
+        if action == "next":
+            if not session.engine.finished:
+                session.engine.next_question()
+                session.shuffle()
+            return 200, session.question()
+        if action == "prev":
+            if session.engine.question_index > 0:
+                session.engine.prev_question()
+                session.shuffle()
+            return 200, session.question()
+        raise HTTPError(404, f"Unknown action {action}")
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until it closes"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break  # the client closed the connection
+                except asyncio.LimitOverrunError:
+                    writer.write(_response(400, {'error': "Request header too large"}, False))
+                    break
+
+                keep_alive = False
+                try:
+                    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                    method, path, version = request_line.split(" ", 2)
+                    headers = {}
+                    for line in header_lines:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise HTTPError(413, "Request body too large")
+                    body = await reader.readexactly(length) if length > 0 else b""
+                    status, payload = self.dispatch(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except ValueError:
+                    status, payload = 400, {'error': "Malformed request"}
+                    keep_alive = False
+
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def sweep_forever(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self.sweep()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        """Serve until cancelled; `ready(server)` is called once the socket is listening"""
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER, backlog=1024)
+        sweeper = asyncio.ensure_future(self.sweep_forever())
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            sweeper.cancel()
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bank", default=DEFAULT_BANK_NAME, help="catalogue name of the bank to serve")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    args = parser.parse_args()
+
+    catalogue = BankCatalogue.discover()
+    if args.bank not in catalogue.names():
+        parser.error(f"unknown bank {args.bank}; choose from {', '.join(catalogue.names())}")
+    question_bank = catalogue.open(args.bank)
+    quiz_server = QuizServer(question_bank)
+
+    def ready(server):
+        addresses = ", ".join(f"{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+        print(f"Serving {len(question_bank)} questions from {args.bank} on {addresses}", flush=True)
+
+    try:
+        asyncio.run(quiz_server.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
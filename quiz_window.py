@@ -1,13 +1,67 @@
-from tkinter import Tk, Label, Button, StringVar, Frame, messagebox, Checkbutton, IntVar, ttk, PhotoImage, Menu, Toplevel
-import random
-import re
-import pickle
+from tkinter import Tk, Label, Button, StringVar, Frame, messagebox, Checkbutton, IntVar, BooleanVar, ttk, PhotoImage, Menu, Toplevel, Entry, TclError, simpledialog
 import os
+import time
 from tkinter import font as tkfont
 
+from background_writer import BackgroundWriter
+from bank_cache import CacheError, MappedQuestionBank, cache_path_for, is_cache_current
+from bank_catalogue import DEFAULT_BANK_NAME, BankCatalogue, default_bank_entry
+from bank_loader import BankLoader
+from checkpoint_journal import CheckpointJournal, resolve_question_ids
+from exam_assembly import DIFFICULTY_BANDS, UNSEEN, ExamAssembler, difficulty_strata
+from incorrect_store import IncorrectQuestionStore
+from question_bank import QuestionBank, load_question_bank, report_unmatched_answers
+from quiz_engine import QuizEngine, order_index, selection_mask
+from response_times import RESPONSE_TIMES_SUFFIX, ResponseLog, ResponseTimes
+from scheduler import SCHEDULE_SUFFIX, ReviewScheduler, ScheduleLog
+from search_index import load_search_index
+from ui_profiler import CPROFILE_PATH, TRACE_PATH, session_profiler
+from virtual_list import VirtualList
+
+# Most search hits the search box steps through
+SEARCH_LIMIT = 1000
+# How often the profiling overlay refreshes
+PROFILE_OVERLAY_MS = 500
+# Rows of the results list; longer text is cut to fit them
+RESULT_ROW_HEIGHT = 92
+RESULT_QUESTION_CHARS = 150
+RESULT_ANSWER_CHARS = 80
+# Exam forms draw equally from each difficulty band and from unseen questions
+EXAM_FORM_SIZE = 50
+EXAM_QUOTAS = {name: 1 for name in DIFFICULTY_BANDS + (UNSEEN,)}
+
+
+def elide(text, limit):
+    """Cut text to at most `limit` characters, ending with an ellipsis if cut"""
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
 class QuizWindow:
-    def __init__(self, master, question_dict):
+    # Journal every answer to the checkpoint and resume from it on startup
+    autosave = True
+    
+    # Read-only views of the engine's progress
+    score = property(lambda self: self.engine.score)
+    question_index = property(lambda self: self.engine.question_index)
+    incorrect_questions = property(lambda self: self.engine.incorrect_questions)  # IDs
+    answered_questions = property(lambda self: self.engine.answered_questions)  # IDs
+    
+    # Handlers timed when profiling is on (QUIZ_PROFILE=1, see ui_profiler)
+    profiled_handlers = (
+        "load_question", "submit_answer", "toggle_option", "next_question", "prev_question",
+        "go_to_question", "next_due_question", "search_questions", "save_checkpoint",
+        "load_checkpoint", "restore_checkpoint", "show_bank",
+    )
+    
+    def __init__(self, master, question_bank, loading=False, bank_entry=None, catalogue=None):
         self.master = master
+        
+        # Opt-in profiling; the handlers are wrapped before any widget refers to them
+        self.profiler = session_profiler()
+        if self.profiler is not None:
+            for name in self.profiled_handlers:
+                setattr(self, name, self.profiler.wrap(name, getattr(self, name), self.master))
+        
         self.master.title("Quiz Master")
         self.master.geometry("1000x700")  # Slightly larger window for better spacing
         self.master.configure(bg="#f5f7fa")  # Lighter, more modern background
@@ -38,18 +92,50 @@ class QuizWindow:
         
         # Add File menu with icons (if available)
         self.file_menu = Menu(self.menu_bar, tearoff=0)
-        self.file_menu.add_command(label="Save Progress", command=self.save_checkpoint, accelerator="Ctrl+S")
-        self.file_menu.add_command(label="Load Progress", command=self.load_checkpoint, accelerator="Ctrl+O")
-        self.file_menu.add_separator()
+        if self.autosave:
+            # Review and exam windows run banks of their own, with no checkpoint
+            self.file_menu.add_command(label="Save Progress", command=self.save_checkpoint, accelerator="Ctrl+S")
+            self.file_menu.add_command(label="Load Progress", command=self.load_checkpoint, accelerator="Ctrl+O")
+            self.file_menu.add_separator()
         self.file_menu.add_command(label="Review Incorrect Questions", command=self.review_incorrect_questions)
         self.file_menu.add_separator()
-        self.file_menu.add_command(label="Exit", command=self.master.quit)
+        
+        # Question banks of the catalogue, each with its own progress
+        self.catalogue = catalogue
+        self.bank_entry = bank_entry or default_bank_entry()
+        self.bank_var = StringVar(value=self.bank_entry.name)
+        if self.catalogue is not None and len(self.catalogue) > 1:
+            self.bank_menu = Menu(self.file_menu, tearoff=0)
+            for name in self.catalogue.names():
+                self.bank_menu.add_radiobutton(
+                    label=name, value=name, variable=self.bank_var,
+                    command=lambda name=name: self.open_bank(name)
+                )
+            self.file_menu.add_cascade(label="Question Bank", menu=self.bank_menu)
+            self.file_menu.add_separator()
+        
+        self.file_menu.add_command(label="Exit", command=self.on_close)
         self.menu_bar.add_cascade(label="File", menu=self.file_menu)
         
+        # Add Study menu; in Due Now mode Next picks the question the
+        # spaced-repetition schedule says is most overdue
+        self.due_mode = BooleanVar(value=False)
+        self.study_menu = Menu(self.menu_bar, tearoff=0)
+        self.study_menu.add_checkbutton(
+            label="Due Now Mode", variable=self.due_mode, command=self.toggle_due_mode, accelerator="Ctrl+D"
+        )
+        self.study_menu.add_command(label="New Exam Form", command=self.new_exam_form)
+        self.study_menu.add_separator()
+        self.study_menu.add_command(label="Response Times", command=self.show_response_times)
+        self.menu_bar.add_cascade(label="Study", menu=self.study_menu)
+        
         # Add Help menu
         self.help_menu = Menu(self.menu_bar, tearoff=0)
         self.help_menu.add_command(label="Keyboard Shortcuts", command=self.show_shortcuts)
         self.help_menu.add_command(label="About", command=self.show_about)
+        if self.profiler is not None:
+            self.help_menu.add_separator()
+            self.help_menu.add_command(label="Save Profile", command=self.save_profile)
         self.menu_bar.add_cascade(label="Help", menu=self.help_menu)
         
         # Center window on screen
@@ -60,22 +146,72 @@ class QuizWindow:
         self.fullscreen = False
         
         # Checkpoint path
-        self.checkpoint_path = r"quiz_checkpoint.dat"
+        self.checkpoint_path = self.bank_entry.checkpoint_path
         # Path for incorrect questions
-        self.incorrect_questions_path = r"incorrect_questions.txt"
+        self.incorrect_questions_path = self.bank_entry.incorrect_questions_path
         
-        # Quiz state
-        self.question_dict = question_dict
-        self.score = 0
-        self.question_index = 0
-        self.total_questions = len(question_dict)
+        # Quiz state; progress, grading and scoring live in the engine
+        self.question_bank = question_bank
+        self.engine = QuizEngine(question_bank)
+        self.total_questions = len(question_bank)
         self.current_question = StringVar()
         self.progress_text = StringVar()
         self.selected_answers = []
-        self.incorrect_questions = []
+        self.option_order = 0  # packed order of the shown options, see quiz_engine
         self.result_var = StringVar()
         self.result_var.set("")
-        self.answered_questions = set()  # Keep track of which questions have been answered
+        
+        # While a BankLoader is still streaming questions in, the checkpoint
+        # and incorrect questions can't be matched to IDs yet
+        self.loading = loading
+        self.restore_pending = False
+        self.events_since_restore = 0  # journaled while a restore was being read
+        self.deferred_incorrect = []
+        
+        # All file writes after startup go through the background writer
+        self.writer = BackgroundWriter(self.master, profiler=self.profiler)
+        # Search indexes are built on a thread of their own, so a long build
+        # never holds up the writes queued behind it
+        self.indexer = BackgroundWriter(self.master, profiler=self.profiler, name="quiz-indexer")
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Misses are recorded by the main window only: review questions are
+        # in the file already, and exam windows record theirs through it
+        self.incorrect_store = None
+        if self.autosave:
+            self.incorrect_store = IncorrectQuestionStore(self.incorrect_questions_path, question_bank)
+            if not self.loading:
+                # Index the file on the writer thread, before any miss is added
+                self.writer.submit(self.incorrect_store.rebuild_index)
+        
+        # Autosaved checkpoint; pick up where the last session left off
+        self.checkpoint = CheckpointJournal(self.checkpoint_path)
+        if self.autosave and self.checkpoint.exists():
+            if self.loading:
+                # Answers given meanwhile are journaled, so restoring after
+                # the bank has loaded replays them on top of the saved state
+                self.restore_pending = True
+            else:
+                try:
+                    self.restore_checkpoint()
+                except Exception as e:
+                    print(f"Could not resume saved progress: {str(e)}")
+        elif self.autosave:
+            # A new session; save its shuffle seed so its option orders replay
+            self.save_initial_snapshot()
+        
+        # Spaced-repetition schedule, logged next to the checkpoint
+        self.schedule_log = ScheduleLog(self.checkpoint_path + SCHEDULE_SUFFIX)
+        self.scheduler = ReviewScheduler(self.load_schedule(self.schedule_log))
+        self.scheduled_this_visit = False  # only the first answer to a shown question is scheduled
+        self.due_history = []  # questions visited in Due Now mode, for Previous
+        self.new_question_cursor = 0
+        # Draws exam forms that share no questions; made with the first form
+        self.exam_assembler = None
+        
+        # Time and attempts of every answer, logged next to the checkpoint
+        self.response_log = ResponseLog(self.checkpoint_path + RESPONSE_TIMES_SUFFIX)
+        self.response_times = self.load_response_times(self.response_log)
 
         # Main container with shadow effect
         self.main_frame = Frame(self.master, bg="#f5f7fa")
@@ -107,6 +243,51 @@ class QuizWindow:
         )
         self.progress_bar.pack(side="top", pady=5, anchor="w")
         
+        # Search box; Enter jumps to the next question matching the query
+        self.search_index = None
+        self.search_query = ""
+        self.search_hits = []
+        self.search_position = -1
+        self.search_var = StringVar()
+        self.search_status = StringVar()
+        
+        self.search_frame = Frame(self.header_frame, bg="#e8eef7")
+        self.search_frame.pack(side="left", padx=20)
+        
+        self.search_entry = Entry(
+            self.search_frame,
+            textvariable=self.search_var,
+            font=self.custom_font,
+            width=28,
+            relief="flat"
+        )
+        self.search_entry.pack(side="left", ipady=3)
+        self.search_entry.bind("<Return>", self.on_search_return)
+        self.search_entry.bind("<Escape>", lambda event: self.master.focus_set())
+        
+        self.search_button = Button(
+            self.search_frame,
+            text="Search",
+            command=self.search_questions,
+            bg="#607d8b",
+            fg="white",
+            font=("Segoe UI", 9, "bold"),
+            padx=10,
+            relief="flat",
+            activebackground="#546e7a",
+            activeforeground="white"
+        )
+        self.search_button.pack(side="left", padx=5)
+        
+        self.search_status_label = Label(
+            self.search_frame,
+            textvariable=self.search_status,
+            font=("Segoe UI", 9),
+            bg="#e8eef7",
+            fg="#555555"
+        )
+        self.search_status_label.pack(side="left")
+        
         # Score display with improved styling
         self.score_frame = Frame(self.header_frame, bg="#e8eef7")
         self.score_frame.pack(side="right", padx=10)
@@ -234,22 +415,33 @@ class QuizWindow:
         )
         self.shortcut_label.pack(side="left")
 
-        # Set up keyboard shortcuts
-        self.master.bind("<Right>", lambda event: self.next_question())
-        self.master.bind("<Left>", lambda event: self.prev_question())
-        self.master.bind("1", lambda event: self.toggle_option(0))
-        self.master.bind("2", lambda event: self.toggle_option(1))
-        self.master.bind("3", lambda event: self.toggle_option(2))
-        self.master.bind("4", lambda event: self.toggle_option(3))
-        self.master.bind("<Return>", lambda event: self.submit_answer())
-        self.master.bind("<space>", lambda event: self.submit_answer())
-        self.master.bind("<Control-s>", lambda event: self.save_checkpoint())
-        self.master.bind("<Control-o>", lambda event: self.load_checkpoint())
-        self.master.bind("?", lambda event: self.show_shortcuts())
+        # Set up keyboard shortcuts; the ones on plain keys are ignored while
+        # typing in the search box
+        self.master.bind("<Right>", self.shortcut(self.next_question))
+        self.master.bind("<Left>", self.shortcut(self.prev_question))
+        self.master.bind("1", self.shortcut(self.toggle_option, 0))
+        self.master.bind("2", self.shortcut(self.toggle_option, 1))
+        self.master.bind("3", self.shortcut(self.toggle_option, 2))
+        self.master.bind("4", self.shortcut(self.toggle_option, 3))
+        self.master.bind("<Return>", self.shortcut(self.submit_answer))
+        self.master.bind("<space>", self.shortcut(self.submit_answer))
+        if self.autosave:
+            self.master.bind("<Control-s>", lambda event: self.save_checkpoint())
+            self.master.bind("<Control-o>", lambda event: self.load_checkpoint())
+        self.master.bind("<Control-f>", lambda event: self.focus_search())
+        self.master.bind("<Control-d>", lambda event: self.toggle_due_mode(not self.due_mode.get()))
+        self.master.bind("?", self.shortcut(self.show_shortcuts))
 
         # Now that all UI elements are created, update the progress text and bar
+        self.build_option_cards()
         self.update_progress_text()
         self.load_question()
+        
+        if not self.loading:
+            self.build_search_index()
+        
+        if self.profiler is not None:
+            self.build_profile_overlay()
     
     def center_window(self):
         """Center the window on the screen"""
@@ -266,7 +458,8 @@ class QuizWindow:
         self.master.geometry(f"{window_width}x{window_height}+{x}+{y-60}")
     
     def update_progress_text(self):
-        self.progress_text.set(f"Question {self.question_index + 1} of {self.total_questions}")
+        due_note = " (due now)" if self.due_mode.get() else ""
+        self.progress_text.set(f"Question {self.question_index + 1} of {self.total_questions}{due_note}")
         if hasattr(self, 'question_number'):
             self.question_number.config(text=f"Question {self.question_index + 1}")
         self.update_progress_bar()
@@ -304,7 +497,7 @@ class QuizWindow:
         """Show keyboard shortcuts in a popup"""
         shortcuts_window = Toplevel(self.master)
         shortcuts_window.title("Keyboard Shortcuts")
-        shortcuts_window.geometry("400x450")
+        shortcuts_window.geometry("400x530")
         shortcuts_window.configure(bg="#ffffff")
         shortcuts_window.resizable(False, False)
         
@@ -340,9 +533,13 @@ class QuizWindow:
             ("←", "Previous question"),
             ("Ctrl+S", "Save progress"),
             ("Ctrl+O", "Load progress"),
+            ("Ctrl+F", "Search questions"),
+            ("Ctrl+D", "Toggle Due Now mode"),
             ("F11", "Toggle fullscreen"),
             ("?", "Show this help")
         ]
+        if not self.autosave:
+            shortcuts = [(key, description) for key, description in shortcuts if key not in ("Ctrl+S", "Ctrl+O")]
         
         for key, description in shortcuts:
             shortcut_frame = Frame(content_frame, bg="#ffffff", pady=5)
@@ -455,155 +652,248 @@ class QuizWindow:
         about_window.transient(self.master)
         about_window.grab_set()
     
-    def load_question(self):
-        for widget in self.options_frame.winfo_children():
-            widget.destroy()
+    def show_response_times(self):
+        """Show the slowest and most missed questions; clicking one jumps to it"""
+        slowest, most_missed = self.response_times.summary()
+        
+        times_window = Toplevel(self.master)
+        times_window.title("Response Times")
+        times_window.geometry("640x620")
+        times_window.configure(bg="#ffffff")
+        
+        # Header
+        header_frame = Frame(times_window, bg="#2196f3", padx=10, pady=10)
+        header_frame.pack(fill="x")
+        
+        header_label = Label(
+            header_frame,
+            text=f"Response Times ({len(self.response_times)} answers)",
+            font=("Segoe UI", 14, "bold"),
+            bg="#2196f3",
+            fg="white"
+        )
+        header_label.pack()
+        
+        # Content
+        content_frame = Frame(times_window, bg="#ffffff", padx=20, pady=10)
+        content_frame.pack(fill="both", expand=True)
+        
+        def jump_to(question_id):
+            times_window.destroy()
+            self.go_to_question(question_id)
+        
+        sections = [
+            ("Slowest questions", slowest,
+             lambda stats: f"{stats['median_seconds']:.1f} s median, {stats['visits']} visits"),
+            ("Most missed questions", most_missed,
+             lambda stats: f"{stats['incorrect']} of {stats['answers']} answers wrong"),
+        ]
+        for title, rows, describe in sections:
+            Label(
+                content_frame,
+                text=title,
+                font=("Segoe UI", 11, "bold"),
+                bg="#ffffff",
+                fg="#2196f3",
+                anchor="w"
+            ).pack(fill="x", pady=(10, 5))
+            
+            if not rows:
+                Label(content_frame, text="No answers yet", font=("Segoe UI", 10),
+                      bg="#ffffff", fg="#888888", anchor="w").pack(fill="x")
+            
+            for question_id, stats in rows:
+                if question_id >= len(self.question_bank):
+                    continue  # from a version of the bank with more questions
+                question = self.question_bank.question(question_id)
+                if len(question) > 60:
+                    question = question[:57] + "..."
+                row_label = Label(
+                    content_frame,
+                    text=f"Q{question_id + 1}  {describe(stats)}  {question}",
+                    font=("Segoe UI", 10),
+                    bg="#ffffff",
+                    fg="#333333",
+                    anchor="w",
+                    cursor="hand2"
+                )
+                row_label.pack(fill="x")
+                row_label.bind("<Button-1>", lambda event, question_id=question_id: jump_to(question_id))
+        
+        # Close button
+        close_button = Button(
+            times_window,
+            text="Close",
+            command=times_window.destroy,
+            bg="#2196f3",
+            fg="white",
+            font=("Segoe UI", 10, "bold"),
+            padx=20,
+            pady=5,
+            relief="flat"
+        )
+        close_button.pack(pady=15)
+        
+        times_window.transient(self.master)
+    
+    def build_option_cards(self):
+        """Create the option cards once; load_question reconfigures them in place"""
+        self.answer_vars = []
+        self.checkbuttons = []  # Store references to checkbuttons
+        self.option_frames = []  # Store references to option frames
+        
+        # Pools of every card; answer_vars etc. hold the ones in use
+        self.pooled_vars = []
+        self.pooled_checkbuttons = []
+        self.pooled_frames = []
+        
+        # Options container with modern styling
+        options_container = Frame(self.options_frame, bg="#f5f7fa")
+        options_container.pack(fill="both", expand=True, padx=15, pady=10)
+        
+        # Create a 2x2 grid for options with improved styling
+        grid_frame = Frame(options_container, bg="#f5f7fa")
+        grid_frame.pack(expand=True, fill="both", pady=10)
+        
+        # Configure grid with equal weight to all columns and rows
+        grid_frame.columnconfigure(0, weight=1)
+        grid_frame.columnconfigure(1, weight=1)
+        grid_frame.rowconfigure(0, weight=1)
+        grid_frame.rowconfigure(1, weight=1)
+        
+        # Layout options in a 2x2 grid
+        positions = [(0, 0), (0, 1), (1, 0), (1, 1)]  # (row, column)
+        
+        for i, (row, col) in enumerate(positions):
+            var = IntVar()
+            self.pooled_vars.append(var)
+            
+            # Each option gets its own frame with modern card styling
+            option_frame = Frame(
+                grid_frame, 
+                bg="#f8f9fa", 
+                bd=1, 
+                relief="solid",
+                padx=15,
+                pady=15,
+                highlightbackground="#e0e0e0",
+                highlightthickness=1
+            )
+            option_frame.grid(row=row, column=col, padx=8, pady=8, sticky="nsew")
+            self.pooled_frames.append(option_frame)
+            
+            # Option letter with circle background
+            letter_frame = Frame(
+                option_frame,
+                bg="#e3f2fd",
+                width=30,
+                height=30,
+                bd=0
+            )
+            letter_frame.pack(side="left", padx=(0, 10))
+            letter_frame.pack_propagate(False)  # Prevent frame from shrinking
+            
+            option_letter = chr(65 + i)  # A, B, C, D for options
+            letter_label = Label(
+                letter_frame,
+                text=option_letter,
+                font=("Segoe UI", 12, "bold"),
+                bg="#e3f2fd",
+                fg="#1976d2"
+            )
+            letter_label.place(relx=0.5, rely=0.5, anchor="center")
+            
+            # Create checkbutton with improved styling
+            check = Checkbutton(
+                option_frame,
+                text="",
+                variable=var,
+                wraplength=350,
+                bg="#f8f9fa",
+                activebackground="#e3f2fd",
+                padx=5,
+                pady=5,
+                anchor="w",
+                justify="left",
+                font=self.option_font,
+                cursor="hand2"
+            )
+            check.pack(side="left", expand=True, fill="both")
+            self.pooled_checkbuttons.append(check)
+            
+            # Bind hover effects for better interactivity
+            option_frame.bind("<Enter>", lambda e, frame=option_frame, btn=check: 
+                             [frame.config(bg="#e3f2fd"), btn.config(bg="#e3f2fd")])
+            option_frame.bind("<Leave>", lambda e, frame=option_frame, btn=check: 
+                             [frame.config(bg="#f8f9fa"), btn.config(bg="#f8f9fa")])
+            
+            # Bind click on the entire frame to toggle the checkbox
+            option_frame.bind("<Button-1>", lambda e, idx=i: self.toggle_option(idx))
+            
+            # Cards stay hidden until a question needs them
+            option_frame.grid_remove()
 
+    def load_question(self):
         self.result_var.set("")  # Clear previous result
+        self.scheduled_this_visit = False
         self.update_progress_text()
 
-        if self.question_index < len(self.question_dict):
-            question = list(self.question_dict.keys())[self.question_index]
+        if self.question_index >= len(self.question_bank) and self.loading:
+            # The question hasn't been parsed yet; add_questions reloads it
+            self.current_question.set("Loading questions...")
+            self.answer_vars = []
+            self.checkbuttons = []
+            self.option_frames = []
+            for option_frame in self.pooled_frames:
+                option_frame.grid_remove()
+        elif self.question_index < len(self.question_bank):
+            question_id = self.question_index
+            question, options, _ = self.question_bank[question_id]
             self.current_question.set(question)
             self.selected_answers = []
 
-            options = self.question_dict[question][0]  # answer_options
-            
-            # Create a copy of the options and shuffle them for display
-            self.options_mapping = {}  # Maps shuffled index -> original index
-            self.original_options = options.copy() if isinstance(options, list) else options
-            
-            # Create list of tuples (original_index, option_text)
-            indexed_options = list(enumerate(self.original_options))
-            # Shuffle the options
-            random.shuffle(indexed_options)
-            
-            # Create the shuffled options list and the mapping
-            shuffled_options = []
-            for i, (original_idx, option_text) in enumerate(indexed_options):
-                shuffled_options.append(option_text)
-                self.options_mapping[i] = original_idx
-            
-            # Use the shuffled options for display
-            options = shuffled_options
-            
-            self.answer_vars = []
-            self.checkbuttons = []  # Store references to checkbuttons
-            self.option_frames = []  # Store references to option frames
+            # The session's option order for this question; it's the same
+            # every time the question is shown, also after a restart
+            self.option_order = self.engine.option_order(question_id, len(options))
             
-            # Options container with modern styling
-            options_container = Frame(self.options_frame, bg="#f5f7fa")
-            options_container.pack(fill="both", expand=True, padx=15, pady=10)
+            # Only handle up to 4 options
+            option_count = min(len(options), len(self.pooled_frames))
+            self.answer_vars = self.pooled_vars[:option_count]
+            self.checkbuttons = self.pooled_checkbuttons[:option_count]
+            self.option_frames = self.pooled_frames[:option_count]
             
-            # Create a 2x2 grid for options with improved styling
-            grid_frame = Frame(options_container, bg="#f5f7fa")
-            grid_frame.pack(expand=True, fill="both", pady=10)
-            
-            # Configure grid with equal weight to all columns and rows
-            grid_frame.columnconfigure(0, weight=1)
-            grid_frame.columnconfigure(1, weight=1)
-            grid_frame.rowconfigure(0, weight=1)
-            grid_frame.rowconfigure(1, weight=1)
+            # If this question was previously answered, show the correct answers
+            if question_id in self.answered_questions:
+                correct_mask = self.engine.correct_options(question_id)
+            else:
+                correct_mask = 0
             
-            # Layout options in a 2x2 grid
-            positions = [(0, 0), (0, 1), (1, 0), (1, 1)]  # (row, column)
+            # Reuse the pooled cards: new text, cleared selection, default colours
+            for i, option_frame in enumerate(self.pooled_frames):
+                if i >= option_count:
+                    option_frame.grid_remove()
+                    continue
+                
+                self.pooled_vars[i].set(0)
+                
+                # Light blue for correct answers of a previously answered question
+                original_index = order_index(self.option_order, i)
+                bg = "#e1f5fe" if correct_mask >> original_index & 1 else "#f8f9fa"
+                option_frame.config(bg=bg)
+                self.pooled_checkbuttons[i].config(text=options[original_index], bg=bg)
+                option_frame.grid()
             
-            for i, option in enumerate(options):
-                if i < 4:  # Only handle up to 4 options
-                    var = IntVar()
-                    self.answer_vars.append(var)
-                    
-                    # Each option gets its own frame with modern card styling
-                    option_frame = Frame(
-                        grid_frame, 
-                        bg="#f8f9fa", 
-                        bd=1, 
-                        relief="solid",
-                        padx=15,
-                        pady=15,
-                        highlightbackground="#e0e0e0",
-                        highlightthickness=1
-                    )
-                    
-                    row, col = positions[i]
-                    option_frame.grid(row=row, column=col, padx=8, pady=8, sticky="nsew")
-                    self.option_frames.append(option_frame)
-                    
-                    # Option letter with circle background
-                    letter_frame = Frame(
-                        option_frame,
-                        bg="#e3f2fd",
-                        width=30,
-                        height=30,
-                        bd=0
-                    )
-                    letter_frame.pack(side="left", padx=(0, 10))
-                    letter_frame.pack_propagate(False)  # Prevent frame from shrinking
-                    
-                    option_letter = chr(65 + i)  # A, B, C, D for options
-                    letter_label = Label(
-                        letter_frame,
-                        text=option_letter,
-                        font=("Segoe UI", 12, "bold"),
-                        bg="#e3f2fd",
-                        fg="#1976d2"
-                    )
-                    letter_label.place(relx=0.5, rely=0.5, anchor="center")
-                    
-                    # Create checkbutton with improved styling
-                    check = Checkbutton(
-                        option_frame,
-                        text=option,
-                        variable=var,
-                        wraplength=350,
-                        bg="#f8f9fa",
-                        activebackground="#e3f2fd",
-                        padx=5,
-                        pady=5,
-                        anchor="w",
-                        justify="left",
-                        font=self.option_font,
-                        cursor="hand2"
-                    )
-                    check.pack(side="left", expand=True, fill="both")
-                    self.checkbuttons.append(check)
-                    
-                    # Bind hover effects for better interactivity
-                    option_frame.bind("<Enter>", lambda e, frame=option_frame, btn=check: 
-                                     [frame.config(bg="#e3f2fd"), btn.config(bg="#e3f2fd")])
-                    option_frame.bind("<Leave>", lambda e, frame=option_frame, btn=check: 
-                                     [frame.config(bg="#f8f9fa"), btn.config(bg="#f8f9fa")])
-                    
-                    # Bind click on the entire frame to toggle the checkbox
-                    option_frame.bind("<Button-1>", lambda e, idx=i: self.toggle_option(idx))
-                    
-                    # If this question was previously answered, show the selection
-                    if question in self.answered_questions:
-                        correct_answers = self.question_dict[question][1]
-                        if not isinstance(correct_answers, list):
-                            correct_answers = [str(correct_answers)]
-                        else:
-                            correct_answers = [str(ans) for ans in correct_answers]
-                        
-                        # Remove any empty strings
-                        correct_answers = [ans for ans in correct_answers if ans.strip()]
-                        
-                        # If this option was selected and is correct
-                        if var.get() == 1 and options[i] in correct_answers:
-                            option_frame.config(bg="#e8f5e9")  # Light green
-                            check.config(bg="#e8f5e9")
-                        # If this option was selected but is incorrect
-                        elif var.get() == 1 and options[i] not in correct_answers:
-                            option_frame.config(bg="#ffebee")  # Light red
-                            check.config(bg="#ffebee")
-                        # If this option was not selected but is correct
-                        elif var.get() == 0 and options[i] in correct_answers:
-                            option_frame.config(bg="#e1f5fe")  # Light blue
-                            check.config(bg="#e1f5fe")
+            # Time from here to each answer
+            self.response_times.show(question_id)
         else:
+            for option_frame in self.pooled_frames:
+                option_frame.grid_remove()
             self.show_results()
 
     def submit_answer(self):
+        if self.question_index >= len(self.question_bank):
+            return  # Still waiting for the question to load
+        
         user_answers = [var.get() for var in self.answer_vars]
         
         # Map the selected shuffled indices back to original indices
@@ -611,39 +901,23 @@ class QuizWindow:
         for i, selected in enumerate(user_answers):
             if selected == 1:
                 # Get the original index for this shuffled position
-                if hasattr(self, 'options_mapping') and i in self.options_mapping:
-                    original_idx = self.options_mapping[i]
-                    original_selected_indices.append(original_idx)
-                else:
-                    original_selected_indices.append(i)  # Fallback to original index
-        
-        # Get the selected options using original indices
-        current_question = list(self.question_dict.keys())[self.question_index]
-        original_options = self.question_dict[current_question][0]
-        
-        selected_options = [
-            original_options[idx] for idx in original_selected_indices
-            if idx < len(original_options)
-        ]
-        
-        correct_answers = self.question_dict[current_question][1]  # correct_options
-        
-        # Ensure correct_answers is treated as a list of strings
-        if not isinstance(correct_answers, list):
-            correct_answers = [str(correct_answers)]
-        else:
-            correct_answers = [str(ans) for ans in correct_answers]
-            
-        # Remove any empty strings
-        correct_answers = [ans for ans in correct_answers if ans.strip()]
+                original_selected_indices.append(order_index(self.option_order, i))
+        
+        # Grade the selection of original indices
+        question_id = self.question_index
+        selection = selection_mask(original_selected_indices)
+        is_correct, newly_incorrect = self.engine.submit(question_id, selection)
+        self.record_response(question_id, is_correct)
+        if not self.scheduled_this_visit:
+            self.scheduled_this_visit = True
+            self.schedule_review(question_id, is_correct)
 
         # Reset styling for all option frames and checkbuttons
         for i, frame in enumerate(self.option_frames):
             frame.config(bg="#f8f9fa")
             self.checkbuttons[i].config(bg="#f8f9fa")
 
-        if set(selected_options) == set(correct_answers):
-            self.score += 1
+        if is_correct:
             self.update_score_display()
             self.result_var.set("✓ Correct!")
             self.result_label.config(fg="#4caf50")  # Green for correct
@@ -659,75 +933,46 @@ class QuizWindow:
                 if val == 1:
                     self.option_frames[i].config(bg="#e8f5e9")  # Light green background
                     self.checkbuttons[i].config(bg="#e8f5e9")
-                    
-            # If this question was previously marked incorrect, remove it from the list
-            if current_question in self.incorrect_questions:
-                self.incorrect_questions.remove(current_question)
         else:
-            # Add to incorrect questions only if not already there
-            if current_question not in self.incorrect_questions:
-                self.incorrect_questions.append(current_question)
-                
-                # Save incorrect question to file
-                self.save_incorrect_question(current_question)
+            # Save incorrect question to file the first time it's missed
+            if newly_incorrect:
+                self.save_incorrect_question(question_id)
                 
             self.result_var.set("✗ Incorrect! Try again or press Next to continue.")
             self.result_label.config(fg="#f44336")  # Red for incorrect
             
-            # Colorize feedback with improved colors
-            options = self.question_dict[current_question][0]
+            # Colorize feedback with improved colors; displayed cards are
+            # shuffled, so look each one up by its original option index
+            correct_mask = self.engine.correct_options(question_id)
             for i, val in enumerate(user_answers):
-                if val == 1 and options[i] not in correct_answers:
+                is_correct_option = correct_mask >> order_index(self.option_order, i) & 1
+                if val == 1 and not is_correct_option:
                     self.option_frames[i].config(bg="#ffebee")  # Light red for incorrect selection
                     self.checkbuttons[i].config(bg="#ffebee")
-                elif val == 1 and options[i] in correct_answers:
+                elif val == 1 and is_correct_option:
                     self.option_frames[i].config(bg="#e8f5e9")  # Light green for correct selection
                     self.checkbuttons[i].config(bg="#e8f5e9")
-                elif val == 0 and options[i] in correct_answers:
+                elif val == 0 and is_correct_option:
                     # Light blue outline for missed correct answers
                     self.option_frames[i].config(bg="#e1f5fe")
                     self.checkbuttons[i].config(bg="#e1f5fe")
         
-        # Add the current question to answered questions set
-        self.answered_questions.add(current_question)
+        self.autosave_event(self.checkpoint.record_answer, question_id, selection, is_correct)
 
-    def save_incorrect_question(self, question):
+    def save_incorrect_question(self, question_id):
         """Save an incorrectly answered question to a file"""
-        try:
-            # Create the options text in the right format
-            options = self.question_dict[question][0]
-            correct_answers = self.question_dict[question][1]
-            
-            options_text = ""
-            for i, option in enumerate(options):
-                option_letter = chr(65 + i)  # A, B, C, D
-                options_text += f"{option_letter}: {option}\n"
-            
-            # Format the question with the same convention as data.txt
-            formatted_question = f"{question}\n{options_text}&&&&\n"
-            for ans in correct_answers:
-                formatted_question += f"{ans}\n"
-            
-            # Append %%%% at the end
-            formatted_question += "%%%%\n"
-            
-            # Check if file exists to determine if we need to add a new line
-            if os.path.exists(self.incorrect_questions_path):
-                # Check if this question already exists in the file
-                with open(self.incorrect_questions_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if question in content:
-                        return  # Don't add duplicate questions
-                
-                # Append to the file
-                with open(self.incorrect_questions_path, 'a', encoding='utf-8') as f:
-                    f.write(formatted_question)
-            else:
-                # Create the file and write to it
-                with open(self.incorrect_questions_path, 'w', encoding='utf-8') as f:
-                    f.write(formatted_question)
-        except Exception as e:
-            print(f"Error saving incorrect question: {str(e)}")
+        if self.incorrect_store is None:
+            return
+        if self.loading:
+            # The store's index is rebuilt once the bank has loaded
+            self.deferred_incorrect.append(question_id)
+            return
+        
+        # The store skips questions that are already in the file
+        self.writer.submit(
+            self.incorrect_store.add, question_id,
+            on_error=lambda e: print(f"Error saving incorrect question: {str(e)}")
+        )
 
     def review_incorrect_questions(self):
         """Load and review incorrectly answered questions"""
@@ -736,125 +981,510 @@ class QuizWindow:
             messagebox.showinfo("No Incorrect Questions", "You haven't answered any questions incorrectly yet.")
             return
         
-        try:
-            # Load the incorrect questions from the file
-            with open(self.incorrect_questions_path, 'r', encoding='utf-8') as f:
-                data = f.read()
-            
-            # Parse the questions
-            questions = data.split(r"%%%%")
-            review_dict = {}
-            
-            for question in questions:
-                if not question.strip():
-                    continue
-                    
-                # Split on the first "A: " - same approach as in the main parsing
-                parts = question.strip().split(r"A: ", 1)
-                if len(parts) < 2:
-                    continue
-                
-                # Everything before "A: " is the question text
-                cur_ques = parts[0].strip()
-                
-                # Join all lines for regex processing
-                question_text = "A: " + parts[1]
-                
-                # Find all options using regex
-                option_pattern = r'([A-D]):\s*(.*?)(?=\s*[A-D]:\s*|\s*&&&&|\Z)'
-                options_matches = re.findall(option_pattern, question_text, re.DOTALL)
-                
-                # Extract options
-                ans_opts = [match[1].strip() for match in options_matches]
-                
-                # Find the correct answer(s)
-                answer_pattern = r'&&&&\s*(.*?)(?=\Z)'
-                answer_match = re.search(answer_pattern, question_text, re.DOTALL)
-                
-                if answer_match:
-                    # Get all answers (might be multiple lines)
-                    answers_text = answer_match.group(1)
-                    # Split by lines and clean
-                    answers_section = [ans.strip() for ans in answers_text.splitlines() if ans.strip()]
-                    
-                    # If we have options and answers, add to the dictionary
-                    if ans_opts and answers_section:
-                        review_dict[cur_ques] = (ans_opts, answers_section)
-            
-            if not review_dict:
-                messagebox.showinfo("No Questions", "No valid questions found in the incorrect questions file.")
-                return
-            
-            # Open a new window with the review quiz
-            self.open_review_window(review_dict)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not load incorrect questions: {str(e)}")
-            # Print detailed error info for debugging
-            import traceback
-            traceback.print_exc()
+        # Load the incorrect questions on the writer thread, after any pending
+        # writes to the file have landed
+        self.writer.submit(
+            load_question_bank, self.incorrect_questions_path,
+            on_done=self.show_review_bank,
+            on_error=self.show_review_error
+        )
+
+    def show_review_bank(self, review_bank):
+        if not len(review_bank):
+            messagebox.showinfo("No Questions", "No valid questions found in the incorrect questions file.")
+            return
+        
+        # Open a new window with the review quiz
+        self.open_review_window(review_bank)
+
+    def show_review_error(self, error):
+        messagebox.showerror("Error", f"Could not load incorrect questions: {str(error)}")
+        # Print detailed error info for debugging
+        import traceback
+        traceback.print_exception(error)
 
-    def open_review_window(self, review_dict):
-        """Open a new window to review incorrect questions"""
+    def open_review_window(self, review_bank, window_class=None, **options):
+        """Open a new window to review incorrect questions, or to run an exam form
+
+        `options` are passed on to the window class.
+        """
+        window_class = window_class or ReviewQuizWindow
         review_window = Toplevel(self.master)
-        review_window.title("Review Incorrect Questions")
+        review_window.title(window_class.window_title)
         review_window.geometry("1000x750")
         review_window.configure(bg="#f5f7fa")
         
         # Create a simpler review quiz that won't affect the main window
-        review_quiz = ReviewQuizWindow(review_window, review_dict)
+        review_quiz = window_class(review_window, review_bank, self.bank_entry, **options)
         
         # Don't wait for the window - this prevents the main window from being affected
         review_window.grab_set()
         
         # Override the close button to only close this window
-        review_window.protocol("WM_DELETE_WINDOW", review_window.destroy)
+        review_window.protocol("WM_DELETE_WINDOW", review_quiz.close_review)
+
+    def new_exam_form(self):
+        """Draw an exam form sharing no question with earlier forms and run it"""
+        if self.loading:
+            messagebox.showinfo("Please Wait", "The question bank is still loading.")
+            return
+        if not len(self.question_bank):
+            return
+        size = simpledialog.askinteger(
+            "New Exam Form", "Number of questions:", parent=self.master,
+            initialvalue=min(EXAM_FORM_SIZE, len(self.question_bank)),
+            minvalue=1, maxvalue=len(self.question_bank)
+        )
+        if size is None:
+            return
+        
+        if self.exam_assembler is None:
+            # Stratify by how often each question was missed so far
+            strata = difficulty_strata(len(self.question_bank), self.response_times.question_stats())
+            self.exam_assembler = ExamAssembler(len(self.question_bank), strata)
+        try:
+            form = self.exam_assembler.form(size, EXAM_QUOTAS)
+        except ValueError:
+            left = sum(self.exam_assembler.available().values())
+            messagebox.showinfo(
+                "Not Enough Questions",
+                f"Earlier forms have used most of the bank; {left} questions are left for new forms."
+            )
+            return
+        
+        form_bank = QuestionBank.from_records(self.question_bank[question_id] for question_id in form)
+        # Misses are saved by this window, under their IDs in this bank
+        self.open_review_window(form_bank, ExamQuizWindow, question_ids=form,
+                                record_miss=self.save_incorrect_question)
 
     def next_question(self):
-        self.question_index += 1
+        if self.due_mode.get():
+            self.next_due_question()
+            return
+        if self.loading and self.question_index >= len(self.question_bank):
+            return  # Wait for the current question to load first
+        self.engine.next_question()
+        self.autosave_event(self.checkpoint.record_position, self.question_index, key="position")
         self.load_question()
 
     def prev_question(self):
         """Navigate to the previous question"""
+        if self.due_mode.get():
+            # Go back through the questions visited in Due Now mode
+            if self.due_history:
+                self.go_to_question(self.due_history.pop())
+            return
         if self.question_index > 0:
-            self.question_index -= 1
+            self.engine.prev_question()
+            self.autosave_event(self.checkpoint.record_position, self.question_index, key="position")
             self.load_question()
 
+    def load_schedule(self, schedule_log):
+        """Return the cards saved in a schedule log; review windows keep none"""
+        if not self.autosave:
+            return []
+        try:
+            return schedule_log.load()
+        except OSError as e:
+            print(f"Could not load review schedule: {str(e)}")
+            return []
+
+    def schedule_review(self, question_id, correct):
+        """Reschedule a question after its answer and log the updated card"""
+        card = self.scheduler.review(question_id, correct)
+        if not self.autosave:
+            return
+        on_error = lambda e: print(f"Error saving review schedule: {str(e)}")
+        self.writer.submit(self.schedule_log.append, card.pack(), on_error=on_error)
+        if self.schedule_log.needs_compaction(len(self.scheduler)):
+            packed_cards = [card.pack() for card in self.scheduler.cards.values()]
+            self.writer.submit(self.schedule_log.compact, packed_cards, key="schedule", on_error=on_error)
+
+    def load_response_times(self, response_log):
+        """Return the response times saved in a log; review windows keep none"""
+        if self.autosave:
+            try:
+                return response_log.load()
+            except OSError as e:
+                print(f"Could not load response times: {str(e)}")
+        return ResponseTimes()
+
+    def record_response(self, question_id, correct):
+        """Record how long an answer took; the log is written in chunks"""
+        self.response_times.record(question_id, correct)
+        if self.response_times.needs_flush():
+            self.flush_response_times()
+
+    def flush_response_times(self):
+        """Hand the response times not yet logged to the writer"""
+        chunk = self.response_times.take_chunk()
+        if chunk is not None and self.autosave:
+            self.writer.submit(
+                self.response_log.append, chunk,
+                on_error=lambda e: print(f"Error saving response times: {str(e)}")
+            )
+
+    def toggle_due_mode(self, enabled=None):
+        """Switch Due Now mode on or off; called with the menu's new state by default"""
+        if enabled is None:
+            enabled = self.due_mode.get()
+        if enabled and self.loading:
+            messagebox.showinfo("Please Wait", "The question bank is still loading.")
+            enabled = False
+        self.due_mode.set(enabled)
+        self.due_history = []
+        if enabled:
+            self.next_due_question()
+        else:
+            self.update_progress_text()
+
+    def next_due_question(self):
+        """Go to the most overdue question, or else the next one never answered"""
+        question_id = self.scheduler.next_due(exclude=self.question_index, question_count=len(self.question_bank))
+        if question_id is None:
+            start = self.new_question_cursor
+            question_id = self.scheduler.next_new(len(self.question_bank), start)
+            if question_id == self.question_index:
+                question_id = self.scheduler.next_new(len(self.question_bank), question_id + 1)
+            if question_id is None:
+                self.update_progress_text()
+                messagebox.showinfo("Nothing Due", "No questions are due right now. Come back later!")
+                return
+            self.new_question_cursor = question_id
+        
+        if self.question_index < len(self.question_bank):
+            self.due_history.append(self.question_index)
+        self.go_to_question(question_id)
+
+    def go_to_question(self, question_index):
+        """Jump straight to a question"""
+        self.engine.go_to(question_index)
+        self.result_var.set("")
+        self.autosave_event(self.checkpoint.record_position, self.question_index, key="position")
+        self.load_question()
+
+    def shortcut(self, action, *args):
+        """Return a key handler for `action` that ignores keys typed into the search box"""
+        def handler(event):
+            if event.widget is self.search_entry:
+                return
+            action(*args)
+        return handler
+
+    def focus_search(self):
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, "end")
+
+    def search_source_path(self):
+        """Return the bank file whose cached search index can be used"""
+        return self.bank_entry.source_path
+
+    def build_search_index(self):
+        """Load or build the current bank's search index on the indexer thread"""
+        self.search_index = None
+        self.search_query = ""
+        question_bank = self.question_bank
+        
+        def index_ready(search_index):
+            # Drop an index built for a bank that's no longer shown
+            if question_bank is self.question_bank:
+                self.search_index = search_index
+        
+        # Only the index of the bank shown last is worth building
+        self.indexer.submit(
+            load_search_index, question_bank, self.search_source_path(), key="index",
+            on_done=index_ready,
+            on_error=lambda e: print(f"Could not build search index: {str(e)}")
+        )
+
+    def on_search_return(self, event):
+        self.search_questions()
+        return "break"  # Don't also submit the current answer
+
+    def search_questions(self):
+        """Jump to the next question matching the search box"""
+        query = self.search_var.get().strip()
+        if not query:
+            self.search_status.set("")
+            return
+        if self.search_index is None:
+            self.search_status.set("Search index is still loading...")
+            return
+        
+        if query != self.search_query:
+            self.search_query = query
+            self.search_hits = self.search_index.search(query, limit=SEARCH_LIMIT)
+            self.search_position = -1
+        if not self.search_hits:
+            self.search_status.set("No matches")
+            return
+        
+        # Repeated searches step through the hits, wrapping around
+        self.search_position = (self.search_position + 1) % len(self.search_hits)
+        more = "+" if len(self.search_hits) >= SEARCH_LIMIT else ""
+        self.search_status.set(f"{self.search_position + 1} of {len(self.search_hits)}{more}")
+        self.go_to_question(self.search_hits[self.search_position])
+
+    def checkpoint_state(self):
+        """Return a copy of the quiz state that the writer thread can save"""
+        return self.engine.state()
+
+    def autosave_event(self, record, *args, key=None):
+        """Queue one event for the checkpoint journal, compacting it when it grows"""
+        if not self.autosave:
+            return
+        on_error = lambda e: print(f"Error autosaving progress: {str(e)}")
+        self.writer.submit(record, *args, key=key, on_error=on_error)
+        if self.restore_pending:
+            # The engine doesn't hold the saved progress yet; a snapshot of
+            # it would throw that progress away
+            self.events_since_restore += 1
+        elif self.checkpoint.needs_compaction():
+            self.writer.submit(self.checkpoint.snapshot, self.checkpoint_state(), key="snapshot", on_error=on_error)
+
+    def save_initial_snapshot(self):
+        """Snapshot a session that has no checkpoint yet"""
+        self.writer.submit(
+            self.checkpoint.snapshot, self.checkpoint_state(), key="snapshot",
+            on_error=lambda e: print(f"Error autosaving progress: {str(e)}")
+        )
+
+    def refuse_while_restoring(self):
+        """Tell the user to wait if saved progress hasn't been restored yet"""
+        if self.restore_pending:
+            messagebox.showinfo("Please Wait", "Your saved progress is restored once the question bank has loaded.")
+        return self.restore_pending
+
     def save_checkpoint(self):
         """Save the current progress to a file"""
-        checkpoint_data = {
-            'question_index': self.question_index,
-            'score': self.score,
-            'incorrect_questions': self.incorrect_questions,
-            'answered_questions': list(self.answered_questions)
-        }
-        try:
-            with open(self.checkpoint_path, 'wb') as f:
-                pickle.dump(checkpoint_data, f)
-            messagebox.showinfo("Checkpoint Saved", "Your progress has been saved!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not save checkpoint: {str(e)}")
+        if not self.autosave:
+            return  # the checkpoint belongs to the main window's bank
+        if self.refuse_while_restoring():
+            return
+        self.writer.submit(
+            self.checkpoint.snapshot, self.checkpoint_state(),
+            on_done=lambda _: messagebox.showinfo("Checkpoint Saved", "Your progress has been saved!"),
+            on_error=lambda e: messagebox.showerror("Error", f"Could not save checkpoint: {str(e)}")
+        )
+    
+    def restore_checkpoint(self, state=None):
+        """Replace the quiz state with the one saved in the checkpoint"""
+        if state is None:
+            state = self.checkpoint.load(self.resolve_question_ids)
+        self.engine.restore(state)
     
     def load_checkpoint(self):
         """Load progress from a saved checkpoint file"""
-        if not os.path.exists(self.checkpoint_path):
+        if not self.autosave:
+            return
+        if self.refuse_while_restoring():
+            return
+        if self.loading:
+            # Saved IDs past the questions loaded so far would be dropped
+            messagebox.showinfo("Please Wait", "The question bank is still loading.")
+            return
+        if not self.checkpoint.exists():
             messagebox.showinfo("No Checkpoint", "No saved progress found.")
             return
-            
-        try:
-            with open(self.checkpoint_path, 'rb') as f:
-                checkpoint_data = pickle.load(f)
-                
-            self.question_index = checkpoint_data.get('question_index', 0)
-            self.score = checkpoint_data.get('score', 0)
-            self.incorrect_questions = checkpoint_data.get('incorrect_questions', [])
-            self.answered_questions = set(checkpoint_data.get('answered_questions', []))
-            
-            self.update_score_display()
+        
+        # Read on the writer thread so it sees every queued write
+        self.writer.submit(
+            self.checkpoint.load, self.resolve_question_ids,
+            on_done=self.show_loaded_checkpoint,
+            on_error=lambda e: messagebox.showerror("Error", f"Could not load checkpoint: {str(e)}")
+        )
+    
+    def show_loaded_checkpoint(self, state):
+        self.restore_checkpoint(state)
+        self.update_score_display()
+        self.load_question()
+        messagebox.showinfo("Checkpoint Loaded", "Your saved progress has been loaded!")
+    
+    def add_questions(self, records):
+        """Add a batch of questions streamed in by a BankLoader"""
+        waiting = self.question_index >= len(self.question_bank)
+        for question, options, answers in records:
+            self.question_bank.add(question, options, answers)
+        
+        self.total_questions = len(self.question_bank)
+        self.update_progress_text()
+        self.update_score_display()
+        if waiting and self.question_index < len(self.question_bank):
+            self.load_question()
+    
+    def finish_loading(self, question_count=None):
+        """Called once a BankLoader has streamed in the whole bank"""
+        self.loading = False
+        self.total_questions = len(self.question_bank)
+        
+        if self.restore_pending:
+            self.read_pending_checkpoint()
+        elif self.question_index >= len(self.question_bank):
             self.load_question()
-            messagebox.showinfo("Checkpoint Loaded", "Your saved progress has been loaded!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not load checkpoint: {str(e)}")
+        else:
+            self.update_progress_text()
+        
+        if self.incorrect_store is not None:
+            self.writer.submit(self.incorrect_store.rebuild_index)
+        for question_id in self.deferred_incorrect:
+            self.save_incorrect_question(question_id)
+        self.deferred_incorrect = []
+        self.build_search_index()
+    
+    def read_pending_checkpoint(self):
+        """Read the checkpoint on the writer thread, after the answers journaled while loading"""
+        self.events_since_restore = 0
+        self.writer.submit(
+            self.checkpoint.load, self.resolve_question_ids,
+            on_done=self.finish_restore,
+            on_error=self.restore_failed
+        )
+
+    def finish_restore(self, state):
+        if self.events_since_restore:
+            # Answers journaled after the read began aren't in `state`
+            self.read_pending_checkpoint()
+            return
+        self.restore_pending = False
+        self.restore_checkpoint(state)
+        self.update_score_display()
+        self.load_question()
+
+    def restore_failed(self, error):
+        self.restore_pending = False
+        print(f"Could not resume saved progress: {str(error)}")
+        self.update_score_display()
+        self.load_question()
+
+    def loading_failed(self, error):
+        """Called when a BankLoader stops on an error; keeps what was loaded"""
+        messagebox.showerror("Error", f"Could not load all questions: {str(error)}")
+        self.finish_loading()
+    
+    def on_close(self):
+        """Flush pending writes before the window goes away"""
+        self.flush_response_times()
+        self.indexer.close(wait=False)
+        self.writer.close()
+        self.checkpoint.close()
+        self.schedule_log.close()
+        self.response_log.close()
+        if self.profiler is not None:
+            self.save_profile()
+        self.master.destroy()
+    
+    def build_profile_overlay(self):
+        """Show the handlers' rolling p50/p99 in the bottom right corner"""
+        self.profile_overlay = Label(
+            self.master,
+            font=("Consolas", 9),
+            bg="#263238",
+            fg="#c5e1a5",
+            justify="left",
+            padx=6,
+            pady=4
+        )
+        self.profile_overlay.place(relx=1.0, rely=1.0, x=-8, y=-8, anchor="se")
+        self.update_profile_overlay()
+    
+    def update_profile_overlay(self):
+        try:
+            self.profile_overlay.config(text=self.profiler.overlay_text())
+            self.master.after(PROFILE_OVERLAY_MS, self.update_profile_overlay)
+        except TclError:
+            pass  # the window has been closed
+    
+    def save_profile(self):
+        """Write the session's Chrome trace, and its cProfile stats if cProfile is running"""
+        try:
+            self.profiler.write_chrome_trace(TRACE_PATH)
+            saved = [TRACE_PATH]
+            if self.profiler.dump_cprofile(CPROFILE_PATH):
+                saved.append(CPROFILE_PATH)
+            print(f"Profile saved to {', '.join(saved)}")
+        except OSError as e:
+            print(f"Could not save profile: {str(e)}")
+    
+    def resolve_question_ids(self, entries):
+        """Map checkpoint entries to question IDs of the current bank"""
+        return resolve_question_ids(self.question_bank, entries)
+    
+    def open_bank(self, name):
+        """Switch to another bank of the catalogue, loading it if needed"""
+        if name == self.bank_entry.name:
+            return
+        if self.loading:
+            messagebox.showinfo("Please Wait", "The current question bank is still loading.")
+            self.bank_var.set(self.bank_entry.name)
+            return
+        
+        # Close the current journal once its queued events are written; the
+        # new bank, its checkpoint and its incorrect store are read after them
+        self.flush_response_times()
+        self.writer.submit(self.checkpoint.close)
+        self.writer.submit(self.schedule_log.close)
+        self.writer.submit(self.response_log.close)
+        self.writer.submit(
+            self.prepare_bank, name,
+            on_done=self.show_bank,
+            on_error=lambda e: self.show_bank_error(name, e)
+        )
+    
+    def prepare_bank(self, name):
+        """Load a catalogue bank and its progress; runs on the writer thread"""
+        entry = self.catalogue.entry(name)
+        question_bank = self.catalogue.open(name)
+        incorrect_store = IncorrectQuestionStore(entry.incorrect_questions_path, question_bank)
+        incorrect_store.rebuild_index()
+        checkpoint = CheckpointJournal(entry.checkpoint_path)
+        state = None
+        if self.autosave and checkpoint.exists():
+            try:
+                state = checkpoint.load(lambda entries: resolve_question_ids(question_bank, entries))
+            except Exception as e:
+                print(f"Could not resume saved progress: {str(e)}")
+        schedule_log = ScheduleLog(entry.checkpoint_path + SCHEDULE_SUFFIX)
+        scheduler = ReviewScheduler(self.load_schedule(schedule_log))
+        response_log = ResponseLog(entry.checkpoint_path + RESPONSE_TIMES_SUFFIX)
+        response_times = self.load_response_times(response_log)
+        return (entry, question_bank, incorrect_store, checkpoint, state,
+                schedule_log, scheduler, response_log, response_times)
+    
+    def show_bank(self, prepared):
+        """Make a bank loaded by prepare_bank the current one"""
+        (entry, question_bank, incorrect_store, checkpoint, state,
+         schedule_log, scheduler, response_log, response_times) = prepared
+        self.bank_entry = entry
+        self.bank_var.set(entry.name)
+        self.checkpoint_path = entry.checkpoint_path
+        self.incorrect_questions_path = entry.incorrect_questions_path
+        self.question_bank = question_bank
+        self.incorrect_store = incorrect_store
+        self.checkpoint = checkpoint
+        self.schedule_log = schedule_log
+        self.scheduler = scheduler
+        self.response_log = response_log
+        self.response_times = response_times
+        self.due_history = []
+        self.new_question_cursor = 0
+        self.exam_assembler = None
+        self.engine = QuizEngine(question_bank)
+        if state is not None:
+            self.engine.restore(state)
+        elif self.autosave and not checkpoint.exists():
+            self.save_initial_snapshot()
+        self.total_questions = len(question_bank)
+        
+        self.master.title(f"Quiz Master - {entry.name}")
+        self.result_var.set("")
+        self.search_status.set("")
+        self.update_score_display()
+        self.load_question()
+        self.build_search_index()
+    
+    def show_bank_error(self, name, error):
+        self.bank_var.set(self.bank_entry.name)
+        messagebox.showerror("Error", f"Could not open question bank {name}: {str(error)}")
     
     def show_results(self):
         # Create a nicer results window with modern styling
@@ -943,70 +1573,66 @@ class QuizWindow:
             )
             incorrect_header.pack(anchor="w", pady=10)
             
-            # Create a canvas with scrollbar for the review questions
-            canvas = Canvas(incorrect_frame, bg="#ffffff", highlightthickness=0)
-            scrollbar = ttk.Scrollbar(incorrect_frame, orient="vertical", command=canvas.yview)
+            # Only the rows on screen get widgets, so thousands of misses open at once
+            incorrect_questions = list(self.incorrect_questions)
             
-            review_frame = Frame(canvas, bg="#ffffff")
-            
-            canvas.configure(yscrollcommand=scrollbar.set)
-            scrollbar.pack(side="right", fill="y")
-            canvas.pack(side="left", fill="both", expand=True)
-            
-            canvas.create_window((0, 0), window=review_frame, anchor="nw", tags="review_frame")
-            review_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-            
-            for i, question in enumerate(self.incorrect_questions):
+            def make_row(parent):
                 question_card = Frame(
-                    review_frame,
+                    parent,
                     bg="#ffffff",
                     padx=15,
-                    pady=10,
+                    pady=8,
                     bd=1,
                     relief="solid",
                     highlightbackground="#e0e0e0",
                     highlightthickness=1
                 )
-                question_card.pack(fill="x", pady=5, padx=5)
                 
-                q_number = Label(
+                question_card.number = Label(
                     question_card,
-                    text=f"{i+1}.",
                     font=("Segoe UI", 11, "bold"),
                     bg="#ffffff",
                     fg="#f44336",
                     anchor="nw"
                 )
-                q_number.pack(side="left", padx=(0, 5), anchor="n")
+                question_card.number.pack(side="left", padx=(0, 5), anchor="n")
                 
-                q_text = Label(
+                question_card.question = Label(
                     question_card,
-                    text=question,
                     wraplength=550,
                     justify="left",
                     bg="#ffffff",
                     anchor="w",
                     font=("Segoe UI", 11)
                 )
-                q_text.pack(side="left", fill="x", expand=True, anchor="w")
-                
-                correct_answers = self.question_dict[question][1]
-                if not isinstance(correct_answers, list):
-                    correct_answers = [correct_answers]
+                question_card.question.pack(anchor="w")
                 
-                answers_text = ", ".join(correct_answers)
-                
-                a_label = Label(
+                question_card.answers = Label(
                     question_card,
-                    text=f"Correct Answer(s): {answers_text}",
-                    wraplength=550,
                     justify="left",
                     bg="#ffffff",
                     fg="#4caf50",
                     anchor="w",
                     font=("Segoe UI", 10)
                 )
-                a_label.pack(anchor="w", pady=3, padx=(20, 0))
+                question_card.answers.pack(anchor="w", pady=3)
+                return question_card
+            
+            def fill_row(question_card, index):
+                question, _, correct_answers = self.question_bank[incorrect_questions[index]]
+                if not isinstance(correct_answers, (list, tuple)):
+                    correct_answers = [correct_answers]
+                answers_text = f"Correct Answer(s): {', '.join(correct_answers)}"
+                
+                # Rows have a fixed height: two lines of question, one of answers
+                question_card.number.config(text=f"{index + 1}.")
+                question_card.question.config(text=elide(question, RESULT_QUESTION_CHARS))
+                question_card.answers.config(text=elide(answers_text, RESULT_ANSWER_CHARS))
+            
+            review_list = VirtualList(
+                incorrect_frame, len(incorrect_questions), make_row, fill_row, RESULT_ROW_HEIGHT
+            )
+            review_list.pack(fill="both", expand=True)
         else:
             perfect_frame = Frame(results_window, bg="#ffffff", padx=20, pady=20)
             perfect_frame.pack(fill="x", pady=20)
@@ -1054,7 +1680,7 @@ class QuizWindow:
         close_button = Button(
             buttons_frame,
             text="Finish",
-            command=lambda: [results_window.destroy(), self.master.quit()],
+            command=lambda: [results_window.destroy(), self.on_close()],
             bg="#e91e63",
             fg="white",
             font=("Segoe UI", 10, "bold"),
@@ -1089,30 +1715,36 @@ class QuizWindow:
     
     def restart_quiz(self):
         """Restart the quiz from the beginning"""
-        self.question_index = 0
-        self.score = 0
-        self.incorrect_questions = []
-        self.answered_questions = set()
+        self.engine.reset()
+        self.autosave_event(self.checkpoint.record_reset)
         self.update_score_display()
         self.load_question()
 
 class ReviewQuizWindow(QuizWindow):
     """A specialized version of QuizWindow for reviewing incorrect questions"""
     
-    def __init__(self, master, question_dict):
+    # Review sessions use their own bank, so they must not touch the checkpoint
+    autosave = False
+    
+    window_title = "Review Incorrect Questions"
+    mode_text = "REVIEW MODE"
+    completed_text = "Review Completed!"
+    restart_text = "Restart Review"
+    
+    def __init__(self, master, question_bank, bank_entry=None):
         # Initialize with the parent class
-        super().__init__(master, question_dict)
+        super().__init__(master, question_bank, bank_entry=bank_entry)
         
         # Override the close behavior to only close this window
         self.master.protocol("WM_DELETE_WINDOW", self.close_review)
         
         # Update title and add a note
-        self.master.title("Review Incorrect Questions")
+        self.master.title(self.window_title)
         
         # Add a review mode indicator
         self.review_label = Label(
             self.header_frame,
-            text="REVIEW MODE",
+            text=self.mode_text,
             font=("Segoe UI", 10, "bold"),
             bg="#e8eef7",
             fg="#f44336"
@@ -1121,7 +1753,12 @@ class ReviewQuizWindow(QuizWindow):
     
     def close_review(self):
         """Custom close method that only closes this window"""
-        self.master.destroy()
+        self.on_close()
+    
+    def search_source_path(self):
+        # The review bank comes from the incorrect questions file, which has
+        # no cache; its index is built in memory
+        return None
     
     def show_results(self):
         """Override to only close the review window, not the main app"""
@@ -1144,7 +1781,7 @@ class ReviewQuizWindow(QuizWindow):
         
         header_label = Label(
             header_frame,
-            text="Review Completed!",
+            text=self.completed_text,
             font=("Segoe UI", 18, "bold"),
             fg="white",
             bg="#2196f3"
@@ -1199,7 +1836,7 @@ class ReviewQuizWindow(QuizWindow):
         close_button = Button(
             buttons_frame,
             text="Close",
-            command=lambda: [results_window.destroy(), self.master.destroy()],
+            command=lambda: [results_window.destroy(), self.close_review()],
             bg="#e91e63",
             fg="white",
             font=("Segoe UI", 10, "bold"),
@@ -1212,7 +1849,7 @@ class ReviewQuizWindow(QuizWindow):
         # Restart review button
         restart_button = Button(
             buttons_frame,
-            text="Restart Review",
+            text=self.restart_text,
             command=lambda: [results_window.destroy(), self.restart_quiz()],
             bg="#4caf50",
             fg="white",
@@ -1228,62 +1865,65 @@ class ReviewQuizWindow(QuizWindow):
         results_window.grab_set()
         self.master.wait_window(results_window)
 
-if __name__ == "__main__":
-    with open(r"data.txt", "r", encoding='utf-8') as f:
-        data = f.read()
-    
-    # Split into individual questions
-    questions = data.split(r"%%%%")
-    question_dict = {}
+
+class ExamQuizWindow(ReviewQuizWindow):
+    """Runs one exam form drawn by new_exam_form"""
     
-    for question in questions:
-        if not question.strip():
-            continue
-            
-        # Extract the question (first line)
-        lines = question.split(r"A: ", 1)
-        if len(lines) < 2:
-            continue
-        
-        cur_ques = lines[0].strip()
-        
-        # Join all lines for regex processing
-        question_text = "A: " + lines[1]
-        
-        # Find all options using regex
-        option_pattern = r'([A-D]):\s*(.*?)(?=\s*[A-D]:\s*|\s*&&&&|\Z)'
-        options_matches = re.findall(option_pattern, question_text, re.DOTALL)
-        
-        # Extract options
-        ans_opts = [match[1].strip() for match in options_matches]
-        
-        # Find the correct answer(s)
-        answer_pattern = r'&&&&\s*(.*?)(?=\Z)'
-        answer_match = re.search(answer_pattern, question_text, re.DOTALL)
-        
-        if answer_match:
-            # Get all answers (might be multiple lines)
-            answers_text = answer_match.group(1)
-            # Split by lines and clean
-            cor_ans = [ans.strip() for ans in answers_text.splitlines() if ans.strip()]
-        else:
-            # If no match found, raise exception
-            raise Exception(f"No correct answer found for question: {cur_ques}")
-        
-        # Store in dictionary
-        question_dict[cur_ques] = (ans_opts, cor_ans)
+    window_title = "Exam Form"
+    mode_text = "EXAM MODE"
+    completed_text = "Exam Completed!"
+    restart_text = "Retake Exam"
     
-    # Debug: Print first few questions
-    i = 0
-    for key, value in question_dict.items():
-        print(f"Question: {key}")
-        print(f"Options: {value[0]}")
-        print(f"Correct answers: {value[1]}")
-        print("-" * 50)
-        i += 1
-        if i == 2:
-            break
+    def __init__(self, master, question_bank, bank_entry=None, question_ids=(), record_miss=None):
+        # Form position -> question ID in the main bank
+        self.question_ids = question_ids
+        self.record_miss = record_miss
+        super().__init__(master, question_bank, bank_entry=bank_entry)
     
+    def save_incorrect_question(self, question_id):
+        """Save a missed question through the main window's incorrect questions file"""
+        if self.record_miss is not None:
+            self.record_miss(self.question_ids[question_id])
+
+
+if __name__ == "__main__":
+    # data.txt plus any banks in banks/; the others load when first opened
+    catalogue = BankCatalogue.discover()
+    bank_entry = catalogue.entry(DEFAULT_BANK_NAME)
+    source_path = bank_entry.source_path
+    start_time = time.perf_counter()
     root = Tk()
-    quiz_app = QuizWindow(root, question_dict)
+    
+    question_bank = None
+    if is_cache_current(cache_path_for(source_path), source_path):
+        # The header can be current while the rest of the cache is damaged
+        try:
+            question_bank = MappedQuestionBank(cache_path_for(source_path))
+        except (OSError, CacheError) as e:
+            print(f"Could not read question bank cache, parsing instead: {str(e)}")
+    
+    if question_bank is not None:
+        catalogue.remember(bank_entry.name, question_bank)
+        quiz_app = QuizWindow(root, question_bank, bank_entry=bank_entry, catalogue=catalogue)
+        print(f"Loaded {len(question_bank)} questions from cache in "
+              f"{(time.perf_counter() - start_time) * 1000:.1f} ms")
+        report_unmatched_answers(question_bank)
+    else:
+        # Show the window right away and stream the questions into it
+        quiz_app = QuizWindow(root, QuestionBank(), loading=True, bank_entry=bank_entry, catalogue=catalogue)
+        
+        def loading_done(question_count):
+            catalogue.remember(bank_entry.name, quiz_app.question_bank)
+            quiz_app.finish_loading(question_count)
+            print(f"Parsed {len(quiz_app.question_bank)} questions in "
+                  f"{(time.perf_counter() - start_time) * 1000:.1f} ms, cache rebuilt")
+            report_unmatched_answers(quiz_app.question_bank)
+        
+        BankLoader(
+            root, source_path, strict=True,
+            on_records=quiz_app.add_questions,
+            on_done=loading_done,
+            on_error=quiz_app.loading_failed
+        ).start()
+    
     root.mainloop()
\ No newline at end of file
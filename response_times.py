@@ -0,0 +1,181 @@
+import array
+import struct
+import time
+
+from append_log import AppendLog
+from bank_cache import _little_endian
+
+# Every submitted answer is one event: the question, the time since it was
+# shown, which attempt at it this was during that visit, and whether it was
+# right. Events are kept column by column in typed arrays, 11 bytes each,
+# so recording one is a few appends with no objects created. They are
+# written to a log next to the checkpoint in chunks of the same columns.
+RESPONSE_TIMES_SUFFIX = ".times"
+# Events collected before a chunk is handed to the writer
+FLUSH_EVENTS = 64
+# Latencies are kept in microseconds; longer ones are clamped (about 71 minutes)
+MAX_LATENCY_US = 0xFFFFFFFF
+
+_LOG_MAGIC = b"QRTS"
+_LOG_VERSION = 1
+_CHUNK_HEADER = struct.Struct("<I")  # events in the chunk, then the columns little-endian
+# Column typecodes: question ID, latency in microseconds, attempt, correct
+_COLUMNS = ("I", "I", "H", "B")
+_EVENT_SIZE = sum(array.array(typecode).itemsize for typecode in _COLUMNS)
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+class ResponseTimes:
+    """Columnar store of answer events for one question bank"""
+
+    def __init__(self, columns=None):
+        if columns is None:
+            columns = [array.array(typecode) for typecode in _COLUMNS]
+        self.question_ids, self.latencies, self.attempts, self.correct = columns
+        self.flushed = len(self.question_ids)  # events already in the log
+        # The visit in progress
+        self._question_id = None
+        self._shown_at = 0
+        self._attempt = 0
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def show(self, question_id):
+        """Start timing a question that has just been shown"""
+        self._question_id = question_id
+        self._attempt = 0
+        self._shown_at = time.perf_counter_ns()
+
+    def record(self, question_id, correct):
+        """Record an answer to the question being shown"""
+        elapsed = time.perf_counter_ns() - self._shown_at
+        if question_id != self._question_id:
+            return  # not timed; show() wasn't called for it
+        self._attempt += 1
+        self.question_ids.append(question_id)
+        self.latencies.append(min(elapsed // 1000, MAX_LATENCY_US))
+        self.attempts.append(min(self._attempt, 0xFFFF))
+        self.correct.append(1 if correct else 0)
+
+    def needs_flush(self):
+        return len(self.question_ids) - self.flushed >= FLUSH_EVENTS
+
+    def take_chunk(self):
+        """Return the events recorded since the last chunk as one log chunk, or None"""
+        start = self.flushed
+        if start == len(self.question_ids):
+            return None
+        self.flushed = len(self.question_ids)
+        return self.chunk(start)
+
+    def chunk(self, start=0):
+        """Return the events from `start` on as one log chunk"""
+        columns = (self.question_ids, self.latencies, self.attempts, self.correct)
+        return _CHUNK_HEADER.pack(len(self.question_ids) - start) + b"".join(
+            _little_endian(column[start:]).tobytes() for column in columns
+        )
+
+    def remapped(self, id_map):
+        """Return a copy with each question ID moved to id_map[ID]
+
+        Events of IDs past the end of `id_map` are dropped.
+        """
+        columns = [array.array(typecode) for typecode in _COLUMNS]
+        for event in zip(self.question_ids, self.latencies, self.attempts, self.correct):
+            if event[0] < len(id_map):
+                for column, value in zip(columns, (id_map[event[0]], *event[1:])):
+                    column.append(value)
+        return ResponseTimes(columns)
+
+    def question_stats(self):
+        """Return a dict of question ID -> stats of its answers
+
+        Each stats dict has the number of visits answered, answers, incorrect
+        answers, and the median time in seconds to the first answer of a visit.
+        """
+        first_latencies = {}
+        answers = {}
+        incorrect = {}
+        for question_id, latency, attempt, correct in zip(
+            self.question_ids, self.latencies, self.attempts, self.correct
+        ):
+            answers[question_id] = answers.get(question_id, 0) + 1
+            if not correct:
+                incorrect[question_id] = incorrect.get(question_id, 0) + 1
+            if attempt == 1:
+                first_latencies.setdefault(question_id, []).append(latency)
+
+        return {
+            question_id: {
+                'visits': len(first_latencies.get(question_id, ())),
+                'answers': count,
+                'incorrect': incorrect.get(question_id, 0),
+                'median_seconds': _median(first_latencies[question_id]) / 1e6 if question_id in first_latencies else 0.0,
+            }
+            for question_id, count in answers.items()
+        }
+
+    def summary(self, limit=10):
+        """Return (slowest, most_missed): lists of (question ID, stats) for the summary view
+
+        The slowest questions have the longest median time to a first answer;
+        the most missed have the most incorrect answers, ties broken by the
+        share of answers that were incorrect.
+        """
+        stats = self.question_stats()
+        slowest = sorted(stats.items(), key=lambda item: item[1]['median_seconds'], reverse=True)
+        most_missed = sorted(
+            (item for item in stats.items() if item[1]['incorrect']),
+            key=lambda item: (item[1]['incorrect'], item[1]['incorrect'] / item[1]['answers']),
+            reverse=True
+        )
+        return slowest[:limit], most_missed[:limit]
+
+
+class ResponseLog:
+    """Append-only file of ResponseTimes chunks"""
+
+    def __init__(self, path):
+        self.path = path
+        self._log = AppendLog(path, _LOG_MAGIC, _LOG_VERSION)
+
+    def load(self):
+        """Return a ResponseTimes with the events saved in the log"""
+        columns = [array.array(typecode) for typecode in _COLUMNS]
+        data = self._log.read()
+        if data is None:
+            return ResponseTimes(columns)
+
+        offset = 0
+        while offset + _CHUNK_HEADER.size <= len(data):
+            count, = _CHUNK_HEADER.unpack_from(data, offset)
+            end = offset + _CHUNK_HEADER.size + count * _EVENT_SIZE
+            if end > len(data):
+                break  # a torn chunk at the end of the log is dropped
+            offset += _CHUNK_HEADER.size
+            for column in columns:
+                size = count * column.itemsize
+                values = array.array(column.typecode)
+                values.frombytes(data[offset:offset + size])
+                column.extend(_little_endian(values))
+                offset += size
+        return ResponseTimes(columns)
+
+    def append(self, chunk):
+        """Append one chunk from ResponseTimes.take_chunk; runs on the writer thread"""
+        self._log.append(chunk)
+
+    def compact(self, response_times):
+        """Rewrite the log with every event of `response_times` as one chunk"""
+        self._log.rewrite(response_times.chunk())
+
+    def close(self):
+        self._log.close()
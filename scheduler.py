@@ -0,0 +1,168 @@
+import heapq
+import struct
+import time
+
+from append_log import AppendLog, whole_records
+
+# Spaced repetition in the style of SM-2. Every answered question gets a
+# card with an ease factor, an interval and a due time; the cards are kept
+# in a heap ordered by due time, so the next due question is found in
+# O(log N) however large the bank. Updated cards are appended to a schedule
+# log next to the checkpoint, one fixed-size record per answer.
+SCHEDULE_SUFFIX = ".schedule"
+
+DAY = 24 * 60 * 60
+# A missed question comes back after this long rather than the next day
+RELEARN_INTERVAL = 10 * 60 / DAY
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# SM-2 answer qualities, from 0 (blackout) to 5 (perfect recall)
+QUALITY_CORRECT = 4
+QUALITY_INCORRECT = 1
+
+_LOG_MAGIC = b"QSCH"
+_LOG_VERSION = 1
+# question ID, repetitions, ease, interval in days, due time
+_CARD = struct.Struct("<IHffd")
+
+
+class Card:
+    """Scheduling state of one question"""
+
+    __slots__ = ("question_id", "repetitions", "ease", "interval", "due")
+
+    def __init__(self, question_id, repetitions=0, ease=DEFAULT_EASE, interval=0.0, due=0.0):
+        self.question_id = question_id
+        self.repetitions = repetitions
+        self.ease = ease
+        self.interval = interval  # days
+        self.due = due  # seconds since the epoch
+
+    def review(self, quality, now):
+        """Update the card with an SM-2 answer quality"""
+        if quality >= 3:
+            if self.repetitions == 0:
+                self.interval = 1.0
+            elif self.repetitions == 1:
+                self.interval = 6.0
+            else:
+                self.interval = round(self.interval * self.ease)
+            self.repetitions += 1
+        else:
+            self.repetitions = 0
+            self.interval = RELEARN_INTERVAL
+        self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.due = now + self.interval * DAY
+
+    def pack(self):
+        return _CARD.pack(self.question_id, min(self.repetitions, 0xFFFF), self.ease, self.interval, self.due)
+
+
+class ReviewScheduler:
+    """Cards of the answered questions plus a heap of (due, question ID)
+
+    The heap is updated lazily: rescheduling a card pushes a new entry, and
+    entries whose due time no longer matches their card are dropped when
+    they reach the top.
+    """
+
+    def __init__(self, cards=()):
+        self.cards = {card.question_id: card for card in cards}
+        self._heap = [(card.due, card.question_id) for card in self.cards.values()]
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __contains__(self, question_id):
+        return question_id in self.cards
+
+    def review(self, question_id, correct, now=None):
+        """Schedule a question after an answer; returns its updated card"""
+        card = self.cards.get(question_id)
+        if card is None:
+            card = self.cards[question_id] = Card(question_id)
+        card.review(QUALITY_CORRECT if correct else QUALITY_INCORRECT, time.time() if now is None else now)
+        heapq.heappush(self._heap, (card.due, question_id))
+        return card
+
+    def _drop_stale(self, question_count=None):
+        heap = self._heap
+        while heap:
+            due, question_id = heap[0]
+            card = self.cards.get(question_id)
+            in_bank = question_count is None or question_id < question_count
+            if card is not None and card.due == due and in_bank:
+                return
+            heapq.heappop(heap)
+
+    def next_due(self, now=None, exclude=None, question_count=None):
+        """Return the ID of the most overdue question, or None if nothing is due
+
+        `exclude` skips one question, such as the one being shown. With a
+        `question_count`, cards of IDs past the end of the bank (saved for a
+        version of it with more questions) are never returned.
+        """
+        now = time.time() if now is None else now
+        self._drop_stale(question_count)
+        if not self._heap or self._heap[0][0] > now:
+            return None
+        if self._heap[0][1] != exclude:
+            return self._heap[0][1]
+
+        # The excluded question is on top; look just below it
+        top = heapq.heappop(self._heap)
+        self._drop_stale(question_count)
+        question_id = None
+        if self._heap and self._heap[0][0] <= now:
+            question_id = self._heap[0][1]
+        heapq.heappush(self._heap, top)
+        return question_id
+
+    def next_new(self, question_count, start=0):
+        """Return the first question from `start` on that has never been answered, or None"""
+        for question_id in range(start, question_count):
+            if question_id not in self.cards:
+                return question_id
+        return None
+
+
+class ScheduleLog:
+    """Append-only file of card updates; the last record of a question wins"""
+
+    def __init__(self, path, compact_ratio=2):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.records = 0  # records in the file
+        self._log = AppendLog(path, _LOG_MAGIC, _LOG_VERSION)
+
+    def load(self):
+        """Return the cards saved in the log"""
+        cards = {}
+        self.records = 0
+        body = self._log.read()
+        if body is None:
+            return []
+        for question_id, repetitions, ease, interval, due in _CARD.iter_unpack(whole_records(body, _CARD.size)):
+            cards[question_id] = Card(question_id, repetitions, ease, interval, due)
+            self.records += 1
+        return list(cards.values())
+
+    def append(self, packed_card):
+        """Append one packed card; runs on the writer thread"""
+        if self._log.open():
+            self.records = 0
+        self._log.append(packed_card)
+        self.records += 1
+
+    def needs_compaction(self, card_count):
+        return self.records > self.compact_ratio * card_count + 1024
+
+    def compact(self, packed_cards):
+        """Rewrite the log with one record per card"""
+        self._log.rewrite(b"".join(packed_cards))
+        self.records = len(packed_cards)
+
+    def close(self):
+        self._log.close()
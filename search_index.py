@@ -0,0 +1,236 @@
+import heapq
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left
+
+from append_log import atomic_write
+from bank_cache import _little_endian, cache_path_for, is_cache_current, read_cache_header
+
+# Inverted index over question and option text, cached next to the source.
+#
+# Layout (little-endian):
+#   header           see _HEADER below
+#   terms            UTF-8 text of the sorted terms joined by newlines, padded to 8 bytes
+#   posting_offsets  uint64[term_count + 1]  start of each term's postings
+#   postings         uint32[posting_count]   sorted question IDs of each term, back to back
+#
+# Terms are runs of word characters, so a newline can never appear in one.
+# The index records the content hash of the source it was built from and is
+# only used while the bank cache for that source is current.
+INDEX_MAGIC = b"QSIX"
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".qsi"
+
+# Query terms ending in this match every term they're a prefix of
+PREFIX_WILDCARD = "*"
+
+_HEADER = struct.Struct("<4sHH32sQQQQ")
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def index_path_for(source_path):
+    """Return the search index path used for a question bank file"""
+    return os.fspath(source_path) + INDEX_SUFFIX
+
+
+def tokenize(text):
+    """Return the lowercase terms of a piece of text"""
+    return _WORD_PATTERN.findall(text.casefold())
+
+
+class SearchIndex:
+    """Term -> question ID postings with exact and prefix lookups
+
+    Terms are kept sorted, so a prefix query is a bisect to the first
+    matching term followed by a scan of the neighbouring ones.
+    """
+
+    def __init__(self, terms, posting_offsets, postings, question_count):
+        self.terms = terms
+        self.posting_offsets = posting_offsets
+        self.postings = postings
+        self.question_count = question_count
+
+    @classmethod
+    def build(cls, question_bank):
+        """Index the question text and options of every question in a bank"""
+        postings_by_term = {}
+        question_id = -1
+        for question_id, (question, options, _) in enumerate(question_bank):
+            for term in set(tokenize(" ".join((question, *options)))):
+                postings = postings_by_term.get(term)
+                if postings is None:
+                    postings_by_term[term] = array("I", (question_id,))
+                else:
+                    postings.append(question_id)
+
+        terms = sorted(postings_by_term)
+        posting_offsets = array("Q", [0])
+        postings = array("I")
+        for term in terms:
+            postings.extend(postings_by_term[term])
+            posting_offsets.append(len(postings))
+        return cls(terms, posting_offsets, postings, question_id + 1)
+
+    @classmethod
+    def load(cls, index_path):
+        """Read an index file; returns (index, source_hash)"""
+        with open(index_path, "rb") as f:
+            data = f.read()
+        if len(data) < _HEADER.size:
+            raise ValueError("Search index is truncated")
+        magic, version, _, digest, question_count, term_count, blob_size, posting_count = _HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError("Unknown search index format")
+
+        start = _HEADER.size
+        terms = str(data[start:start + blob_size], "utf-8").split("\n") if term_count else []
+        start += blob_size + (-blob_size % 8)
+        posting_offsets = array("Q")
+        posting_offsets.frombytes(data[start:start + 8 * (term_count + 1)])
+        start += 8 * (term_count + 1)
+        postings = array("I")
+        postings.frombytes(data[start:start + 4 * posting_count])
+        if len(terms) != term_count or len(postings) != posting_count:
+            raise ValueError("Search index is truncated")
+        return cls(terms, _little_endian(posting_offsets), _little_endian(postings), question_count), digest
+
+    def save(self, index_path, source_hash):
+        """Write the index to a temporary file and rename it into place"""
+        blob = "\n".join(self.terms).encode("utf-8")
+        with atomic_write(index_path) as f:
+            f.write(_HEADER.pack(
+                INDEX_MAGIC, INDEX_VERSION, 0, source_hash, self.question_count,
+                len(self.terms), len(blob), len(self.postings)
+            ))
+            f.write(blob)
+            f.write(b"\0" * (-len(blob) % 8))
+            f.write(_little_endian(self.posting_offsets).tobytes())
+            f.write(_little_endian(self.postings).tobytes())
+
+    def _postings(self, position):
+        return self.postings[self.posting_offsets[position]:self.posting_offsets[position + 1]]
+
+    def _term_range(self, term, prefix=False):
+        """Return the (first, end) positions of the terms matching a query term"""
+        first = bisect_left(self.terms, term)
+        end = first
+        if prefix:
+            while end < len(self.terms) and self.terms[end].startswith(term):
+                end += 1
+        elif first < len(self.terms) and self.terms[first] == term:
+            end = first + 1
+        return first, end
+
+    def _posting_count(self, first, end):
+        return self.posting_offsets[end] - self.posting_offsets[first]
+
+    def lookup(self, term):
+        """Return the sorted IDs of the questions containing a term"""
+        first, end = self._term_range(term.casefold())
+        return self._postings(first) if end > first else array("I")
+
+    def lookup_prefix(self, prefix):
+        """Return the set of IDs of the questions with a term starting with `prefix`"""
+        return self._id_set(*self._term_range(prefix.casefold(), prefix=True))
+
+    def _id_set(self, first, end):
+        question_ids = set()
+        for position in range(first, end):
+            question_ids.update(self._postings(position))
+        return question_ids
+
+    def _iter_ids(self, first, end):
+        """Yield the sorted, distinct IDs of the postings of terms first..end"""
+        if end - first == 1:
+            yield from self._postings(first)
+            return
+        previous = None
+        for question_id in heapq.merge(*(self._postings(position) for position in range(first, end))):
+            if question_id != previous:
+                yield question_id
+                previous = question_id
+
+    def _contains(self, first, end, question_id):
+        """Check whether any term first..end has a question, by bisecting its postings"""
+        postings, offsets = self.postings, self.posting_offsets
+        for position in range(first, end):
+            start, stop = offsets[position], offsets[position + 1]
+            index = bisect_left(postings, question_id, start, stop)
+            if index < stop and postings[index] == question_id:
+                return True
+        return False
+
+    def search(self, query, limit=None):
+        """Return the sorted IDs of the questions matching every query term
+
+        A term ending in * matches any term it's a prefix of; other terms
+        must match a whole word. With a `limit`, the IDs of the query term
+        with the fewest postings are walked in order and checked against the
+        other terms' postings, stopping after `limit` hits, so a query never
+        materializes the full result of its common terms.
+        """
+        ranges = []
+        for word in query.split():
+            terms = tokenize(word)
+            # Only the last piece of "e-mail*" is a prefix
+            prefix = word.endswith(PREFIX_WILDCARD)
+            for i, term in enumerate(terms):
+                ranges.append(self._term_range(term, prefix and i == len(terms) - 1))
+        if not ranges or any(first == end for first, end in ranges):
+            return []
+
+        # Lead with the most selective term
+        ranges.sort(key=lambda term_range: self._posting_count(*term_range))
+        lead, others = ranges[0], ranges[1:]
+
+        if limit is None:
+            if not others and lead[1] - lead[0] == 1:
+                return self._postings(lead[0]).tolist()
+            question_ids = self._id_set(*lead)
+            for first, end in others:
+                if not question_ids:
+                    break
+                question_ids.intersection_update(self._id_set(first, end))
+            return sorted(question_ids)
+
+        question_ids = []
+        for question_id in self._iter_ids(*lead):
+            if all(self._contains(first, end, question_id) for first, end in others):
+                question_ids.append(question_id)
+                if len(question_ids) >= limit:
+                    break
+        return question_ids
+
+
+def load_search_index(question_bank, source_path=None):
+    """Return the search index of a bank, from its cache file when possible
+
+    The cached index is used if it was built from the same source content
+    as the current bank cache. Otherwise the index is built from the bank
+    and, when the bank cache is current, saved for the next start.
+    """
+    if source_path is None:
+        return SearchIndex.build(question_bank)
+
+    cache_path = cache_path_for(source_path)
+    index_path = index_path_for(source_path)
+    source_hash = None
+    if is_cache_current(cache_path, source_path):
+        source_hash = read_cache_header(cache_path)["source_hash"]
+        try:
+            index, index_hash = SearchIndex.load(index_path)
+            if index_hash == source_hash and index.question_count == len(question_bank):
+                return index
+        except (OSError, ValueError):
+            pass
+
+    index = SearchIndex.build(question_bank)
+    if source_hash is not None:
+        try:
+            index.save(index_path, source_hash)
+        except OSError as e:
+            print(f"Could not write search index: {str(e)}")
+    return index
@@ -0,0 +1,89 @@
+import os
+import struct
+
+import pytest
+
+from append_log import AppendLog, atomic_write
+from response_times import ResponseLog, ResponseTimes
+from scheduler import ReviewScheduler, ScheduleLog
+
+
+def test_append_log_round_trip(tmp_path):
+    path = str(tmp_path / "log")
+    log = AppendLog(path, b"TEST", 1)
+    assert log.read() is None
+    assert log.open()  # a new file is started
+    log.append(b"abc")
+    log.append(b"def")
+    log.close()
+
+    assert AppendLog(path, b"TEST", 1).read() == b"abcdef"
+    assert AppendLog(path, b"TEST", 2).read() is None
+    assert AppendLog(path, b"OTHR", 1).read() is None
+
+    # Appending to a log with another header starts it afresh
+    log = AppendLog(path, b"TEST", 2)
+    log.append(b"xyz")
+    log.close()
+    assert AppendLog(path, b"TEST", 2).read() == b"xyz"
+
+
+def test_atomic_write_keeps_the_old_file_on_error(tmp_path):
+    path = str(tmp_path / "file")
+    with atomic_write(path) as f:
+        f.write(b"old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write(b"new")
+            raise RuntimeError("interrupted")
+    with open(path, "rb") as f:
+        assert f.read() == b"old"
+    assert os.listdir(tmp_path) == ["file"]
+
+
+def test_schedule_log_round_trip(tmp_path):
+    path = str(tmp_path / "progress.schedule")
+    scheduler = ReviewScheduler()
+    log = ScheduleLog(path)
+    for question_id, correct in [(1, True), (2, False), (1, True)]:
+        log.append(scheduler.review(question_id, correct, now=1000.0).pack())
+    log.close()
+    with open(path, "ab") as f:
+        f.write(b"\1\2\3")  # a torn record
+
+    log = ScheduleLog(path)
+    cards = {card.question_id: card for card in log.load()}
+    assert log.records == 3
+    assert cards.keys() == {1, 2}
+    assert cards[1].repetitions == 2 and cards[2].repetitions == 0
+    assert cards[1].due == scheduler.cards[1].due
+
+    log.compact([card.pack() for card in cards.values()])
+    log.close()
+    assert len(ScheduleLog(path).load()) == 2
+
+
+def test_response_log_round_trip(tmp_path):
+    path = str(tmp_path / "progress.times")
+    times = ResponseTimes()
+    log = ResponseLog(path)
+    for question_id in (4, 4, 9):
+        times.show(question_id)
+        times.record(question_id, question_id == 9)
+        log.append(times.take_chunk())
+    log.close()
+    with open(path, "ab") as f:
+        f.write(b"\5\0\0\0\1")  # a torn chunk
+
+    loaded = ResponseLog(path).load()
+    assert list(loaded.question_ids) == [4, 4, 9]
+    assert list(loaded.correct) == [0, 0, 1]
+    assert loaded.question_stats()[4]['incorrect'] == 2
+
+
+def test_response_chunk_is_little_endian():
+    times = ResponseTimes()
+    times.show(0x01020304)
+    times.record(0x01020304, True)
+    times.latencies[0] = 0x0A0B0C0D
+    assert times.take_chunk() == struct.pack("<IIIHB", 1, 0x01020304, 0x0A0B0C0D, 1, 1)
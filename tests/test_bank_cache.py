@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from bank_cache import (CacheError, MappedQuestionBank, cache_path_for, is_cache_current,
+                        load_question_bank_cached, read_bank_cache, read_cache_header)
+from question_bank import load_question_bank
+from question_loader import format_record
+
+RECORDS = [
+    ("What is 2 + 2?", ["3", "4", "5"], ["4"]),
+    ("Pick the primes", ["2", "4", "5", "9"], ["2", "5"]),
+    ("Repeated options", ["yes", "no", "yes"], ["yes"]),
+    ("Answer missing from the options", ["red", "green"], ["blue"]),
+    ("Ünïcode text — still one question?", ["ja", "nein"], ["ja"]),
+    # A repeated question keeps its ID and takes the last options and answers
+    ("What is 2 + 2?", ["4", "22"], ["4"]),
+]
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "bank.txt"
+    path.write_text("".join(format_record(*record) for record in RECORDS), encoding="utf-8")
+    return str(path)
+
+
+def assert_same_bank(bank, expected):
+    assert len(bank) == len(expected)
+    for question_id in range(len(expected)):
+        question, options, answers = expected[question_id]
+        assert bank[question_id] == (question, tuple(options), tuple(answers))
+        assert bank.answer_key(question_id) == expected.answer_key(question_id)
+        assert bank.id_of(question) == question_id
+    assert bank.id_of("Not in the bank") is None
+    assert bank.unmatched_answers() == expected.unmatched_answers()
+
+
+def test_cache_round_trip(source):
+    expected = load_question_bank(source)
+    bank, hit = load_question_bank_cached(source)
+    assert not hit
+    assert_same_bank(bank, expected)
+
+    bank, hit = load_question_bank_cached(source)
+    assert hit
+    assert_same_bank(bank, expected)
+    assert_same_bank(read_bank_cache(cache_path_for(source)), expected)
+
+
+def test_mapped_bank_matches_decoded_bank(source):
+    expected = load_question_bank(source)
+    for _ in range(2):  # a cache miss streams into the cache, then a hit maps it
+        bank, _ = load_question_bank_cached(source, mapped=True)
+        assert isinstance(bank, MappedQuestionBank)
+        assert_same_bank(bank, expected)
+        assert list(bank) == [bank[question_id] for question_id in range(len(bank))]
+        bank.close()
+
+
+def test_edited_source_invalidates_cache(source):
+    load_question_bank_cached(source)
+    with open(source, "a", encoding="utf-8") as f:
+        f.write(format_record("A new question", ["a", "b"], ["b"]))
+    assert not is_cache_current(cache_path_for(source), source)
+
+    bank, hit = load_question_bank_cached(source)
+    assert not hit
+    assert bank.question(len(bank) - 1) == "A new question"
+
+
+def test_same_size_edit_invalidates_cache(source):
+    load_question_bank_cached(source)
+    stat = os.stat(source)
+    with open(source, "r+b") as f:
+        f.write(b"X")  # "What" -> "Xhat", keeping the size
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not is_cache_current(cache_path_for(source), source)
+
+
+def test_touched_source_keeps_cache(source):
+    load_question_bank_cached(source)
+    stat = os.stat(source)
+    mtime_ns = stat.st_mtime_ns + 5_000_000_000
+    os.utime(source, ns=(stat.st_atime_ns, mtime_ns))
+
+    assert is_cache_current(cache_path_for(source), source)
+    # The unchanged hash refreshed the stamp, so the next check is cheap
+    assert read_cache_header(cache_path_for(source))["source_mtime_ns"] == mtime_ns
+    assert load_question_bank_cached(source)[1]
+
+
+def test_truncated_cache_is_rebuilt(source):
+    load_question_bank_cached(source)
+    cache_path = cache_path_for(source)
+    with open(cache_path, "r+b") as f:
+        f.truncate(os.path.getsize(cache_path) - 8)
+
+    with pytest.raises(CacheError):
+        read_bank_cache(cache_path)
+    with pytest.raises(CacheError):
+        MappedQuestionBank(cache_path)
+    bank, hit = load_question_bank_cached(source)
+    assert not hit
+    assert_same_bank(bank, load_question_bank(source))
@@ -0,0 +1,28 @@
+import bank_loader
+from bank_loader import BankLoader
+from question_loader import format_record
+
+RECORDS = [(f"Question {i}?", ["yes", "no"], ["yes"]) for i in range(300)]
+
+
+def test_no_record_is_lost_when_the_cache_write_fails(tmp_path, monkeypatch):
+    source = tmp_path / "bank.txt"
+    source.write_text("".join(format_record(*record) for record in RECORDS), encoding="utf-8")
+
+    def failing_write(records, cache_path, signature):
+        for i, _ in enumerate(records):
+            if i == 99:
+                raise OSError("No space left on device")
+
+    monkeypatch.setattr(bank_loader, "write_bank_cache", failing_write)
+    loader = BankLoader(None, str(source))
+    loader._run()
+
+    streamed = []
+    while True:
+        item = loader._batches.get_nowait()
+        if item is bank_loader._DONE:
+            break
+        streamed.extend(item)
+    assert [question for question, _, _ in streamed] == [question for question, _, _ in RECORDS]
+    assert loader.question_count == len(RECORDS)
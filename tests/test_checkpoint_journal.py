@@ -0,0 +1,129 @@
+import os
+import pickle
+
+from checkpoint_journal import CheckpointJournal, empty_state, resolve_question_ids
+from question_bank import QuestionBank
+from question_set import QuestionSet
+from quiz_engine import next_shuffle_seed
+
+BANK = QuestionBank.from_records(
+    (f"Question {question_id}", ["a", "b", "c"], ["a"]) for question_id in range(20)
+)
+
+
+def make_state(**changes):
+    state = empty_state(shuffle_seed=1234)
+    state.update(changes)
+    return state
+
+
+def test_snapshot_and_events_round_trip(tmp_path):
+    path = str(tmp_path / "checkpoint.dat")
+    journal = CheckpointJournal(path)
+    journal.snapshot(make_state(question_index=3, score=2,
+                                incorrect_questions=QuestionSet([5]), answered_questions=QuestionSet([1, 2, 5])))
+    journal.record_answer(5, 0b1, True)
+    journal.record_answer(7, 0b10, False)
+    journal.record_position(8)
+    journal.close()
+
+    state = CheckpointJournal(path).load()
+    assert state['question_index'] == 8
+    assert state['score'] == 3
+    assert state['incorrect_questions'] == {7}
+    assert state['answered_questions'] == {1, 2, 5, 7}
+    assert state['shuffle_seed'] == 1234
+
+
+def test_torn_record_is_dropped(tmp_path):
+    path = str(tmp_path / "checkpoint.dat")
+    journal = CheckpointJournal(path)
+    journal.snapshot(make_state())
+    journal.record_answer(1, 0b1, True)
+    journal.record_answer(2, 0b1, False)
+    journal.close()
+
+    # A crash in the middle of the last write leaves part of a record
+    with open(path + ".journal", "r+b") as f:
+        f.truncate(os.path.getsize(path + ".journal") - 5)
+
+    journal = CheckpointJournal(path)
+    state = journal.load()
+    assert state['score'] == 1
+    assert state['answered_questions'] == {1}
+    assert journal.pending_events == 1
+
+
+def test_journal_from_an_older_generation_is_ignored(tmp_path):
+    path = str(tmp_path / "checkpoint.dat")
+    journal = CheckpointJournal(path)
+    journal.snapshot(make_state())
+    journal.record_answer(1, 0b1, True)
+    journal.close()
+    with open(path + ".journal", "rb") as f:
+        old_journal = f.read()
+
+    journal.snapshot(make_state(score=1, answered_questions=QuestionSet([1])))
+    # A crash between writing the snapshot and resetting the journal
+    with open(path + ".journal", "wb") as f:
+        f.write(old_journal)
+
+    state = CheckpointJournal(path).load()
+    assert state['score'] == 1  # the old answer is not applied twice
+
+
+def test_reset_event_starts_a_new_attempt(tmp_path):
+    path = str(tmp_path / "checkpoint.dat")
+    journal = CheckpointJournal(path)
+    journal.snapshot(make_state(score=4, answered_questions=QuestionSet([1, 2, 3, 4])))
+    journal.record_reset()
+    journal.record_answer(9, 0b1, False)
+    journal.close()
+
+    state = CheckpointJournal(path).load()
+    assert state['score'] == 0
+    assert state['answered_questions'] == {9}
+    assert state['incorrect_questions'] == {9}
+    assert state['shuffle_seed'] == next_shuffle_seed(1234)
+
+
+def test_journal_without_snapshot(tmp_path):
+    path = str(tmp_path / "checkpoint.dat")
+    journal = CheckpointJournal(path)
+    journal.record_answer(3, 0b1, True)
+    journal.close()
+
+    assert not os.path.exists(path)
+    state = CheckpointJournal(path).load()
+    assert state['score'] == 1
+    assert state['answered_questions'] == {3}
+
+
+def test_legacy_text_checkpoint_resolves_to_ids(tmp_path):
+    # The original quiz pickled lists of question text
+    path = str(tmp_path / "checkpoint.dat")
+    with open(path, "wb") as f:
+        pickle.dump({
+            'question_index': 6,
+            'score': 2,
+            'incorrect_questions': ["Question 4", "A question since removed"],
+            'answered_questions': ["Question 0", "Question 4", "Question 11"],
+        }, f)
+
+    journal = CheckpointJournal(path)
+    state = journal.load(lambda entries: resolve_question_ids(BANK, entries))
+    assert state['question_index'] == 6
+    assert state['score'] == 2
+    assert state['incorrect_questions'] == {4}
+    assert state['answered_questions'] == {0, 4, 11}
+    assert state['shuffle_seed'] == 0
+
+    # New events go to a journal on top of the legacy snapshot
+    journal.record_answer(12, 0b1, True)
+    journal.close()
+    state = CheckpointJournal(path).load(lambda entries: resolve_question_ids(BANK, entries))
+    assert state['answered_questions'] == {0, 4, 11, 12}
+
+
+def test_resolve_question_ids_drops_unknown_entries():
+    assert resolve_question_ids(BANK, [3, "Question 7", 20, -1, "Nope"]) == [3, 7]
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from exam_assembly import (
+    DIFFICULTY_BANDS, UNSEEN, ComplementIds, ExamAssembler, WeightedPool, allocate, difficulty_strata,
+    miss_rate_weights,
+)
+
+
+def test_complement_ids():
+    rng = random.Random(3)
+    for question_count in (0, 1, 10, 200):
+        excluded = rng.sample(range(question_count), question_count // 3)
+        complement = ComplementIds(question_count, excluded + [question_count + 5])
+        expected = [i for i in range(question_count) if i not in excluded]
+        assert len(complement) == len(expected)
+        assert [complement[k] for k in range(len(complement))] == expected
+        assert [i for i in range(-1, question_count + 1) if i in complement] == expected
+        with pytest.raises(IndexError):
+            complement[len(expected)]
+
+
+def test_forms_never_share_a_question():
+    assembler = ExamAssembler(100, seed=1)
+    forms = assembler.forms(4, 25)
+    drawn = [question_id for form in forms for question_id in form]
+    assert sorted(drawn) == list(range(100))
+    with pytest.raises(ValueError):
+        assembler.form(1)
+
+
+def test_difficulty_strata_and_weights():
+    stats = {
+        1: {'answers': 4, 'incorrect': 0},
+        2: {'answers': 2, 'incorrect': 1},
+        3: {'answers': 3, 'incorrect': 3},
+        50: {'answers': 1, 'incorrect': 1},  # past the end of the bank
+    }
+    strata = difficulty_strata(10, stats)
+    assert [list(strata[name]) for name in DIFFICULTY_BANDS] == [[1], [2], [3]]
+    assert list(strata[UNSEEN]) == [0, 4, 5, 6, 7, 8, 9]
+    assert miss_rate_weights(10, stats) == {1: 1.0, 2: 3.0, 3: 5.0}
+
+    assembler = ExamAssembler(10, strata, weights=miss_rate_weights(10, stats), seed=2)
+    drawn = assembler.form(10, {name: 1 for name in strata})
+    assert sorted(drawn) == list(range(10))
+
+
+def test_weighted_pool_draws_in_proportion_to_weight():
+    counts = {0: 0, 1: 0}
+    for seed in range(2000):
+        pool = WeightedPool(range(20), {0: 18.0, 1: 0.0}, random.Random(seed), default_weight=1.0)
+        assert len(pool) == 19  # question 1 weighs nothing
+        counts[0] += pool.draw() == 0
+    assert 0.45 < counts[0] / 2000 < 0.55  # 18 of a total weight of 36
+
+    pool = WeightedPool(range(20), {0: 18.0, 1: 0.0}, random.Random(0), default_weight=1.0)
+    assert sorted(pool.draw() for _ in range(19)) == [0] + list(range(2, 20))
+
+
+def test_allocate_by_quota():
+    assert allocate(10, {'a': 100, 'b': 100}, {'a': 3, 'b': 2}) == {'a': 6, 'b': 4}
+    assert allocate(10, {'a': 5, 'b': 100}, {'a': 3, 'b': 1}) == {'a': 5, 'b': 5}
+    with pytest.raises(ValueError):
+        allocate(10, {'a': 5}, {'a': 1, 'b': 1})
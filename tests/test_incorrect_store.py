@@ -0,0 +1,32 @@
+from incorrect_store import IncorrectQuestionStore
+from question_bank import QuestionBank, load_question_bank
+from question_loader import format_record
+
+RECORDS = [
+    ("What is 2 + 2?", ["3", "4"], ["4"]),
+    ("Capital of France?", ["Paris", "Lyon"], ["Paris"]),
+    ("Largest planet?", ["Jupiter", "Mars"], ["Jupiter"]),
+]
+
+
+def test_add_skips_recorded_questions(tmp_path):
+    path = tmp_path / "incorrect.txt"
+    # A question from another bank stays in the file
+    path.write_text(format_record("Another bank's question?", ["a", "b"], ["a"]) + format_record(*RECORDS[1]),
+                    encoding="utf-8")
+    bank = QuestionBank.from_records(RECORDS)
+
+    store = IncorrectQuestionStore(str(path), bank)
+    assert len(store) == 0  # not indexed until asked
+    store.rebuild_index()
+    assert 1 in store and len(store) == 1
+    assert not store.add(1)
+    assert store.add(2)
+    assert not store.add(2)
+
+    store = IncorrectQuestionStore(str(path), bank)
+    store.rebuild_index()
+    assert sorted(store.recorded) == [1, 2]
+    saved = load_question_bank(str(path))
+    assert [saved.question(i) for i in range(len(saved))] == [
+        "Another bank's question?", "Capital of France?", "Largest planet?"]
@@ -0,0 +1,38 @@
+from near_duplicates import merge_files
+from question_bank import QuestionBank
+from response_times import RESPONSE_TIMES_SUFFIX, ResponseLog, ResponseTimes
+from scheduler import SCHEDULE_SUFFIX, ReviewScheduler, ScheduleLog
+
+
+def test_merge_files_remaps_schedule_and_response_times(tmp_path):
+    bank = QuestionBank.from_records([
+        ("Capital of France?", ["Paris", "Lyon"], ["Paris"]),
+        ("What is 2 + 2?", ["3", "4"], ["4"]),
+        ("What is 2+2?", ["3", "4"], ["4"]),
+        ("Largest planet?", ["Jupiter", "Mars"], ["Jupiter"]),
+    ])
+    source_path = str(tmp_path / "data.txt")
+    checkpoint_path = str(tmp_path / "progress.pkl")
+
+    scheduler = ReviewScheduler()
+    schedule_log = ScheduleLog(checkpoint_path + SCHEDULE_SUFFIX)
+    for question_id, now in [(2, 0.0), (1, 10.0), (3, 20.0), (7, 30.0)]:
+        schedule_log.append(scheduler.review(question_id, False, now=now).pack())
+    schedule_log.close()
+
+    times = ResponseTimes()
+    for question_id in (1, 2, 3, 7):
+        times.show(question_id)
+        times.record(question_id, True)
+    response_log = ResponseLog(checkpoint_path + RESPONSE_TIMES_SUFFIX)
+    response_log.append(times.take_chunk())
+    response_log.close()
+
+    merged_bank = merge_files(source_path, [[1, 2]], bank, checkpoint_path, str(tmp_path / "incorrect.txt"))
+    assert len(merged_bank) == 3
+
+    cards = {card.question_id: card for card in ScheduleLog(checkpoint_path + SCHEDULE_SUFFIX).load()}
+    assert cards.keys() == {1, 2}  # 1 and 2 merged into 1, 3 moved to 2, 7 dropped
+    assert cards[1].due == scheduler.cards[2].due  # the copy due first is kept
+    assert list(ResponseLog(checkpoint_path + RESPONSE_TIMES_SUFFIX).load().question_ids) == [1, 1, 2]
+    assert (tmp_path / ("progress.pkl" + SCHEDULE_SUFFIX + ".bak")).exists()
@@ -0,0 +1,36 @@
+from parallel_loader import load_question_bank_files, load_question_banks
+from question_bank import QuestionBank, load_question_bank
+from question_loader import format_record
+
+
+def write_bank(path, first, count, repeat=None):
+    records = [(f"Question {i}", [f"a{i}", f"b{i}"], [f"a{i}"]) for i in range(first, first + count)]
+    if repeat is not None:
+        records.append((f"Question {repeat}", ["changed", "b"], ["changed"]))
+    path.write_text("".join(format_record(*record) for record in records), encoding="utf-8")
+    return str(path)
+
+
+def test_shards_load_like_the_sequential_loader(tmp_path):
+    paths = [write_bank(tmp_path / "one.txt", 0, 300, repeat=5), write_bank(tmp_path / "two.txt", 250, 300)]
+    expected = QuestionBank()
+    for path in paths:
+        for record in load_question_bank(path):
+            expected.add(*record)
+
+    bank, duplicates = load_question_banks(paths, workers=2, shard_size=1000)
+    assert list(bank) == list(expected)
+    assert [bank.answer_key(i) for i in range(len(bank))] == [expected.answer_key(i) for i in range(len(expected))]
+    assert duplicates == [(5, paths[0])] + [(i, paths[1]) for i in range(250, 300)]
+
+
+def test_files_load_into_banks_of_their_own(tmp_path):
+    paths = [write_bank(tmp_path / f"{i}.txt", 100 * i, 150) for i in range(3)]
+    (tmp_path / "empty.txt").write_text("", encoding="utf-8")
+    paths.append(str(tmp_path / "empty.txt"))
+
+    results = load_question_bank_files(paths, workers=2, shard_size=1000)
+    assert [len(bank) for bank, _ in results] == [150, 150, 150, 0]
+    for path, (bank, duplicates) in zip(paths, results):
+        assert list(bank) == list(load_question_bank(path))
+        assert duplicates == []
@@ -0,0 +1,86 @@
+import io
+import os
+import sys
+
+import pytest
+
+from question_loader import iter_questions, iter_raw_records, parse_record
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO, "benchmarks"))
+
+from bench_tokenizer import legacy_parse_record, make_records
+
+DATA_PATH = os.path.join(REPO, "data.txt")
+
+# The records of data.txt that the single-pass tokenizer reads differently
+# from the legacy regex, in file order. "X:" only starts an option at the start of a line, so "Print(A):",
+# "in A:" and "DockerHuB:" inside text no longer split it into options
+EDGE_RECORDS = [
+    (
+        "what is the output of the following lines of code:\ndef Print(A): \n for a in A: \n print(a+'1')\n"
+        "Print(['a','b','c'])\n\n\nA: a\nb\nc\nB: a1\nb1\nc1\nC: a1&&&&a1\nb1\nc1",
+        (
+            "what is the output of the following lines of code:\ndef Print(A): \n for a in A: \n print(a+'1')\n"
+            "Print(['a','b','c'])",
+            ["a\nb\nc", "a1\nb1\nc1", "a1"],
+            ["a1", "b1", "c1"],
+        ),
+    ),
+    (
+        "What segment of code would output the following?\n11\n22\n33\n"
+        "A: A=['1','2','3'] for a in A: print(3*a) \nB: A=[1,2,3] for a in A: print(2*a) \n"
+        "C: A=['1','2','3'] for a in A: print(2*a)&&&&A=['1','2','3'] for a in A: print(2*a)",
+        (
+            "What segment of code would output the following?\n11\n22\n33",
+            ["A=['1','2','3'] for a in A: print(3*a)", "A=[1,2,3] for a in A: print(2*a)",
+             "A=['1','2','3'] for a in A: print(2*a)"],
+            ["A=['1','2','3'] for a in A: print(2*a)"],
+        ),
+    ),
+    (
+        "What are the two main application-building methods supported in IBM Cloud Code Engine?\n"
+        "A: Building container image with DockerHub and Buildpack.\n"
+        "B: Building container image with Github Action and DockerHuB:\n"
+        "C: Building container image with Dockerpack and Buildpack.\n"
+        "D: Building container image with Dockerfile and Buildpack.&&&&"
+        "Building container image with Dockerfile and Buildpack.",
+        (
+            "What are the two main application-building methods supported in IBM Cloud Code Engine?",
+            ["Building container image with DockerHub and Buildpack.",
+             "Building container image with Github Action and DockerHuB:",
+             "Building container image with Dockerpack and Buildpack.",
+             "Building container image with Dockerfile and Buildpack."],
+            ["Building container image with Dockerfile and Buildpack."],
+        ),
+    ),
+]
+
+
+def test_matches_legacy_parser_on_data_txt():
+    differing = [record for record in iter_raw_records(DATA_PATH) if parse_record(record) != legacy_parse_record(record)]
+    assert differing == [record for record, _ in EDGE_RECORDS]
+
+
+def test_matches_legacy_parser_on_synthetic_records():
+    for record in make_records(500):
+        assert parse_record(record) == legacy_parse_record(record)
+
+
+@pytest.mark.parametrize("record, expected", EDGE_RECORDS)
+def test_edge_records(record, expected):
+    assert parse_record(record) == expected
+    assert legacy_parse_record(record) != expected
+
+
+def test_records_without_a_question_or_answers():
+    assert parse_record("\n\n") is None
+    assert parse_record("Question?\nA: yes\nB: no\n") == ("Question?", ["yes", "no"], None)
+    assert parse_record("Question?\nA: yes&&&&\n\n") == ("Question?", ["yes"], [])
+
+
+def test_delimiters_split_across_chunks():
+    text = "".join(f"Question {i}?\nA: yes\nB: no\n&&&&\nyes\n%%%%\n" for i in range(50))
+    for chunk_size in (1, 2, 3, 7, 64):
+        questions = [question for question, _, _ in iter_questions(io.StringIO(text), chunk_size)]
+        assert questions == [f"Question {i}?" for i in range(50)]
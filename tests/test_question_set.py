@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from question_set import QuestionSet
+
+
+def test_matches_a_python_set():
+    rng = random.Random(1)
+    question_set = QuestionSet()
+    expected = set()
+    for _ in range(5000):
+        question_id = rng.randrange(3000)
+        if rng.random() < 0.6:
+            question_set.add(question_id)
+            expected.add(question_id)
+        else:
+            question_set.discard(question_id)
+            expected.discard(question_id)
+        assert len(question_set) == len(expected)
+    assert list(question_set) == sorted(expected)
+    assert question_set == expected
+    assert all((question_id in question_set) == (question_id in expected) for question_id in range(-5, 3100))
+
+
+def test_bytes_round_trip():
+    question_set = QuestionSet([0, 7, 8, 1000, 123_456])
+    data = question_set.to_bytes()
+    assert len(data) == 123_456 // 8 + 1
+    assert QuestionSet.from_bytes(data) == question_set
+    assert len(QuestionSet.from_bytes(data)) == 5
+
+    # Trailing empty bytes are trimmed, so discarding the highest ID shrinks it
+    question_set.discard(123_456)
+    assert QuestionSet.from_bytes(question_set.to_bytes()) == {0, 7, 8, 1000}
+    assert QuestionSet.from_bytes(b"") == set()
+
+
+def test_set_operations():
+    a, b = QuestionSet([1, 2, 3, 500]), QuestionSet([3, 4, 500, 9000])
+    assert a | b == {1, 2, 3, 4, 500, 9000}
+    assert a & b == {3, 500}
+    assert a - b == {1, 2}
+    assert b - a == {4, 9000}
+    assert a.union() == a and a.union() is not a
+
+
+def test_rejects_negative_ids():
+    with pytest.raises(ValueError):
+        QuestionSet().add(-1)
+    with pytest.raises(KeyError):
+        QuestionSet().remove(4)
@@ -0,0 +1,73 @@
+import os
+
+from question_bank import QuestionBank, load_question_bank, normalize_answers
+from quiz_engine import QuizEngine, option_order, order_index
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data.txt")
+
+EDGE_CASES = QuestionBank.from_records([
+    ("Repeated options", ["yes", "no", "yes"], ["yes"]),
+    ("Repeated correct and wrong options", ["a", "b", "a", "b"], ["a"]),
+    ("Answer missing from the options", ["red", "green"], ["blue"]),
+    ("One answer missing", ["red", "green"], ["red", "blue"]),
+    ("Answer listed twice", ["x", "y", "z"], ["x", "x", "z"]),
+    ("Blank answer lines", ["x", "y"], ["y", " "]),
+    ("No correct option", ["x", "y"], []),
+    ("Many options", [str(i) for i in range(16)], ["3", "15"]),
+])
+
+
+def baseline_grade(options, answers, selected_indices):
+    """How the original QuizWindow.submit_answer graded: compare sets of option text"""
+    selected_options = [options[index] for index in selected_indices if index < len(options)]
+    return set(selected_options) == set(normalize_answers(list(answers)))
+
+
+def assert_grades_like_baseline(bank):
+    engine = QuizEngine(bank)
+    for question_id in range(len(bank)):
+        _, options, answers = bank[question_id]
+        for selection in range(1 << len(options)):
+            selected_indices = [index for index in range(len(options)) if selection >> index & 1]
+            expected = baseline_grade(options, answers, selected_indices)
+            assert engine.grade(question_id, selection) == expected, (question_id, selection)
+        highlighted = {index for index in range(len(options)) if engine.correct_options(question_id) >> index & 1}
+        assert highlighted == {index for index, option in enumerate(options) if option in normalize_answers(list(answers))}
+
+
+def test_grade_matches_baseline_on_data_txt():
+    assert_grades_like_baseline(load_question_bank(DATA_PATH, strict=True))
+
+
+def test_grade_matches_baseline_on_edge_cases():
+    assert_grades_like_baseline(EDGE_CASES)
+
+
+def test_grade_many_matches_grade():
+    engine = QuizEngine(EDGE_CASES)
+    responses = [(question_id, selection) for question_id in range(len(EDGE_CASES)) for selection in range(16)]
+    assert engine.grade_many(responses) == [engine.grade(*response) for response in responses]
+
+
+def test_submit_tracks_score_and_incorrect_questions():
+    engine = QuizEngine(EDGE_CASES)
+    assert engine.submit(0, 0b010) == (False, True)
+    assert engine.submit(0, 0b010) == (False, False)
+    assert engine.submit(0, 0b100) == (True, False)  # the repeated copy of the right answer
+    assert engine.score == 1
+    assert engine.incorrect_questions == set()
+    assert engine.answered_questions == {0}
+
+    state = engine.state()
+    restored = QuizEngine(EDGE_CASES)
+    restored.restore(state)
+    assert restored.state() == state
+
+
+def test_option_orders_are_seeded_permutations():
+    for option_count in (1, 2, 4, 16, 20):
+        order = option_order(42, 7, option_count)
+        assert sorted(order_index(order, position) for position in range(option_count)) == list(range(option_count))
+        assert order == option_order(42, 7, option_count)
+    orders = {option_order(seed, 7, 4) for seed in range(200)}
+    assert len(orders) == 24  # every order of four options turns up
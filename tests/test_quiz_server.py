@@ -0,0 +1,155 @@
+import asyncio
+import json
+
+import pytest
+
+import quiz_server
+from question_bank import QuestionBank
+from quiz_server import HTTPError, QuizServer
+
+BANK = QuestionBank.from_records([
+    ("What is 2 + 2?", ["3", "4", "5"], ["4"]),
+    ("Pick the primes", ["2", "4", "5", "9"], ["2", "5"]),
+])
+
+
+def correct_positions(question):
+    """Shuffled positions of the correct options of a question payload from BANK"""
+    _, options, answers = BANK[question['index']]
+    return [position for position, option in enumerate(question['options']) if option in answers]
+
+
+def test_session_lifecycle():
+    server = QuizServer(BANK)
+    status, payload = server.dispatch("POST", "/sessions", b"")
+    assert status == 201
+    session_id, question = payload['session'], payload['question']
+    assert question['index'] == 0 and not question['answered']
+    assert sorted(question['options']) == ["3", "4", "5"]
+
+    body = json.dumps({'selected': correct_positions(question)}).encode()
+    status, result = server.dispatch("POST", f"/sessions/{session_id}/answer", body)
+    assert status == 200 and result['correct'] and result['score'] == 1
+    assert result['correct_options'] == correct_positions(question)
+
+    status, question = server.dispatch("POST", f"/sessions/{session_id}/next", b"")
+    assert question['index'] == 1
+    status, result = server.dispatch("POST", f"/sessions/{session_id}/answer", b'{"selected": []}')
+    assert not result['correct'] and result['newly_incorrect']
+
+    status, question = server.dispatch("POST", f"/sessions/{session_id}/prev", b"")
+    assert question['index'] == 0 and question['answered']
+    status, state = server.dispatch("GET", f"/sessions/{session_id}?fields=all", b"")
+    assert (state['score'], state['answered'], state['incorrect']) == (1, 2, 1)
+
+    server.dispatch("POST", f"/sessions/{session_id}/next", b"")
+    status, question = server.dispatch("POST", f"/sessions/{session_id}/next", b"")
+    assert question == {'finished': True, 'score': 1, 'total': 2, 'incorrect': 1}
+    with pytest.raises(HTTPError) as error:
+        server.dispatch("POST", f"/sessions/{session_id}/answer", b'{"selected": []}')
+    assert error.value.status == 400
+
+    assert server.dispatch("DELETE", f"/sessions/{session_id}", b"") == (200, {'score': 1, 'total': 2})
+    with pytest.raises(HTTPError) as error:
+        server.dispatch("GET", f"/sessions/{session_id}", b"")
+    assert error.value.status == 404
+
+
+@pytest.mark.parametrize("body", [
+    b"", b"not json", b"[]", b'{"chosen": [0]}', b'{"selected": 0}', b'{"selected": [3]}',
+    b'{"selected": [-1]}', b'{"selected": ["0"]}', b'{"selected": [0.0]}',
+])
+def test_bad_selected_payloads(body):
+    server = QuizServer(BANK)
+    _, payload = server.dispatch("POST", "/sessions", b"")
+    with pytest.raises(HTTPError) as error:
+        server.dispatch("POST", f"/sessions/{payload['session']}/answer", body)
+    assert error.value.status == 400
+    assert server.sessions[payload['session']].engine.answered_questions == set()
+
+
+@pytest.mark.parametrize("method, path, status", [
+    ("GET", "/", 404),
+    ("GET", "/other", 404),
+    ("GET", "/sessions/unknown", 404),
+    ("GET", "/sessions", 405),
+    ("PUT", "/sessions/{id}", 405),
+    ("GET", "/sessions/{id}/next", 405),
+    ("POST", "/sessions/{id}/skip", 404),
+    ("POST", "/sessions/{id}/next/extra", 404),
+])
+def test_error_statuses(method, path, status):
+    server = QuizServer(BANK)
+    _, payload = server.dispatch("POST", "/sessions", b"")
+    with pytest.raises(HTTPError) as error:
+        server.dispatch(method, path.format(id=payload['session']), b"")
+    assert error.value.status == status
+
+
+def test_session_limit_and_sweep():
+    server = QuizServer(BANK, max_sessions=1, session_timeout=0)
+    server.dispatch("POST", "/sessions", b"")
+    with pytest.raises(HTTPError) as error:
+        server.dispatch("POST", "/sessions", b"")
+    assert error.value.status == 503
+    assert server.sweep() == 1 and not server.sessions
+
+
+class BufferWriter:
+    """Collects what handle_connection writes"""
+
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def serve_bytes(server, request):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(request)
+        reader.feed_eof()
+        writer = BufferWriter()
+        await server.handle_connection(reader, writer)
+        return writer
+
+    writer = asyncio.run(run())
+    assert writer.closed
+    responses = []
+    data = writer.data
+    while data:
+        head, _, rest = data.partition(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        length = int(next(line for line in head.split(b"\r\n") if line.lower().startswith(b"content-length"))
+                     .split(b":")[1])
+        responses.append((status, json.loads(rest[:length])))
+        data = rest[length:]
+    return responses
+
+
+def test_http_requests_on_one_connection():
+    server = QuizServer(BANK)
+    responses = serve_bytes(server, b"POST /sessions HTTP/1.1\r\nContent-Length: 0\r\n\r\n"
+                                    b"GET /nowhere HTTP/1.1\r\n\r\n")
+    assert [status for status, _ in responses] == [201, 404]
+    assert responses[0][1]['session'] in server.sessions
+
+
+def test_http_body_too_large():
+    server = QuizServer(BANK)
+    request = f"POST /sessions HTTP/1.1\r\nContent-Length: {quiz_server.MAX_BODY + 1}\r\n\r\n".encode()
+    assert serve_bytes(server, request) == [(413, {'error': "Request body too large"})]
+    assert not server.sessions
+
+
+def test_http_malformed_request():
+    server = QuizServer(BANK)
+    assert serve_bytes(server, b"GARBAGE\r\n\r\n") == [(400, {'error': "Malformed request"})]
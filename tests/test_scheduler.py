@@ -0,0 +1,20 @@
+from scheduler import ReviewScheduler
+
+
+def test_next_due_orders_by_due_time():
+    scheduler = ReviewScheduler()
+    scheduler.review(3, False, now=100.0)
+    scheduler.review(1, False, now=50.0)
+    assert scheduler.next_due(now=50.0) is None
+    assert scheduler.next_due(now=1e12) == 1
+    assert scheduler.next_due(now=1e12, exclude=1) == 3
+
+
+def test_next_due_skips_cards_past_the_end_of_the_bank():
+    # Cards saved for a longer version of the bank
+    scheduler = ReviewScheduler()
+    scheduler.review(5, False, now=0.0)
+    scheduler.review(1, False, now=10.0)
+    assert scheduler.next_due(now=1e12, question_count=2) == 1
+    assert scheduler.next_due(now=1e12, exclude=1, question_count=2) is None
+    assert scheduler.next_new(2) == 0
@@ -0,0 +1,85 @@
+import pytest
+
+from bank_cache import cache_path_for, read_cache_header, source_signature, write_bank_cache
+from question_bank import QuestionBank, load_question_bank
+from question_loader import format_record
+from search_index import SearchIndex, index_path_for, load_search_index, tokenize
+
+RECORDS = [
+    ("Which service stores container images?", ["Container Registry", "Object Storage"], ["Container Registry"]),
+    ("Which service runs containers?", ["Code Engine", "Cloudant"], ["Code Engine"]),
+    ("What is a container image?", ["A template", "A network"], ["A template"]),
+    ("Where are e-mail alerts configured?", ["Event Notifications", "Monitoring"], ["Event Notifications"]),
+    ("Which storage class is cheapest?", ["Cold Vault", "Standard"], ["Cold Vault"]),
+]
+QUERIES = ["container", "contain*", "which service", "service contain*", "e-mail", "e-ma*", "STORAGE",
+           "which", "missing", "which missing", "c*", "*", ""]
+
+
+def naive_search(bank, query):
+    """Match every query term against the terms of each question, without an index"""
+    question_terms = [set(tokenize(" ".join((question, *options)))) for question, options, _ in bank]
+    words = [(term, word.endswith("*") and i == len(tokenize(word)) - 1)
+             for word in query.split() for i, term in enumerate(tokenize(word))]
+    if not words:
+        return []
+    return [
+        question_id for question_id, terms in enumerate(question_terms)
+        if all(any(t == term or (prefix and t.startswith(term)) for t in terms) for term, prefix in words)
+    ]
+
+
+@pytest.fixture
+def bank():
+    return QuestionBank.from_records(RECORDS)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_a_scan(bank, query):
+    index = SearchIndex.build(bank)
+    expected = naive_search(bank, query)
+    assert index.search(query) == expected
+    for limit in (1, 2, 100):
+        assert index.search(query, limit) == expected[:limit]
+
+
+def test_lookups(bank):
+    index = SearchIndex.build(bank)
+    assert list(index.lookup("Container")) == [0, 2]
+    assert list(index.lookup("contain")) == []
+    assert index.lookup_prefix("stor") == {0, 4}
+
+
+def test_save_and_load_round_trip(bank, tmp_path):
+    path = str(tmp_path / "bank.qsi")
+    index = SearchIndex.build(bank)
+    index.save(path, b"h" * 32)
+    loaded, digest = SearchIndex.load(path)
+    assert digest == b"h" * 32
+    assert loaded.terms == index.terms and loaded.question_count == len(bank)
+    for query in QUERIES:
+        assert loaded.search(query) == index.search(query)
+
+    with open(path, "r+b") as f:
+        f.truncate(60)
+    with pytest.raises(ValueError):
+        SearchIndex.load(path)
+
+
+def test_load_search_index_uses_the_cached_index_while_current(tmp_path, monkeypatch):
+    source = tmp_path / "bank.txt"
+    source.write_text("".join(format_record(*record) for record in RECORDS), encoding="utf-8")
+    source_path = str(source)
+    bank = load_question_bank(source_path)
+    write_bank_cache(bank, cache_path_for(source_path), source_signature(source_path))
+
+    index = load_search_index(bank, source_path)
+    saved, digest = SearchIndex.load(index_path_for(source_path))
+    assert digest == read_cache_header(cache_path_for(source_path))["source_hash"]
+    assert saved.terms == index.terms
+
+    def no_build(question_bank):
+        raise AssertionError("the cached index should have been used")
+
+    monkeypatch.setattr(SearchIndex, "build", no_build)
+    assert load_search_index(bank, source_path).search("container") == [0, 2]
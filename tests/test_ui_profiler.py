@@ -0,0 +1,47 @@
+import threading
+
+from ui_profiler import UIProfiler
+
+
+class IdleMaster:
+    """Stands in for a Tk widget: runs after_idle callbacks when asked"""
+
+    def __init__(self):
+        self.idle = []
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+
+    def run_idle(self):
+        while self.idle:
+            self.idle.pop(0)()
+
+
+def test_outermost_handler_records_a_frame():
+    profiler = UIProfiler()
+    master = IdleMaster()
+    inner = profiler.wrap("inner", lambda: None, master)
+    outer = profiler.wrap("outer", inner, master)
+    outer()
+    master.run_idle()
+    assert [name for name, *_ in profiler.events] == ["inner", "outer", "frame"]
+
+
+def test_write_in_flight_does_not_hide_frames():
+    profiler = UIProfiler()
+    master = IdleMaster()
+    started, release = threading.Event(), threading.Event()
+
+    def write():
+        started.set()
+        release.wait(5)
+
+    writer = threading.Thread(target=profiler.wrap("write", write))
+    writer.start()
+    started.wait(5)
+    profiler.wrap("load_question", lambda: None, master)()
+    master.run_idle()
+    release.set()
+    writer.join()
+    names = [name for name, *_ in profiler.events]
+    assert names == ["load_question", "frame", "write"]
@@ -0,0 +1,142 @@
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from append_log import atomic_write
+
+# Profiling is opt-in: QUIZ_PROFILE=1 times the quiz window's handlers and
+# its background writes, shows rolling p50/p99 in an overlay and writes a
+# Chrome trace (chrome://tracing or Perfetto) when the window closes.
+# QUIZ_PROFILE=cprofile also runs cProfile on the Tk thread for the session.
+PROFILE_ENV = "QUIZ_PROFILE"
+TRACE_PATH = "quiz_profile.trace.json"
+CPROFILE_PATH = "quiz_profile.prof"
+# Durations kept per handler for the rolling percentiles
+WINDOW = 256
+# Trace events kept for a session; later ones are only counted
+MAX_TRACE_EVENTS = 1_000_000
+
+_profiler = None
+
+
+def session_profiler():
+    """Return the profiler for this session, or None unless QUIZ_PROFILE is set
+
+    Every window of the session shares one profiler, since only one cProfile
+    can be active at a time.
+    """
+    global _profiler
+    mode = os.environ.get(PROFILE_ENV, "")
+    if _profiler is None and mode not in ("", "0"):
+        _profiler = UIProfiler(use_cprofile=mode == "cprofile")
+    return _profiler
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class UIProfiler:
+    """Durations of named calls, as rolling windows and as a trace
+
+    Calls are timed with perf_counter_ns. Each name keeps its last `window`
+    durations for the percentiles; every call also becomes a trace event.
+    Recording is thread-safe, so background writes can be timed too.
+    """
+
+    def __init__(self, window=WINDOW, use_cprofile=False):
+        self.window = window
+        self.durations = {}  # name -> deque of recent durations in ns
+        self.events = []  # (name, thread ID, start ns, duration ns)
+        self.dropped_events = 0
+        self._lock = threading.Lock()
+        # Nesting of timed calls, per thread: writes timed on the writer
+        # thread must not hide the outermost Tk handler
+        self._local = threading.local()
+        self.cprofile = None
+        if use_cprofile:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def record(self, name, start, end):
+        with self._lock:
+            recent = self.durations.get(name)
+            if recent is None:
+                recent = self.durations[name] = deque(maxlen=self.window)
+            recent.append(end - start)
+            if len(self.events) < MAX_TRACE_EVENTS:
+                self.events.append((name, threading.get_ident(), start, end - start))
+            else:
+                self.dropped_events += 1
+
+    def wrap(self, name, func, master=None):
+        """Return func timed under `name`
+
+        With a Tk `master`, an outermost call also records a "frame": the
+        time from the call until Tk is idle again, which includes the
+        relayout and redraw the handler caused.
+        """
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            depth = getattr(self._local, "depth", 0)
+            outermost = master is not None and depth == 0
+            self._local.depth = depth + 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.depth = depth
+                self.record(name, start, time.perf_counter_ns())
+                if outermost:
+                    # Idle callbacks run after the redraws queued meanwhile
+                    master.after_idle(lambda: self.record("frame", start, time.perf_counter_ns()))
+        return timed
+
+    def percentiles(self):
+        """Return (name, calls in window, p50 ns, p99 ns) tuples, highest p99 first"""
+        with self._lock:
+            windows = [(name, sorted(recent)) for name, recent in self.durations.items()]
+        rows = [
+            (name, len(durations), _percentile(durations, 0.5), _percentile(durations, 0.99))
+            for name, durations in windows
+        ]
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+
+    def overlay_text(self, limit=8):
+        lines = [f"{'handler':<32} {'p50 ms':>7} {'p99 ms':>7}"]
+        for name, _, p50, p99 in self.percentiles()[:limit]:
+            lines.append(f"{name[:32]:<32} {p50 / 1e6:7.2f} {p99 / 1e6:7.2f}")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path=TRACE_PATH):
+        """Write every recorded call as a complete ("X") event of the Chrome trace format"""
+        with self._lock:
+            events = list(self.events)
+        pid = os.getpid()
+        main_thread = threading.main_thread().ident
+        trace = [
+            {
+                "name": name, "ph": "X", "pid": pid, "tid": thread_id,
+                "ts": start / 1000, "dur": duration / 1000,
+                "cat": "tk" if thread_id == main_thread else "writer",
+            }
+            for name, thread_id, start, duration in events
+        ]
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+    def dump_cprofile(self, path=CPROFILE_PATH):
+        """Write the cProfile stats so far; returns False when cProfile isn't running"""
+        if self.cprofile is None:
+            return False
+        self.cprofile.disable()
+        try:
+            self.cprofile.dump_stats(path)
+        finally:
+            self.cprofile.enable()
+        return True
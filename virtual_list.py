@@ -0,0 +1,79 @@
+from tkinter import Frame, ttk
+
+
+class VirtualList:
+    """A scrollable list with widgets only for the rows on screen
+
+    Every row is `row_height` pixels tall. The list keeps a pool of rows
+    just large enough to fill its height, made with `make_row(parent)`, and
+    as it scrolls it refills them with `fill_row(row, index)`. Opening a
+    list of a million items costs the same as one of twenty. Scrolling
+    moves by whole rows.
+    """
+
+    def __init__(self, parent, count, make_row, fill_row, row_height, bg="#ffffff"):
+        self.count = count
+        self.make_row = make_row
+        self.fill_row = fill_row
+        self.row_height = row_height
+        self.first = 0  # index of the top row
+        self.rows = []
+        self.visible = 1
+
+        self.frame = Frame(parent, bg=bg)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = Frame(self.frame, bg=bg)
+        self.body.pack(side="left", fill="both", expand=True)
+        self.body.bind("<Configure>", self.on_resize)
+        self.bind_wheel(self.body)
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def bind_wheel(self, widget):
+        """Scroll the list with the mouse wheel over a widget and its children"""
+        widget.bind("<MouseWheel>", self.on_wheel)  # Windows and macOS
+        widget.bind("<Button-4>", self.on_wheel)  # X11
+        widget.bind("<Button-5>", self.on_wheel)
+        for child in widget.winfo_children():
+            self.bind_wheel(child)
+
+    def on_resize(self, event):
+        """Grow the pool to cover the new height and lay the rows out again"""
+        self.visible = max(1, event.height // self.row_height)
+        # One extra row shows the partly visible one at the bottom
+        while len(self.rows) < self.visible + 1:
+            row = self.make_row(self.body)
+            self.bind_wheel(row)
+            self.rows.append(row)
+        self.scroll_to(self.first)
+
+    def scroll_to(self, first):
+        """Show the items from index `first` on"""
+        self.first = max(0, min(first, self.count - self.visible))
+        for i, row in enumerate(self.rows):
+            index = self.first + i
+            if i <= self.visible and index < self.count:
+                self.fill_row(row, index)
+                row.place(x=0, y=i * self.row_height, relwidth=1, height=self.row_height)
+            else:
+                row.place_forget()
+        if self.count:
+            self.scrollbar.set(self.first / self.count, min(1.0, (self.first + self.visible) / self.count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units" or "pages")"""
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * self.count))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.scroll_to(self.first + int(args[1]) * step)
+
+    def on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.first - 3)
+        else:
+            self.scroll_to(self.first + 3)